@@ -9,9 +9,9 @@ from sqlalchemy import select
 
 from Config import FLIGHT_RADAR_HEADERS, \
     FLIGHT_RADAR_MAX_REG_PER_BATCH, FLIGHT_RADAR_URL, FLIGHT_RADAR_REDIS_POLLING_KEY, FLIGHT_RADAR_REDIS_META_KEY, \
-    FLIGHT_RADAR_CHECK_INTERVAL_MISS, FLIGHT_RADAR_CHECK_INTERVAL_FOUND, DBSettings, \
+    FLIGHT_RADAR_CHECK_INTERVAL_MISS, FLIGHT_RADAR_CHECK_INTERVAL_FOUND, \
     FLIGHT_RADAR_FORCE_RECHECK_MISS, FLIGHT_RADAR_BOOTSTRAP_KEY
-from Database import DatabaseClient
+from Database import DatabaseClient, get_db_settings
 from Database.Models import Registrations, LivePositions
 from Utils import ensure_naive_utc, parse_dt, performance_timer
 
@@ -116,7 +116,7 @@ class FlightPollingStorage:
 async def live_flights_adaptive(storage_mode: str = "db"):
     logger.info("[Live Flights] Adaptive polling started")
 
-    username, password, host, port = DBSettings().get_reddis_credentials()
+    username, password, host, port = get_db_settings().get_reddis_credentials()
     redis_storage = FlightPollingStorage(username, password, host, port)
     db_client = DatabaseClient()
 
@@ -1,12 +1,13 @@
 import asyncio
 
-from sqlalchemy import select, inspect, or_, case, literal, text, func
+from sqlalchemy import select, inspect, text
 from sqlalchemy.dialects.postgresql import insert
 
-from Database.Models import Airlines, CiriumAircrafts, ASGAircrafts, Registrations
-from Database import DatabaseClient, AircraftRevision
+from Database.Models import Airlines, CiriumLatest, ASGAircrafts, Registrations
+from Database import DatabaseClient
 from Config import setup_logger
 from Utils import performance_timer
+from Utils.CiriumAirlineIndex import index_airlines, matched_airlines, party_of
 
 logger = setup_logger("registration_updater")
 
@@ -67,7 +68,7 @@ async def asg_regs_updater():
         result = await main_session.execute(stmt)
         airlines = result.scalars().all()
 
-    mapper = inspect(CiriumAircrafts)
+    mapper = inspect(CiriumLatest)
 
     columns = [
         column
@@ -75,55 +76,37 @@ async def asg_regs_updater():
         if column.key not in EXCLUDED_COLUMNS
     ]
 
-    filters = []
-    airline_cases = []
-
-    for company in airlines:
-        pattern = f"%{company}%"
-
-        condition = or_(
-            CiriumAircrafts.Operator.ilike(pattern),
-            CiriumAircrafts.Sub_Lessor.ilike(pattern),
-            CiriumAircrafts.Owner.ilike(pattern),
-        )
-
-        filters.append(condition)
-
-        airline_cases.append(
-            (condition, literal(company))
-        )
-
-    airline_case_expr = case(
-        *airline_cases,
-        else_=None
-    ).label("Airline")
-
     async with client.session("cirium") as cirium_session:
+        # The full airline list: new names are matched, names gone from main are dropped from the index
+        await index_airlines(cirium_session, airlines, prune=True)
+        names = list(dict.fromkeys(name for name in airlines if name))
+        match = matched_airlines(names)
+
         await cirium_session.execute(
             text('TRUNCATE TABLE "asgaircraft" RESTART IDENTITY')
         )
 
         select_stmt = (
             select(
-                airline_case_expr,
+                match.c.airline_name.label("Airline"),
                 *columns
             )
+            .join(match, party_of(match))
             .where(
-                or_(*filters),
-
-                CiriumAircrafts.Registration.isnot(None),
+                CiriumLatest.Registration.isnot(None),
 
-                ~CiriumAircrafts.Status.in_(
+                ~CiriumLatest.Status.in_(
                     EXCLUDED_STATUSES
                 )
             )
             .distinct(
-                CiriumAircrafts.Registration,
-                CiriumAircrafts.Serial_Number
+                CiriumLatest.Registration,
+                CiriumLatest.Serial_Number
             )
             .order_by(
-                CiriumAircrafts.Registration,
-                CiriumAircrafts.Serial_Number
+                CiriumLatest.Registration,
+                CiriumLatest.Serial_Number,
+                match.c.priority
             )
         )
 
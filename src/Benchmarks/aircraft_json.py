@@ -0,0 +1,164 @@
+"""
+Full aircraft listing: ORM path (AircraftSchemaFull models) vs Postgres-side JSON (json_build_object/json_agg).
+
+Creates a synthetic fleet in a scratch schema of the PowerPlatform database, then measures, per path,
+the time until the whole NDJSON body is encoded:
+- orm:      stream_aircrafts + model_dump + orjson (/full/stream)
+- orm-list: query_aircrafts + model_dump + orjson (/full, uncached)
+- sql:      stream_aircrafts_json (/full/sql-stream)
+The outputs are decoded and compared, so the SQL path is checked against the schema output.
+The scratch schema is dropped afterwards.
+
+Run from src/ (needs a reachable Postgres, the DB_* settings or --url):
+    python -m Benchmarks.aircraft_json --aircraft 5000 --repeat 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+import orjson
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from Database import get_db_settings, Aircraft, Airline, AircraftTemplate, Asset, Engine, \
+    AircraftEngine, AircraftPolicy, AircraftLesseeLessor, AircraftTechnicalData
+from Database.config import PowerPlatformBase
+from Routers.PowerPlatformRouters.DBQueries.Aircrafts import stream_aircrafts, stream_aircrafts_json, query_aircrafts
+from Schemas import EnginePositionEnum, AircraftInsuredStatusEnum, AircraftDataSourceEnum
+from Schemas.PowerPlatform.QuerySchemas.AircraftSchemas import GetAircraftQuery
+
+
+def _encode(item) -> bytes:
+    if isinstance(item, str):
+        return item.encode() + b"\n"
+    return orjson.dumps(item.model_dump(mode="json")) + b"\n"
+
+
+async def _seed(session, aircraft: int, seed: int):
+    rnd = random.Random(seed)
+    airlines, templates, engine_types = 40, 20, 30
+
+    await session.execute(insert(Asset), [
+        {"id": i, "asset_name": f"logo-{i}", "mime_type": "image/png", "content_hash": f"{i:064x}", "size_bytes": 1024}
+        for i in range(1, airlines + templates + 1)
+    ])
+    await session.execute(insert(Airline), [
+        {"id": i, "airline_name": f"Airline {i}", "icao": f"A{i:02d}", "iata": f"{i:02d}", "asset_id": i}
+        for i in range(1, airlines + 1)
+    ])
+    await session.execute(insert(AircraftTemplate), [
+        {"id": i, "template_name": f"Template {i}", "asset_id": airlines + i}
+        for i in range(1, templates + 1)
+    ])
+    await session.execute(insert(Engine), [
+        {"id": i, "engine_manufacture": f"Maker {i % 5}", "engine_model": f"Model-{i}"}
+        for i in range(1, engine_types + 1)
+    ])
+
+    start = date(2015, 1, 1)
+    rows, engines, policies, lessee_lessors, technical = [], [], [], [], []
+    for i in range(1, aircraft + 1):
+        rows.append({
+            "id": i, "registration": f"REG-{i:05d}", "msn": 10000 + i,
+            "airline_id": rnd.randint(1, airlines), "template_id": rnd.randint(1, templates),
+            "mtow": rnd.randint(50_000, 400_000), "agreed_value": round(rnd.uniform(1e6, 9e7), 2),
+            "depreciation_rate": 3.0, "depreciation_start_date": start + timedelta(days=rnd.randint(0, 3000)),
+            "combined_single_limit": 1e9, "hsl_deductible": 1e5, "hd_deductible": 5e4,
+        })
+        for position in (EnginePositionEnum.LEFT1, EnginePositionEnum.RIGHT1):
+            engines.append({"aircraft_id": i, "engine_id": rnd.randint(1, engine_types),
+                            "engine_msn": f"ESN-{i}-{position.value}", "position": position})
+        for p in range(rnd.randint(1, 3)):
+            policy_from = start + timedelta(days=365 * p)
+            policies.append({"aircraft_id": i, "policy_from": policy_from,
+                             "policy_to": policy_from + timedelta(days=364), "active": p == 0})
+        lessee_lessors.append({"aircraft_id": i, "lessee": f"Lessee {i % 97}", "lessor": f"Lessor {i % 13}",
+                               "active": True})
+        lessee_lessors.append({"aircraft_id": i, "lessee": "Former", "lessor": "Former", "active": False})
+        if rnd.random() < 0.9:
+            technical.append({"aircraft_id": i, "data_source": AircraftDataSourceEnum.CIRIUM, "data_source_row_id": i,
+                              "status": rnd.choice(list(AircraftInsuredStatusEnum)), "av_fixed": False,
+                              "in_dashboard": True})
+
+    for model, values in ((Aircraft, rows), (AircraftEngine, engines), (AircraftPolicy, policies),
+                          (AircraftLesseeLessor, lessee_lessors), (AircraftTechnicalData, technical)):
+        for offset in range(0, len(values), 5000):
+            await session.execute(insert(model), values[offset:offset + 5000])
+    await session.commit()
+
+
+async def _orm_stream(session_factory, payload) -> bytes:
+    async with session_factory() as session:
+        return b"".join([_encode(item) async for item in stream_aircrafts(session, full=True, _payload=payload)])
+
+
+async def _orm_list(session_factory, payload) -> bytes:
+    async with session_factory() as session:
+        return b"".join(_encode(item) for item in await query_aircrafts(session, full=True, _payload=payload))
+
+
+async def _sql_stream(session_factory, payload) -> bytes:
+    async with session_factory() as session:
+        return b"".join([_encode(item) async for item in stream_aircrafts_json(session, _payload=payload)])
+
+
+PATHS = {"orm": _orm_stream, "orm-list": _orm_list, "sql": _sql_stream}
+
+
+async def run(url: str, aircraft: int, repeat: int, seed: int) -> tuple[dict[str, float], int]:
+    schema = f"bench_aircraft_json_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(url)
+    async with admin.begin() as conn:
+        await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+
+    engine = create_async_engine(url, connect_args={"server_settings": {"search_path": schema}})
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(PowerPlatformBase.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await _seed(session, aircraft, seed)
+
+        payload = GetAircraftQuery()
+        outputs = {name: await func(session_factory, payload) for name, func in PATHS.items()}
+        decoded = {name: [orjson.loads(line) for line in body.splitlines()] for name, body in outputs.items()}
+        assert decoded["sql"] == decoded["orm"] == decoded["orm-list"], "SQL documents differ from AircraftSchemaFull"
+
+        # Interleave the paths, so drifts of the machine hit all of them alike
+        samples = {name: [] for name in PATHS}
+        for _ in range(repeat):
+            for name, func in PATHS.items():
+                start = time.perf_counter()
+                await func(session_factory, payload)
+                samples[name].append((time.perf_counter() - start) * 1000)
+        return {name: statistics.median(values) for name, values in samples.items()}, len(outputs["sql"])
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await admin.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--aircraft", type=int, default=5000, help="size of the synthetic fleet")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per path, the median is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None, help="database URL, defaults to the PowerPlatform database")
+    args = parser.parse_args()
+
+    url = args.url or get_db_settings().get_db_url("powerplatform")
+    results, size = asyncio.run(run(url, args.aircraft, args.repeat, args.seed))
+
+    print(f"{args.aircraft} aircraft, {size / 1024:.0f} KiB of NDJSON")
+    print(f"{'path':<10}{'ms':>10}{'vs sql':>10}")
+    for name, ms in results.items():
+        print(f"{name:<10}{ms:>10.1f}{ms / results['sql']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Fuzzy airline / engine resolution: in-memory trigram index (Utils/FuzzyMatcher.py) vs pg_trgm queries.
+
+Creates synthetic airlines and engines in a scratch schema of the PowerPlatform database and resolves
+noisy names (typos, dropped and extra words) with:
+- sql-row:   one `% ... ORDER BY similarity() DESC LIMIT 1` query per name (the former per-row import lookups)
+- sql-batch: one query for all names, a similarity subquery per unnest()-ed name
+- memory:    ReferenceMatcher.airline_many / engine_many, index build included
+Scores of every best match are compared with the pg_trgm ones; ties may pick different rows, scores must agree.
+The scratch schema is dropped afterwards. --memory-only skips the database paths.
+
+Run from src/ (needs a reachable Postgres with pg_trgm, the DB_* settings or --url):
+    python -m Benchmarks.fuzzy_match --airlines 2000 --engines 300 --names 500 --repeat 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import string
+import time
+import uuid
+
+from sqlalchemy import insert, select, func, literal, text, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from Config import FUZZY_AIRLINE_THRESHOLD, FUZZY_ENGINE_THRESHOLD
+from Database import get_db_settings, Airline, Engine, Asset
+from Utils.FuzzyMatcher import ReferenceMatcher, similarity
+from Utils.ReferenceCache import References, AirlineRef, EngineRef
+
+_WORDS = ["Air", "Airlines", "Airways", "Aviation", "Cargo", "Express", "Jet", "Wings", "Sky", "Atlantic",
+          "Pacific", "Nordic", "Sun", "Star", "Global", "Regional", "Leasing", "Capital", "Blue", "Royal"]
+_MANUFACTURERS = ["CFM International", "Pratt & Whitney", "Rolls-Royce", "General Electric", "IAE", "Honeywell"]
+
+
+def _word(rnd: random.Random) -> str:
+    return rnd.choice(string.ascii_uppercase) + "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 9)))
+
+
+def _noisy(rnd: random.Random, name: str) -> str:
+    """A typo, a dropped or an extra word"""
+    words = name.split()
+    change = rnd.random()
+    if change < 0.4:
+        i = rnd.randrange(len(words))
+        if len(words[i]) > 3:
+            j = rnd.randrange(1, len(words[i]))
+            words[i] = words[i][:j] + rnd.choice(string.ascii_lowercase) + words[i][j + 1:]
+    elif change < 0.7 and len(words) > 1:
+        words.pop(rnd.randrange(len(words)))
+    else:
+        words.append(rnd.choice(_WORDS))
+    return " ".join(words).lower() if rnd.random() < 0.3 else " ".join(words)
+
+
+def make_data(airlines: int, engines: int, names: int, seed: int):
+    rnd = random.Random(seed)
+    airline_rows = [
+        AirlineRef(i, f"{_word(rnd)} {rnd.choice(_WORDS)}" + (f" {rnd.choice(_WORDS)}" if rnd.random() < 0.5 else ""),
+                   None, None)
+        for i in range(1, airlines + 1)
+    ]
+    engine_rows = [
+        EngineRef(i, rnd.choice(_MANUFACTURERS), f"{rnd.choice(string.ascii_uppercase)}{rnd.choice(string.ascii_uppercase)}"
+                                                 f"{rnd.randint(1, 999)}-{rnd.randint(1, 9)}{rnd.choice('ABC')}")
+        for i in range(1, engines + 1)
+    ]
+    airline_names = [_noisy(rnd, rnd.choice(airline_rows).airline_name) for _ in range(names)]
+    engine_pairs = []
+    for _ in range(names):
+        engine = rnd.choice(engine_rows)
+        engine_pairs.append((engine.engine_manufacture.split()[0], _noisy(rnd, engine.engine_model)))
+    return airline_rows, engine_rows, airline_names, engine_pairs
+
+
+def _memory(airline_rows, engine_rows, airline_names, engine_pairs):
+    references = References(1, airline_rows, engine_rows, [])
+    matcher = ReferenceMatcher(references)
+    airlines = matcher.airline_many(airline_names)
+    engines = matcher.engine_many(engine_pairs)
+    return ({name: airline.id for name, airline in airlines.items()},
+            {pair: engine.id for pair, engine in engines.items()})
+
+
+def _airline_query(name):
+    return (
+        select(Airline.id)
+        .where(Airline.airline_name.op("%")(name))
+        .order_by(func.similarity(Airline.airline_name, name).desc())
+        .limit(1)
+    )
+
+
+def _engine_query(manufacturer, model):
+    return (
+        select(Engine.id)
+        .where(Engine.engine_manufacture.op("%")(manufacturer), Engine.engine_model.op("%")(model))
+        .order_by((func.similarity(Engine.engine_manufacture, manufacturer)
+                   + func.similarity(Engine.engine_model, model)).desc())
+        .limit(1)
+    )
+
+
+async def _sql_row(session_factory, airline_names, engine_pairs):
+    async with session_factory() as session:
+        airlines = {}
+        for name in set(airline_names):
+            airline_id = await session.scalar(_airline_query(name))
+            if airline_id is not None:
+                airlines[name] = airline_id
+        engines = {}
+        for manufacturer, model in set(engine_pairs):
+            engine_id = await session.scalar(_engine_query(manufacturer, model))
+            if engine_id is not None:
+                engines[(manufacturer, model)] = engine_id
+        return airlines, engines
+
+
+async def _sql_batch(session_factory, airline_names, engine_pairs):
+    names = sorted(set(airline_names))
+    pairs = sorted(set(engine_pairs))
+    async with session_factory() as session:
+        requested = func.unnest(literal(names, ARRAY(String))).table_valued("name").render_derived(name="requested")
+        best = _airline_query(requested.c.name).scalar_subquery()
+        airlines = {name: airline_id for name, airline_id in await session.execute(select(requested.c.name, best))
+                    if airline_id is not None}
+
+        requested = (
+            func.unnest(literal([p[0] for p in pairs], ARRAY(String)), literal([p[1] for p in pairs], ARRAY(String)))
+            .table_valued("manufacturer", "model").render_derived(name="requested")
+        )
+        best = _engine_query(requested.c.manufacturer, requested.c.model).scalar_subquery()
+        rows = await session.execute(select(requested.c.manufacturer, requested.c.model, best))
+        engines = {(manufacturer, model): engine_id for manufacturer, model, engine_id in rows if engine_id is not None}
+        return airlines, engines
+
+
+async def _check_scores(session_factory, airline_rows, engine_rows, memory, sql):
+    """The best score of both paths must agree (float4 precision of pg_trgm), whichever row a tie picked"""
+    airline_names = {a.id: a.airline_name for a in airline_rows}
+    engines = {e.id: e for e in engine_rows}
+
+    assert memory[0].keys() == sql[0].keys(), "Airline names matched by one path only"
+    for name, airline_id in memory[0].items():
+        a, b = similarity(airline_names[airline_id], name), similarity(airline_names[sql[0][name]], name)
+        assert abs(a - b) < 1e-6, f"Airline '{name}': {a} vs {b}"
+
+    assert memory[1].keys() == sql[1].keys(), "Engines matched by one path only"
+    for (manufacturer, model), engine_id in memory[1].items():
+        def score(e):
+            return similarity(e.engine_manufacture, manufacturer) + similarity(e.engine_model, model)
+        a, b = score(engines[engine_id]), score(engines[sql[1][(manufacturer, model)]])
+        assert abs(a - b) < 1e-6, f"Engine '{manufacturer} {model}': {a} vs {b}"
+
+    # And the scoring itself against pg_trgm
+    async with session_factory() as session:
+        for name, airline_id in list(memory[0].items())[:50]:
+            ours = similarity(airline_names[airline_id], name)
+            theirs = await session.scalar(text("SELECT similarity(:a, :b)"),
+                                          {"a": airline_names[airline_id], "b": name})
+            assert abs(ours - theirs) < 1e-6, f"similarity('{airline_names[airline_id]}', '{name}'): {ours} vs {theirs}"
+
+
+async def run(url, airlines, engines, names, repeat, seed, memory_only):
+    airline_rows, engine_rows, airline_names, engine_pairs = make_data(airlines, engines, names, seed)
+    args = (airline_names, engine_pairs)
+    samples = {"memory": []}
+
+    def timed_memory():
+        start = time.perf_counter()
+        result = _memory(airline_rows, engine_rows, *args)
+        samples["memory"].append((time.perf_counter() - start) * 1000)
+        return result
+
+    if memory_only:
+        for _ in range(repeat):
+            memory = timed_memory()
+        return {name: statistics.median(values) for name, values in samples.items()}, memory
+
+    schema = f"bench_fuzzy_match_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(url)
+    async with admin.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+
+    # pg_trgm lives in public
+    engine = create_async_engine(url, connect_args={"server_settings": {"search_path": f"{schema},public"}})
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Airline.metadata.create_all(
+                sync_conn, tables=[Asset.__table__, Airline.__table__, Engine.__table__]))
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await session.execute(insert(Airline), [{"id": a.id, "airline_name": a.airline_name} for a in airline_rows])
+            await session.execute(insert(Engine), [{"id": e.id, "engine_manufacture": e.engine_manufacture,
+                                                    "engine_model": e.engine_model} for e in engine_rows])
+            await session.commit()
+
+        paths = {"sql-row": _sql_row, "sql-batch": _sql_batch}
+        samples.update({name: [] for name in paths})
+        results = {}
+        for _ in range(repeat):
+            for name, func_ in paths.items():
+                start = time.perf_counter()
+                results[name] = await func_(session_factory, *args)
+                samples[name].append((time.perf_counter() - start) * 1000)
+            memory = timed_memory()
+
+        await _check_scores(session_factory, airline_rows, engine_rows, memory, results["sql-batch"])
+        return {name: statistics.median(values) for name, values in samples.items()}, memory
+    finally:
+        await engine.dispose()
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await admin.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--airlines", type=int, default=2000, help="airlines in the reference table")
+    parser.add_argument("--engines", type=int, default=300, help="engine types in the reference table")
+    parser.add_argument("--names", type=int, default=500, help="noisy airline names and engine pairs to resolve")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per path, the median is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", default=None, help="database URL, defaults to the PowerPlatform database")
+    parser.add_argument("--memory-only", action="store_true", help="time the in-memory index only")
+    args = parser.parse_args()
+
+    url = None if args.memory_only else args.url or get_db_settings().get_db_url("powerplatform")
+    results, (airlines, engines) = asyncio.run(run(url, args.airlines, args.engines, args.names, args.repeat,
+                                                   args.seed, args.memory_only))
+
+    print(f"{args.names} names and engine pairs against {args.airlines} airlines / {args.engines} engines "
+          f"(thresholds {FUZZY_AIRLINE_THRESHOLD} / {FUZZY_ENGINE_THRESHOLD}): "
+          f"{len(airlines)} airlines and {len(engines)} engines matched")
+    print(f"{'path':<12}{'ms':>10}{'vs memory':>12}")
+    for name, ms in results.items():
+        print(f"{name:<12}{ms:>10.1f}{ms / results['memory']:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
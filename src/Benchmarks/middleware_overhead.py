@@ -0,0 +1,164 @@
+"""
+Per-request overhead of the request middleware, before (two BaseHTTPMiddleware layers)
+and after (RequestContextMiddleware, pure ASGI).
+
+Drives the ASGI apps directly, without a server or sockets, on two paths:
+- /health: no database or cache access
+- /cached: a GET served from the in-process cache, like a warm PowerPlatform read
+
+Run from src/:
+    python -m Benchmarks.middleware_overhead --requests 5000 --repeat 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI, Request, Response
+from redis.asyncio import Redis
+
+from Utils import DBProxy, success_response
+from Utils.Caching import CachedJSON, local_cache
+from Utils.Middlewares import RequestContextMiddleware, logger as middleware_logger
+
+CACHED_KEY = "benchmark:v1.all"
+CACHED_PAYLOAD = [{"id": i, "registration": f"REG-{i}", "airline": "ASG", "active": True} for i in range(50)]
+
+
+def _register_legacy(app: FastAPI):
+    """Copy of the middlewares replaced by RequestContextMiddleware"""
+
+    @app.middleware("http")
+    async def log_and_db_requests(request: Request, call_next):
+        start_time = asyncio.get_event_loop().time()
+        request.state.redis = app.state.redis
+        request.state.db_proxy = DBProxy(app.state.redis, app.state.cache_redis)
+
+        try:
+            response = await call_next(request)
+
+            duration = asyncio.get_event_loop().time() - start_time
+            middleware_logger.info(
+                f"{request.method} {request.url.path} completed_in={duration:.2f}s | "
+                f"status_code={response.status_code} | "
+                f"correlation_id={request.state.correlation_id}"
+            )
+            return response
+        finally:
+            await request.state.db_proxy.close_all()
+
+    @app.middleware("http")
+    async def add_correlation_id(request: Request, call_next):
+        correlation_id = str(uuid.uuid4())
+        request.state.correlation_id = correlation_id
+        response = await call_next(request)
+        response.headers["X-Correlation-ID"] = correlation_id
+        return response
+
+
+def build_app(mode: str) -> FastAPI:
+    app = FastAPI()
+    # Clients connect lazily and are never used: /cached is served from the local cache
+    app.state.redis = Redis(decode_responses=True)
+    app.state.cache_redis = Redis()
+    bare_proxy = DBProxy(app.state.redis, app.state.cache_redis)
+
+    @app.get("/health")
+    async def health():
+        ...
+
+    @app.get("/cached")
+    async def cached(request: Request, response: Response):
+        if mode == "bare":
+            request.state.correlation_id = str(uuid.uuid4())
+        db_proxy = getattr(request.state, "db_proxy", None) or bare_proxy
+        data = await db_proxy.get_or_cache(CACHED_KEY, "powerplatform", None, raw=True)
+        return success_response(request=request, response=response, data=data)
+
+    if mode == "legacy":
+        _register_legacy(app)
+    elif mode == "asgi":
+        app.add_middleware(RequestContextMiddleware, fastapi_app=app)
+    return app
+
+
+async def _request(app: FastAPI, path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+        "state": {},
+    }
+    status_code = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def _measure(app: FastAPI, path: str, requests: int) -> float:
+    """Mean microseconds per request"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await _request(app, path)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def run(requests: int, repeat: int) -> dict[str, dict[str, float]]:
+    local_cache.set(CACHED_KEY, CachedJSON.dump(CACHED_PAYLOAD, fresh_for=3600), 3600)
+    apps = {mode: build_app(mode) for mode in ("bare", "legacy", "asgi")}
+
+    for app in apps.values():
+        for path in ("/health", "/cached"):
+            assert await _request(app, path) == 200, path
+            await _measure(app, path, min(requests, 200))
+
+    results = {}
+    for path in ("/health", "/cached"):
+        # Interleave the modes, so drifts of the machine hit all of them alike
+        samples = {mode: [] for mode in apps}
+        for _ in range(repeat):
+            for mode, app in apps.items():
+                samples[mode].append(await _measure(app, path, requests))
+        results[path] = {mode: statistics.median(values) for mode, values in samples.items()}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="requests per sample")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per mode, the median is reported")
+    parser.add_argument("--with-logging", action="store_true", help="keep the per-request access log enabled")
+    args = parser.parse_args()
+
+    middleware_logger.disabled = not args.with_logging
+    results = asyncio.run(run(args.requests, args.repeat))
+
+    print(f"{'path':<10}{'bare us':>10}{'legacy us':>12}{'asgi us':>10}{'legacy +us':>13}{'asgi +us':>11}")
+    for path, modes in results.items():
+        bare = modes["bare"]
+        print(
+            f"{path:<10}{bare:>10.1f}{modes['legacy']:>12.1f}{modes['asgi']:>10.1f}"
+            f"{modes['legacy'] - bare:>13.1f}{modes['asgi'] - bare:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,8 @@ if DEV_MODE:
     SUBSCRIPTION_FILE: Path = ROOT / "subscription_data.json"
     FLIGHT_RADAR_PATH: Path = ROOT / "flight_radar"
     AVIATION_EDGE_PATH: Path = ROOT / "aviation_edge"
+    # Filesystem blob store: must be persistent storage (the Dockerfile declares it a volume)
+    ASSETS_PATH: Path = Path(os.getenv("ASSETS_PATH") or ROOT / "assets")
 else:
     ENV_PATH: Path | str = os.getenv("ENV_PATH") or get_project_root() / ".env"
     ROOT: Path = get_project_root() / "api_data"
@@ -52,6 +54,8 @@ else:
     SUBSCRIPTION_FILE: Path = ROOT / "subscription_data.json"
     FLIGHT_RADAR_PATH: Path = ROOT / "flight_radar"
     AVIATION_EDGE_PATH: Path = ROOT / "aviation_edge"
+    # Filesystem blob store: must be persistent storage (the Dockerfile declares it a volume)
+    ASSETS_PATH: Path = Path(os.getenv("ASSETS_PATH") or ROOT / "assets")
 
 
 
@@ -64,6 +68,7 @@ RESPONSES_PATH.mkdir(parents=True, exist_ok=True)
 CIRIUM_FILES_PATH.mkdir(parents=True, exist_ok=True)
 FLIGHT_RADAR_PATH.mkdir(parents=True, exist_ok=True)
 AVIATION_EDGE_PATH.mkdir(parents=True, exist_ok=True)
+ASSETS_PATH.mkdir(parents=True, exist_ok=True)
 
 
 def require_env(name: str, additional=None) -> Optional[bool | str | int]:
@@ -80,18 +85,31 @@ PATH = find_dotenv(filename=str(Path(ENV_PATH).absolute()))
 load_dotenv(dotenv_path=PATH)
 
 ENABLE_PERFORMANCE_LOGGER: bool = require_env("ENABLE_PERFORMANCE_LOGGER", False)
+# Server-Timing header with the db/redis/serialize breakdown of every response (Utils/Timing.py)
+SERVER_TIMING_HEADER: bool = str(require_env("SERVER_TIMING_HEADER", "true")).lower() in ("1", "true", "yes", "on")
 
 # SERVER
 
 HOST: str = require_env("HOST", "0.0.0.0")
 PORT: int = require_env("PORT", 8000)
 
+# Uvicorn worker processes. Background work (scheduler, file watchers, subscriptions) runs in the elected leader only
+WORKERS: int = int(require_env("WORKERS", 1))
+LEADER_ELECTION: bool = str(require_env("LEADER_ELECTION", "true")).lower() in ("1", "true", "yes", "on")
+LEADER_LEASE_KEY: str = require_env("LEADER_LEASE_KEY", "leader:background")
+LEADER_LEASE_TTL_MS: int = int(require_env("LEADER_LEASE_TTL_MS", 15000))
+
 SELF_HOST: str = require_env("SELF_HOST", "api.aixii.com")
 SELF_PORT: int = require_env("SELF_PORT", 8000)
 
 # API
 
 class Router(APIRouter):
+    def __init__(self, *args, **kwargs):
+        from Utils.Timing import TimedRoute
+        kwargs.setdefault("route_class", TimedRoute)
+        super().__init__(*args, **kwargs)
+
     def add_api_route(self, path: str, endpoint, **kwargs):
         if path.endswith("/"):
             alt_path = path[:-1]
@@ -114,6 +132,24 @@ API_REDOC_URL: str = require_env("API_REDOC_URL", "/api/redoc")
 API_ROOT_URL: str = require_env("API_ROOT_URL", "/api/v1")
 API_OPENAPI_VERSION: str = require_env("API_OPENAPI_VERSION", "3.0.2")
 
+# Keyset pagination and NDJSON streaming of the aircraft listings
+AIRCRAFT_PAGE_DEFAULT_LIMIT: int = int(require_env("AIRCRAFT_PAGE_DEFAULT_LIMIT", 100))
+AIRCRAFT_PAGE_MAX_LIMIT: int = int(require_env("AIRCRAFT_PAGE_MAX_LIMIT", 1000))
+AIRCRAFT_STREAM_BATCH: int = int(require_env("AIRCRAFT_STREAM_BATCH", 500))
+# Aircraft written per transaction by the Cirium -> PowerPlatform sync
+AIRCRAFT_SYNC_BATCH: int = int(require_env("AIRCRAFT_SYNC_BATCH", 1000))
+
+# Content-addressed assets (/powerplatform/assets/{hash}) never change, clients may keep them forever
+ASSET_CACHE_CONTROL: str = require_env("ASSET_CACHE_CONTROL", "public, max-age=31536000, immutable")
+# Where new asset blobs go: "database" (assets.base64) or "filesystem" (ASSETS_PATH, Postgres keeps the metadata).
+# The filesystem store needs ASSETS_PATH on persistent storage shared by every host running the API
+ASSET_STORE_BACKEND: str = require_env("ASSET_STORE_BACKEND", "database").lower()
+# Move the blobs already in assets.base64 to the filesystem store (and drop them from the table) at startup.
+# Only with ASSET_STORE_BACKEND=filesystem; enable once ASSETS_PATH is known to be durable
+ASSET_MIGRATE_BLOBS: bool = str(require_env("ASSET_MIGRATE_BLOBS", "false")).lower() in ("1", "true", "yes", "on")
+# Blobs moved from assets.base64 to the filesystem store per transaction
+ASSET_MIGRATION_BATCH: int = int(require_env("ASSET_MIGRATION_BATCH", 50))
+
 # CORS
 
 CORS_ORIGINS: list = require_env("CORS_ORIGINS", "*").split(",")
@@ -134,6 +170,12 @@ class DBSettings(BaseSettings):
     DB_PORT: int = Field(default=5432)
     DB_NAME: str = Field(default="")
 
+    # Connection pool of every engine (one engine per database per process, see Database/Client.py)
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_POOL_TIMEOUT: int = Field(default=30)
+    DB_POOL_RECYCLE: int = Field(default=300)
+
     REDIS_USER: str = Field(default="")
     REDIS_USER_PASSWORD: str = Field(default="")
     REDIS_HOST: str = Field(default=HOST)
@@ -165,6 +207,44 @@ class DBSettings(BaseSettings):
         return self.REDIS_USER, quote_plus(self.REDIS_USER_PASSWORD), self.REDIS_HOST, self.REDIS_PORT
 
 
+# CACHE
+
+# Bump when cached response schemas change, so old entries are never read back
+CACHE_KEY_VERSION: int = int(require_env("CACHE_KEY_VERSION", 1))
+LOCAL_CACHE_MAX_ITEMS: int = int(require_env("LOCAL_CACHE_MAX_ITEMS", 1024))
+LOCAL_CACHE_TTL: int = int(require_env("LOCAL_CACHE_TTL", 30))
+CACHE_INVALIDATION_CHANNEL: str = require_env("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+CACHE_COMPRESS_MIN_BYTES: int = int(require_env("CACHE_COMPRESS_MIN_BYTES", 16 * 1024))
+CACHE_COMPRESS_LEVEL: int = int(require_env("CACHE_COMPRESS_LEVEL", 1))
+# Defaults of the cache policy registry (Utils/Caching.py)
+CACHE_DEFAULT_TTL: int = int(require_env("CACHE_DEFAULT_TTL", 60))
+# Extra seconds a cache entry may be served stale (while refreshed in the background) after its TTL
+CACHE_STALE_TTL: int = int(require_env("CACHE_STALE_TTL", "30"))
+CACHE_NEGATIVE_TTL: int = int(require_env("CACHE_NEGATIVE_TTL", 15))
+CACHE_TTL_JITTER: float = float(require_env("CACHE_TTL_JITTER", 0.1))
+CACHE_MAX_VALUE_BYTES: int = int(require_env("CACHE_MAX_VALUE_BYTES", 16 * 1024 * 1024))
+CACHE_TAG_TTL: int = int(require_env("CACHE_TAG_TTL", 24 * 60 * 60))
+CACHE_DB_CHANNEL: str = require_env("CACHE_DB_CHANNEL", "cache_invalidation")
+CACHE_DB_INSTALL_TRIGGERS: bool = str(require_env("CACHE_DB_INSTALL_TRIGGERS", "true")).lower() in ("1", "true", "yes", "on")
+CACHE_DB_DEBOUNCE_MS: int = int(require_env("CACHE_DB_DEBOUNCE_MS", 200))
+CACHE_LOCK_ENABLED: bool = str(require_env("CACHE_LOCK_ENABLED", "true")).lower() in ("1", "true", "yes", "on")
+CACHE_LOCK_TTL_MS: int = int(require_env("CACHE_LOCK_TTL_MS", 10_000))
+CACHE_LOCK_POLL_MS: int = int(require_env("CACHE_LOCK_POLL_MS", 50))
+# Airlines / engines / templates kept in memory (Utils/ReferenceCache.py). Reloaded on a change notification,
+# at the latest after this many seconds
+REFERENCE_CACHE_TTL: int = int(require_env("REFERENCE_CACHE_TTL", 300))
+# Minimal trigram similarity of fuzzy airline / engine matches (Utils/FuzzyMatcher.py), 0.3 is the pg_trgm default
+FUZZY_AIRLINE_THRESHOLD: float = float(require_env("FUZZY_AIRLINE_THRESHOLD", 0.3))
+FUZZY_ENGINE_THRESHOLD: float = float(require_env("FUZZY_ENGINE_THRESHOLD", 0.3))
+# AircraftManual -> Aircraft reconcile queue (Utils/ReconcileQueue.py): entries per batch, batches in parallel,
+# seconds between polls of an empty queue, seconds a claimed batch is reserved, longest retry delay of a failed entry
+RECONCILE_BATCH: int = int(require_env("RECONCILE_BATCH", 100))
+RECONCILE_CONCURRENCY: int = int(require_env("RECONCILE_CONCURRENCY", 2))
+RECONCILE_POLL_INTERVAL: float = float(require_env("RECONCILE_POLL_INTERVAL", 1.0))
+RECONCILE_LEASE: int = int(require_env("RECONCILE_LEASE", 300))
+RECONCILE_MAX_RETRY_DELAY: int = int(require_env("RECONCILE_MAX_RETRY_DELAY", 3600))
+
+
 #  LOGS
 
 LOGS_DIR = get_project_root() / 'Logs'
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import String, Float, Integer, Boolean, Date, ForeignKey, Index
+from sqlalchemy import String, Float, Integer, Boolean, Date, ForeignKey, Index, Table, Column, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .config import CiriumBase as Base
@@ -1233,3 +1233,70 @@ class CiriumAircraftsDeltas(Base):
 
     VIP_Multiple_Configurations_exist: Mapped[int] = mapped_column(Integer, nullable=True, name="VIP Multiple Configurations exist")
     VIP_Number_of_Seats_estimated: Mapped[int] = mapped_column(Integer, nullable=True, name="VIP Number of Seats estimated")
+
+
+class CiriumLatest(Base):
+    """
+    Snapshot of the latest revision of CiriumAircrafts: same columns and attributes, no history.
+    Built and swapped in after each ingest (Utils/CiriumSnapshot.py), indexed on Serial Number, Registration, Operator
+    """
+    __table__ = Table(
+        "cirium_latest",
+        Base.metadata,
+        *(
+            Column(column.name, column.type, key=key, primary_key=column.primary_key, nullable=column.nullable)
+            for key, column in CiriumAircrafts.__mapper__.columns.items()
+        ),
+    )
+
+
+# -----------------------------
+# Airline -> Cirium party (Operator / Sub Lessor / Owner) resolution, Utils/CiriumAirlineIndex.py
+# -----------------------------
+class CiriumParty(Base):
+    """Distinct Operator / Sub Lessor / Owner strings seen in Cirium revisions"""
+    party: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    first_revision_id: Mapped[int] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "cirium_party_trgm_idx",
+            "party",
+            postgresql_using="gin",
+            postgresql_ops={"party": "gin_trgm_ops"},
+        ),
+    )
+
+
+class CiriumPartyAirline(Base):
+    """Party containing an airline name (case-insensitive), the former `party ILIKE '%name%'` conditions"""
+    party: Mapped[str] = mapped_column(String, nullable=False)
+    airline_name: Mapped[str] = mapped_column(String, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("party", "airline_name", name="ux_cirium_party_airline"),
+    )
+
+
+class CiriumIndexedAirline(Base):
+    """Airline names whose matches are complete in CiriumPartyAirline"""
+    airline_name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+
+
+class CiriumValuation(Base):
+    """Market value / lease rate of an aircraft per revision, appended on ingest (Utils/CiriumValuations.py)"""
+    registration: Mapped[str] = mapped_column(String, nullable=False)
+    serial_number: Mapped[str] = mapped_column(String, nullable=False)
+    revision_id: Mapped[int] = mapped_column(
+        ForeignKey(AircraftRevision.id, ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    revision_date: Mapped[date] = mapped_column(Date, nullable=False)
+    market_value: Mapped[float] = mapped_column(Float, nullable=True)
+    lease_rate: Mapped[float] = mapped_column(Float, nullable=True)
+
+    __table_args__ = (
+        # The history of an aircraft is one range of this index
+        UniqueConstraint("registration", "serial_number", "revision_id", name="ux_cirium_valuation"),
+    )
@@ -1,7 +1,11 @@
+import time
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import AsyncGenerator, Any
 
+from sqlalchemy import event, exc
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 try:
     from Config import DBSettings
@@ -9,37 +13,142 @@ except ModuleNotFoundError:
     from ..Config import DBSettings
 
 
+@lru_cache(maxsize=1)
+def get_db_settings() -> DBSettings:
+    """DBSettings parsed once per process"""
+    return DBSettings()
+
+
+class PoolStats:
+    """Checkout counters of one engine pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.overflow_peak = 0
+
+    def as_dict(self, pool: AsyncAdaptedQueuePool) -> dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "overflow_peak": self.overflow_peak,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool measuring how long a checkout waits for a free connection"""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.stats.wait_total += waited
+            self.stats.wait_max = max(self.stats.wait_max, waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+# Process-wide registry: one engine (and pool) per database, shared by DatabaseClient and DBProxy
+_engines: dict[str, AsyncEngine] = {}
+_session_factories: dict[str, async_sessionmaker] = {}
+
+
+def _create_engine(db_name: str) -> AsyncEngine:
+    settings = get_db_settings()
+    engine = create_async_engine(
+        settings.get_db_url(db_name),
+        echo=False,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+    pool = engine.sync_engine.pool
+    pool.stats = PoolStats()
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def _on_checkout(_dbapi_conn, _record, _proxy):
+        current = engine.sync_engine.pool
+        current.stats.checkouts += 1
+        # QueuePool.overflow() counts from -pool_size, so it is positive only past the pool size
+        current.stats.overflow_peak = max(current.stats.overflow_peak, current.overflow())
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def _on_checkin(_dbapi_conn, _record):
+        engine.sync_engine.pool.stats.checkins += 1
+
+    return engine
+
+
+def get_engine(db_name: str) -> AsyncEngine:
+    """Creates or returns the process-wide engine of the database"""
+    if db_name not in _engines:
+        _engines[db_name] = _create_engine(db_name)
+        _session_factories[db_name] = async_sessionmaker(
+            _engines[db_name], class_=AsyncSession, expire_on_commit=False
+        )
+    return _engines[db_name]
+
+
+def get_session_factory(db_name: str) -> async_sessionmaker[AsyncSession]:
+    if db_name not in _session_factories:
+        get_engine(db_name)
+    return _session_factories[db_name]
+
+
+def pool_stats() -> dict[str, dict]:
+    return {
+        db_name: engine.sync_engine.pool.stats.as_dict(engine.sync_engine.pool)
+        for db_name, engine in _engines.items()
+    }
+
+
+async def dispose_engines():
+    for engine in _engines.values():
+        await engine.dispose()
+    _engines.clear()
+    _session_factories.clear()
+
+
 class DatabaseClient:
+    """
+    Session helper over the process-wide engine registry.
+    Instances are cheap: every DatabaseClient shares the same engines and connection pools
+    """
+
     def __init__(self):
-        self.settings = DBSettings()
-        self._engines: dict[str, AsyncEngine] = {}
-        self._session_factories: dict[str, async_sessionmaker] = {}
+        self.settings = get_db_settings()
 
     def _get_engine(self, db_name: str) -> AsyncEngine:
         """Creates or returns an engine for the specified database."""
-        if db_name not in self._engines:
-            db_url = self.settings.get_db_url(db_name)
-            engine = create_async_engine(
-                db_url,
-                echo=False,
-                pool_size=10,
-                max_overflow=20,
-                future=True,
-                pool_pre_ping=True,
-            )
-            self._engines[db_name] = engine
-            self._session_factories[db_name] = async_sessionmaker(
-                engine, class_=AsyncSession, expire_on_commit=False
-            )
-        return self._engines[db_name]
+        return get_engine(db_name)
 
     @asynccontextmanager
     async def session(self, db_name: str) -> AsyncGenerator[AsyncSession | Any, Any]:
         """Context manager for working with a session of a specific database"""
-        if db_name not in self._session_factories:
-            self._get_engine(db_name)
-
-        session_factory = self._session_factories[db_name]
+        session_factory = get_session_factory(db_name)
 
         async with session_factory() as session:
             try:
@@ -50,8 +159,8 @@ class DatabaseClient:
                 raise
 
     async def dispose(self):
-        for engine in self._engines.values():
-            await engine.dispose()
+        """Disposes the shared engines of the process. Call on shutdown only"""
+        await dispose_engines()
 
 
-__all__ = ['DatabaseClient']
+__all__ = ['DatabaseClient', 'get_db_settings', 'get_engine', 'get_session_factory', 'pool_stats', 'dispose_engines']
@@ -1,7 +1,7 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Optional, List
 
-from sqlalchemy import String, Boolean, ForeignKey, Integer, Date, Float, Enum
+from sqlalchemy import String, Boolean, ForeignKey, Integer, Date, Float, Enum, BigInteger, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 try:
@@ -71,6 +71,20 @@ class AircraftManual(Base):
     )
 
 
+class AircraftReconcileTask(Base):
+    """Pending AircraftManual -> Aircraft reconcile, one row per manual entry (Utils/ReconcileQueue.py)"""
+    __tablename__ = "aircraftreconcilequeue"
+    manual_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
+    # Bumped by every enqueue: a worker only removes the row if no edit came in while it was processing
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+    available_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Lease of the worker processing the row, NULL when unclaimed. Kept apart from available_at,
+    # which enqueues reset
+    claimed_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
 class Aircraft(Base):
     registration: Mapped[str] = mapped_column(String, nullable=False, index=True)
     msn: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
@@ -93,6 +107,8 @@ class Aircraft(Base):
     hd_deductible: Mapped[float] = mapped_column(Float, nullable=True, default=0.0)
     depreciation_rate: Mapped[float] = mapped_column(Float, nullable=True, default=3.0)
     depreciation_start_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    # sha256 of the Cirium values the last sync wrote (Scheduler/PowerPlatformJobs/Aircraft.py)
+    cirium_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     policy: Mapped[List["AircraftPolicy"]] = relationship(
         back_populates="aircraft",
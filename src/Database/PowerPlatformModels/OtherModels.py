@@ -1,8 +1,10 @@
+import hashlib
 from datetime import datetime, date
 from typing import Optional, List
 from uuid import UUID as UUID_Python
 
-from sqlalchemy import DateTime, String, Boolean, ForeignKey, LargeBinary, Date, Float, Enum, UniqueConstraint
+from sqlalchemy import DateTime, String, Boolean, ForeignKey, LargeBinary, Date, Float, Enum, UniqueConstraint, \
+    BigInteger
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -99,11 +101,22 @@ class UserDeviceSetting(Base):
 
 
 
+def _asset_content_hash(context) -> Optional[str]:
+    data = context.get_current_parameters().get("base64")
+    return hashlib.sha256(data).hexdigest() if data is not None else None
+
+
 class Asset(Base):
     asset_name: Mapped[str] = mapped_column(String, nullable=False)
     asset_description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     mime_type: Mapped[str] = mapped_column(String, nullable=False)
-    base64: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # Deferred: lists carry content_hash only, the blob is loaded when inlined or served from /powerplatform/assets.
+    # NULL when the blob lives in the filesystem store (Utils/BlobStore.py)
+    base64: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    # sha256 of the blob, the id of /powerplatform/assets/{content_hash} and of the file in the blob store
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True,
+                                                        default=_asset_content_hash)
+    size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
 
     airline: Mapped["Airline"] = relationship(back_populates="asset")
     aircraft_template: Mapped["AircraftTemplate"] = relationship(
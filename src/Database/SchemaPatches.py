@@ -0,0 +1,65 @@
+from sqlalchemy import text
+
+try:
+    from Config import setup_logger
+except ModuleNotFoundError:
+    from ..Config import setup_logger
+
+from .Client import get_engine
+from .CiriumModels import CiriumParty, CiriumPartyAirline, CiriumIndexedAirline, CiriumValuation
+from .PowerPlatformModels import AircraftReconcileTask
+
+logger = setup_logger(
+    "schema_patches",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+# Idempotent DDL/backfills for columns added to existing models, applied at startup.
+# database -> statements, executed in order in one transaction
+SCHEMA_PATCHES: dict[str, list[str]] = {
+    "powerplatform": [
+        # Asset.content_hash
+        "ALTER TABLE assets ADD COLUMN IF NOT EXISTS content_hash varchar(64)",
+        "CREATE INDEX IF NOT EXISTS ix_assets_content_hash ON assets (content_hash)",
+        "UPDATE assets SET content_hash = encode(sha256(base64), 'hex') WHERE content_hash IS NULL",
+        # Asset blobs in the filesystem store
+        "ALTER TABLE assets ALTER COLUMN base64 DROP NOT NULL",
+        "ALTER TABLE assets ADD COLUMN IF NOT EXISTS size_bytes bigint",
+        "UPDATE assets SET size_bytes = octet_length(base64) WHERE size_bytes IS NULL AND base64 IS NOT NULL",
+        # Aircraft.cirium_hash of the incremental Cirium sync
+        "ALTER TABLE aircraft ADD COLUMN IF NOT EXISTS cirium_hash varchar(64)",
+        # AircraftReconcileTask.claimed_until (new tables get it from SCHEMA_TABLES)
+        "ALTER TABLE IF EXISTS aircraftreconcilequeue ADD COLUMN IF NOT EXISTS claimed_until timestamp",
+    ],
+    "cirium": [
+        # Trigram index of CiriumParty
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    ],
+}
+
+# database -> tables of new models, created (with their indexes) when missing, after the statements
+SCHEMA_TABLES: dict[str, list] = {
+    "powerplatform": [AircraftReconcileTask.__table__],
+    "cirium": [CiriumParty.__table__, CiriumPartyAirline.__table__, CiriumIndexedAirline.__table__,
+               CiriumValuation.__table__],
+}
+
+
+async def apply_schema_patches():
+    for db_name in SCHEMA_PATCHES.keys() | SCHEMA_TABLES.keys():
+        statements = SCHEMA_PATCHES.get(db_name, [])
+        tables = SCHEMA_TABLES.get(db_name, [])
+        try:
+            async with get_engine(db_name).begin() as conn:
+                # Workers start together: one applies, the others wait and find nothing to do
+                await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_patches'))"))
+                for statement in statements:
+                    await conn.execute(text(statement))
+                if tables:
+                    await conn.run_sync(lambda sync_conn: tables[0].metadata.create_all(sync_conn, tables=tables))
+            logger.info(f"Schema patches applied to '{db_name}' ({len(statements)} statements, {len(tables)} tables)")
+        except Exception as _ex:
+            logger.warning(f"Failed to apply schema patches to '{db_name}': {_ex}")
+
+
+__all__ = ["SCHEMA_PATCHES", "SCHEMA_TABLES", "apply_schema_patches"]
@@ -1,4 +1,8 @@
 from Config import Router
+from Database import pool_stats
+from Utils import cache_stats
+from Utils.Caching import local_cache, single_flight
+from Utils.ReconcileQueue import reconcile_queue
 
 router = Router(
     prefix="/health",
@@ -9,3 +13,22 @@ router = Router(
 @router.get("/")
 async def health():
     ...
+
+
+@router.get("/cache")
+async def cache_health():
+    return {
+        "local_items": len(local_cache),
+        "coalesced": single_flight.coalesced,
+        "namespaces": cache_stats.snapshot(),
+    }
+
+
+@router.get("/db")
+async def db_health():
+    return pool_stats()
+
+
+@router.get("/reconcile")
+async def reconcile_health():
+    return await reconcile_queue.stats()
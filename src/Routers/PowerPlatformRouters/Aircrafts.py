@@ -1,22 +1,25 @@
-from typing import Annotated, List
+from typing import Annotated, List, AsyncIterator
 
+import orjson
 from fastapi import status, Request, Query, Body, Response, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
 
 from Config import setup_logger, Router, OUTPUT_PATH
 from Schemas import DefaultResponse, TemplateSchemaLight, TemplateSchemaFull, AircraftSchemaFull, AircraftSchemaLight, \
     EngineSchema, AdditionalAircraftInfoSchema, EngineTypeSchema, UpsertdelResponseSchema, CiriumAircraftSchema, \
-    ExcelAircraftSchema
+    ExcelAircraftSchema, AircraftPageSchemaFull, AircraftPageSchemaLight, ImportedAircraftSchema
 from Schemas.Enums import service
 from Schemas.PowerPlatform.BodySchemas.AircraftSchemas import CreateAircraftTemplatesBody, CreateUpdateAircraftBody, \
     GetAircraftsFromCiriumBody, CreateAircraftsFromCiriumBody, CreateAircraftsFromExcelSchema
 from Schemas.PowerPlatform.QuerySchemas.AircraftSchemas import GetAircraftQuery, GetEngineTypeQuery, \
-    GetAircraftTemplateQuery, GetAircraftIDQuery
-from Utils import DBProxy, success_response, error_response, warning_response, cache_key_first_non_null
+    GetAircraftTemplateQuery, GetAircraftIDQuery, GetAircraftPageQuery
+from Utils import DBProxy, success_response, error_response, warning_response, build_cache_key, \
+    result_tags
 from Utils.ResponsesFunc import build_responses
 from .DBQueries.Aircrafts import query_aircrafts, query_get_engines_type, query_templates, query_create_template, \
     query_create_update_aircraft, query_aircraft_additional, query_get_engines, query_get_aircrafts_cirium, \
-    query_create_aircrafts_cirium
+    query_create_aircrafts_cirium, query_aircrafts_page, stream_aircrafts, stream_aircrafts_json, supports_json_statement
 from .DBQueries.AircraftsExcel import query_import_aircrafts, query_parse_aircrafts_excel
 
 logger = setup_logger(name="powerplatform_aircrafts")
@@ -44,14 +47,13 @@ async def get_aircraft_template_full(request: Request, response: Response,
         return await query_templates(session, _payload=_payload, full=True)
 
     try:
-        cache_key = cache_key_first_non_null(name="aircraft_template:full", data=_payload.model_dump(),
-                                             keys=("template_id", "template_name"),
-                                             fallback="all")
+        cache_key = build_cache_key("aircraft_template:full", _payload)
         aircraft_template_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("template", template=("template_id",)),
+            raw=True
         )
         if len(aircraft_template_data) > 0:
             return success_response(request=request, response=response, data=aircraft_template_data,
@@ -84,15 +86,13 @@ async def get_aircraft_template_light(request: Request, response: Response,
         return await query_templates(session, _payload=_payload, full=False)
 
     try:
-        cache_key = cache_key_first_non_null(name="aircraft_template:light", data=_payload.model_dump(),
-                                             keys=(
-                                                 "template_id", "template_name"),
-                                             fallback="all")
+        cache_key = build_cache_key("aircraft_template:light", _payload)
         aircraft_template_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("template", template=("template_id",)),
+            raw=True
         )
         if len(aircraft_template_data) > 0:
             return success_response(request=request, response=response, data=aircraft_template_data,
@@ -130,7 +130,7 @@ async def create_aircraft_template(request: Request, response: Response,
             key=cache_key,
             db_name="powerplatform",
             update_func=db_query,
-            ttl=60
+            tags=["template"]
         )
 
         return success_response(request=request, response=response, msg="Aircraft template created successfully",
@@ -143,7 +143,7 @@ async def create_aircraft_template(request: Request, response: Response,
 
 @router.get(
     path="/full",
-    description="Get Aircrafts Full",
+    description="Get Aircrafts Full. `fields` limits the returned fields and the loaded relationships",
     status_code=status.HTTP_200_OK,
     response_model=DefaultResponse[List[AircraftSchemaFull]],
     responses=build_responses(
@@ -157,16 +157,13 @@ async def get_aircrafts_full(request: Request, response: Response, _payload: Ann
         return await query_aircrafts(session, full=True, _payload=_payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="aircraft:full", data=_payload.model_dump(),
-                                             keys=(
-                                                 "template_id", "template_name", "aircraft_registration", "aircraft_id",
-                                                 "airline_id", "airline_name", "aircraft_msn"),
-                                             fallback="all")
+        cache_key = build_cache_key("aircraft:full", _payload)
         aircraft_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("aircraft", airline=("airline", "airline_id"), template=("template", "template_id")),
+            raw=True
         )
         if len(aircraft_data) > 0:
             return success_response(request=request, response=response, data=aircraft_data,
@@ -184,7 +181,7 @@ async def get_aircrafts_full(request: Request, response: Response, _payload: Ann
 
 @router.get(
     path="/light",
-    description="Get Aircrafts Light",
+    description="Get Aircrafts Light. `fields` limits the returned fields and the loaded relationships",
     status_code=status.HTTP_200_OK,
     response_model=DefaultResponse[List[AircraftSchemaLight]],
     responses=build_responses(
@@ -198,17 +195,14 @@ async def get_aircrafts_light(request: Request, response: Response, _payload: An
         return await query_aircrafts(session, full=False, _payload=_payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="aircraft:light", data=_payload.model_dump(),
-                                             keys=(
-                                                 "template_id", "template_name", "aircraft_registration", "aircraft_id",
-                                                 "airline_id", "airline_name", "aircraft_msn"),
-                                             fallback="all")
+        cache_key = build_cache_key("aircraft:light", _payload)
 
         aircraft_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("aircraft", airline=("airline", "airline_id"), template=("template", "template_id")),
+            raw=True
         )
         if len(aircraft_data) > 0:
             return success_response(request=request, response=response, data=aircraft_data,
@@ -224,6 +218,148 @@ async def get_aircrafts_light(request: Request, response: Response, _payload: An
         return error_response(request=request, response=response, exc=_ex)
 
 
+async def _ndjson(items: AsyncIterator[BaseModel | dict | str]) -> AsyncIterator[bytes]:
+    """
+    Encodes models as NDJSON lines, strings are already encoded JSON.
+    An error after the first line can't change the status, so it ends the stream as an `error` line
+    """
+    try:
+        async for item in items:
+            if isinstance(item, str):
+                yield item.encode() + b"\n"
+            else:
+                yield orjson.dumps(item.model_dump(mode="json") if isinstance(item, BaseModel) else item) + b"\n"
+    except Exception as _ex:
+        logger.error(f"Failed to stream Aircraft: {_ex}")
+        yield orjson.dumps({"error": f"{_ex.__class__.__name__}: {_ex}"}) + b"\n"
+
+
+@router.get(
+    path="/full/page",
+    description="Get Aircrafts Full, keyset-paginated by aircraft_id (descending). "
+                "Pass next_cursor of a page as cursor to get the next one",
+    status_code=status.HTTP_200_OK,
+    response_model=DefaultResponse[AircraftPageSchemaFull],
+    responses=build_responses(
+        include={status.HTTP_200_OK, status.HTTP_500_INTERNAL_SERVER_ERROR}
+    )
+)
+async def get_aircrafts_full_page(request: Request, response: Response,
+                                  _payload: Annotated[GetAircraftPageQuery, Query()]):
+    db_proxy: DBProxy = request.state.db_proxy
+
+    async def db_query(session):
+        return await query_aircrafts_page(session, full=True, _payload=_payload)
+
+    try:
+        cache_key = build_cache_key("aircraft:full:page", _payload)
+        page_data = await db_proxy.get_or_cache(
+            key=cache_key,
+            db_name="powerplatform",
+            query_func=db_query,
+            tags=result_tags("aircraft", items_key="items",
+                             airline=("airline", "airline_id"), template=("template", "template_id")),
+            raw=True
+        )
+        return success_response(request=request, response=response, data=page_data,
+                                msg="Aircraft retrieved successfully")
+
+    except Exception as _ex:
+        logger.error(f"Failed to get Aircraft page: {_ex}")
+        return error_response(request=request, response=response, exc=_ex)
+
+
+@router.get(
+    path="/full/stream",
+    description="Stream Aircrafts Full as NDJSON (one AircraftSchemaFull per line), read from a database cursor. "
+                "Not cached",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}}}
+)
+async def stream_aircrafts_full(request: Request, _payload: Annotated[GetAircraftQuery, Query()]):
+    db_proxy: DBProxy = request.state.db_proxy
+    session = await db_proxy.get_db("powerplatform")
+
+    return StreamingResponse(
+        _ndjson(stream_aircrafts(session, full=True, _payload=_payload)),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get(
+    path="/full/sql-stream",
+    description="Stream Aircrafts Full as NDJSON, each document built and encoded by Postgres "
+                "(json_build_object/json_agg), without ORM objects or models. "
+                "`fields` and `inline_assets` fall back to /full/stream. Not cached",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}}}
+)
+async def stream_aircrafts_full_sql(request: Request, _payload: Annotated[GetAircraftQuery, Query()]):
+    db_proxy: DBProxy = request.state.db_proxy
+    session = await db_proxy.get_db("powerplatform")
+
+    if supports_json_statement(_payload):
+        items = stream_aircrafts_json(session, _payload=_payload)
+    else:
+        items = stream_aircrafts(session, full=True, _payload=_payload)
+    return StreamingResponse(_ndjson(items), media_type="application/x-ndjson")
+
+
+@router.get(
+    path="/light/page",
+    description="Get Aircrafts Light, keyset-paginated by aircraft_id (descending). "
+                "Pass next_cursor of a page as cursor to get the next one",
+    status_code=status.HTTP_200_OK,
+    response_model=DefaultResponse[AircraftPageSchemaLight],
+    responses=build_responses(
+        include={status.HTTP_200_OK, status.HTTP_500_INTERNAL_SERVER_ERROR}
+    )
+)
+async def get_aircrafts_light_page(request: Request, response: Response,
+                                  _payload: Annotated[GetAircraftPageQuery, Query()]):
+    db_proxy: DBProxy = request.state.db_proxy
+
+    async def db_query(session):
+        return await query_aircrafts_page(session, full=False, _payload=_payload)
+
+    try:
+        cache_key = build_cache_key("aircraft:light:page", _payload)
+        page_data = await db_proxy.get_or_cache(
+            key=cache_key,
+            db_name="powerplatform",
+            query_func=db_query,
+            tags=result_tags("aircraft", items_key="items",
+                             airline=("airline", "airline_id"), template=("template", "template_id")),
+            raw=True
+        )
+        return success_response(request=request, response=response, data=page_data,
+                                msg="Aircraft retrieved successfully")
+
+    except Exception as _ex:
+        logger.error(f"Failed to get Aircraft page: {_ex}")
+        return error_response(request=request, response=response, exc=_ex)
+
+
+@router.get(
+    path="/light/stream",
+    description="Stream Aircrafts Light as NDJSON (one AircraftSchemaLight per line), read from a database cursor. "
+                "Not cached",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}}}
+)
+async def stream_aircrafts_light(request: Request, _payload: Annotated[GetAircraftQuery, Query()]):
+    db_proxy: DBProxy = request.state.db_proxy
+    session = await db_proxy.get_db("powerplatform")
+
+    return StreamingResponse(
+        _ndjson(stream_aircrafts(session, full=False, _payload=_payload)),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.post(
     path="/",
     description="Create Aircraft",
@@ -245,7 +381,7 @@ async def create_aircraft(request: Request, response: Response, _payload: Annota
             key=cache_key,
             db_name="powerplatform",
             update_func=db_query,
-            ttl=60
+            tags=["aircraft"]
         )
 
         return success_response(request=request, response=response, msg="Aircraft created successfully",
@@ -272,16 +408,14 @@ async def get_engines_type(request: Request, response: Response, _payload: Annot
         return await query_get_engines_type(session, _payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="engine_type", data=_payload.model_dump(),
-                                             keys=(
-                                                 "aircraft_id", "engine_id", "engine_manufacture", "engine_type"),
-                                             fallback="all")
+        cache_key = build_cache_key("engine_type", _payload)
 
         engine_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=["engine"],
+            raw=True
         )
         if len(engine_data) > 0:
             return success_response(request=request, response=response, data=engine_data,
@@ -313,15 +447,14 @@ async def get_engines(request: Request, response: Response, _payload: Annotated[
         return await query_get_engines(session, _payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="engine", data=_payload.model_dump(),
-                                             keys="aircraft_id",
-                                             fallback="all")
+        cache_key = build_cache_key("engine", _payload)
 
         engine_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=["engine"],
+            raw=True
         )
         if len(engine_data) > 0:
             return success_response(request=request, response=response, data=engine_data,
@@ -363,7 +496,8 @@ async def get_aircrafts_additional(request: Request, response: Response,
             key=cache_key,
             db_name="aixii_cirium",
             query_func=db_query,
-            ttl=60
+            tags=["aircraft", f"aircraft:{payload.aircraft_id}", "cirium"],
+            raw=True
         )
         if len(aircraft_data) > 0:
             return success_response(request=request, response=response, data=aircraft_data,
@@ -396,15 +530,14 @@ async def get_aircrafts_cirium(request: Request, response: Response,
         return await query_get_aircrafts_cirium(session, _payload=_payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="aircraft:cirium", data=_payload.model_dump(),
-                                             keys=("airlines_name"),
-                                             fallback="all")
+        cache_key = build_cache_key("aircraft:cirium", _payload)
 
         aircraft_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="cirium",
             query_func=db_query,
-            ttl=60
+            tags=["cirium"],
+            raw=True
         )
         if len(aircraft_data) > 0:
             return success_response(request=request, response=response, data=aircraft_data,
@@ -442,7 +575,7 @@ async def create_aircraft_cirium(request: Request, response: Response,
             key=cache_key,
             db_name="powerplatform",
             update_func=db_query,
-            ttl=60
+            tags=["aircraft"]
         )
 
         return success_response(request=request, response=response, msg="Aircraft created successfully",
@@ -479,7 +612,7 @@ async def parse_aircraft_manuals(request: Request, response: Response, file: Ann
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60,
+            raw=True
         )
 
         if len(result) > 0:
@@ -496,9 +629,10 @@ async def parse_aircraft_manuals(request: Request, response: Response, file: Ann
 
 @router.post(
     path="/import",
-    description="Import Aircrafts From Excel",
+    description="Import Aircrafts From Excel. Returns a result per row: created / updated manual entry, "
+                "linked aircraft, resolved references and warnings",
     status_code=status.HTTP_201_CREATED,
-    response_model=DefaultResponse[List[UpsertdelResponseSchema]],
+    response_model=DefaultResponse[List[ImportedAircraftSchema]],
     responses=build_responses(
         include={
             status.HTTP_201_CREATED,
@@ -509,18 +643,10 @@ async def parse_aircraft_manuals(request: Request, response: Response, file: Ann
 async def import_aircraft_manuals(request: Request, response: Response, _payload: Annotated[List[CreateAircraftsFromExcelSchema], Body()]):
     db_proxy: DBProxy = request.state.db_proxy
 
-    async def db_query(session):
-        return await query_import_aircrafts(_payload=_payload, session=session)
-
     try:
-        cache_key = f"aircraft_manual_import:{_payload[0].msn}"
-
-        result = await db_proxy.get_or_cache(
-            key=cache_key,
-            db_name="powerplatform",
-            query_func=db_query,
-            ttl=60,
-        )
+        # A write: never served from the cache
+        session = await db_proxy.get_db("powerplatform")
+        result = await query_import_aircrafts(_payload=_payload, session=session)
 
         return success_response(request=request, response=response, msg="Aircrafts imported successfully",
                                 status_code=status.HTTP_201_CREATED, data=result)
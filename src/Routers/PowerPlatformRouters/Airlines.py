@@ -7,7 +7,8 @@ from Schemas import DefaultResponse, AirlineUsersSchemaFull, AirlineUsersSchemaL
 from Schemas.PowerPlatform.BodySchemas.AirlineSchemas import CreateAirlinesBody
 from Schemas.PowerPlatform.QuerySchemas.AirlineSchemas import GetAirlineQuery
 from Schemas.Enums import service
-from Utils import DBProxy, success_response, error_response, warning_response, cache_key_first_non_null
+from Utils import DBProxy, success_response, error_response, warning_response, build_cache_key, \
+    result_tags
 from Utils.ResponsesFunc import build_responses
 from .DBQueries.Airlines import query_airline, query_create_airline
 
@@ -35,14 +36,13 @@ async def get_airlines_full(request: Request, response: Response, _payload: Anno
         return await query_airline(session, _payload=_payload, full=True)
 
     try:
-        cache_key = cache_key_first_non_null(name="airline:full", data=_payload.model_dump(),
-                                             keys=("user_id", "airline_name", "airline_id"),
-                                             fallback="all")
+        cache_key = build_cache_key("airline:full", _payload)
         airline_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("airline", airline=("airline_id",)),
+            raw=True
         )
         if len(airline_data) > 0:
             return success_response(request=request, response=response, data=airline_data, msg="Airline(-s) retrieved successfully")
@@ -72,14 +72,13 @@ async def get_airlines_light(request: Request, response: Response, _payload: Ann
         return await query_airline(session, _payload=_payload, full=False)
 
     try:
-        cache_key = cache_key_first_non_null(name="airline:light", data=_payload.model_dump(),
-                                             keys=("user_id", "airline_name", "airline_id"),
-                                             fallback="all")
+        cache_key = build_cache_key("airline:light", _payload)
         airline_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            tags=result_tags("airline", airline=("airline_id",)),
+            raw=True
         )
         if len(airline_data) > 0:
             return success_response(request=request, response=response, data=airline_data, msg="Airline(-s) retrieved successfully")
@@ -113,7 +112,7 @@ async def create_airlines(request: Request, response: Response, _payload: Annota
             key=cache_key,
             db_name="powerplatform",
             update_func=db_query,
-            ttl=60
+            tags=["airline"]
         )
 
         return success_response(request=request, response=response, msg="Airline created successfully",
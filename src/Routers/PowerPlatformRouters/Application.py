@@ -8,7 +8,7 @@ from Schemas import DefaultResponse, ApplicationSchema, FontSchema, ApplicationA
 from Schemas.Enums import service
 from Schemas.PowerPlatform.QuerySchemas.ApplicationSchemas import GetApplicationIdQuery, DeviceInfo, \
     UpsertAppearanceQuery
-from Utils import DBProxy, success_response, warning_response, error_response, cache_key_first_non_null
+from Utils import DBProxy, success_response, warning_response, error_response, build_cache_key
 from Utils.ResponsesFunc import build_responses
 from .DBQueries.Application import query_fonts, query_apps, query_get_appearance, query_upsert_appearance
 
@@ -36,16 +36,13 @@ async def get_apps(request: Request, response: Response, _payload: Annotated[Get
         return await query_apps(session, _payload)
 
     try:
-        cache_key = cache_key_first_non_null(name="application", data=_payload.model_dump(),
-                                             keys=(
-                                                 "application_id"),
-                                             fallback="all")
+        cache_key = build_cache_key("application", _payload)
 
         apps_data = await db_proxy.get_or_cache(
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=600
+            raw=True
         )
 
         if len(apps_data) > 0:
@@ -79,7 +76,7 @@ async def get_fonts(request: Request, response: Response, _payload: Annotated[De
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=2
+            raw=True
         )
 
         if len(fonts_data) > 0:
@@ -113,7 +110,7 @@ async def get_appearance(request: Request, response: Response, _payload: Annotat
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=1
+            raw=True
         )
 
         if len(appearance_data) > 0:
@@ -147,7 +144,7 @@ async def create_update_appearance(request: Request, response: Response, _payloa
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=1
+            raw=True
         )
 
         return success_response(request=request, response=response, data=appearance_data,
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import status, Request, Response, Path
+from fastapi.responses import FileResponse
+
+from Config import setup_logger, Router, ASSET_CACHE_CONTROL
+from Schemas import DefaultResponse
+from Schemas.Enums import service
+from Utils import DBProxy, error_response, warning_response
+from Utils.ResponsesFunc import build_responses
+from Utils.BlobStore import filesystem_store
+from .DBQueries.File import query_asset_by_hash, query_asset_mime_type
+
+logger = setup_logger(name="powerplatform_assets")
+
+router = Router(
+    prefix="/powerplatform/assets",
+    tags=[service.APITagsEnum.FILES],
+)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@router.get(
+    path="/{content_hash}",
+    description="Get asset content by its sha256 (file_hash of the asset references). "
+                "The content never changes for a hash: strong ETag and immutable cache headers. "
+                "Files of the blob store support Range requests",
+    status_code=status.HTTP_200_OK,
+    response_model=None,
+    responses={
+        **build_responses(include={status.HTTP_404_NOT_FOUND, status.HTTP_500_INTERNAL_SERVER_ERROR}),
+        status.HTTP_200_OK: {"content": {"image/*": {}, "application/octet-stream": {}}},
+        status.HTTP_206_PARTIAL_CONTENT: {"description": "Requested range"},
+        status.HTTP_304_NOT_MODIFIED: {"description": "Not modified"},
+    }
+)
+async def get_asset(request: Request, response: Response,
+                    content_hash: Annotated[str, Path(pattern="^[0-9a-f]{64}$", description="Asset sha256")]
+                    ) -> Response | DefaultResponse:
+    etag = f'"{content_hash}"'
+    headers = {"ETag": etag, "Cache-Control": ASSET_CACHE_CONTROL}
+
+    # Content-addressed: a client holding the hash already holds the content
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    db_proxy: DBProxy = request.state.db_proxy
+    try:
+        session = await db_proxy.get_db("powerplatform")
+        mime_type = await query_asset_mime_type(session, content_hash)
+        if mime_type is None:
+            return warning_response(request=request, response=response, msg="Asset not found",
+                                    status_code=status.HTTP_404_NOT_FOUND)
+
+        # Blob store: streamed from disk (sendfile where the server supports it), with Range support
+        path = await asyncio.to_thread(filesystem_store.find, content_hash)
+        if path is not None:
+            return FileResponse(path, media_type=mime_type, headers=headers)
+
+        asset = await query_asset_by_hash(session, content_hash)
+        if asset is None or asset.base64 is None:
+            return warning_response(request=request, response=response, msg="Asset content not found",
+                                    status_code=status.HTTP_404_NOT_FOUND)
+
+        return Response(content=asset.base64, media_type=mime_type, headers=headers)
+
+    except Exception as _ex:
+        logger.error(f"Failed to get asset {content_hash}: {_ex}")
+        return error_response(request=request, response=response, exc=_ex)
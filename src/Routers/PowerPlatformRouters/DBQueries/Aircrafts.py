@@ -1,25 +1,33 @@
-from base64 import b64decode
 from datetime import date
-from typing import List, Optional, Sequence, Dict
+from typing import List, Optional, Sequence, Dict, AsyncIterator, Callable, Any
 
-from sqlalchemy import select, func, cast, Date, literal, Select, or_, case
+from pydantic import BaseModel
+from sqlalchemy import select, func, cast, literal, Select, or_, case, String, Text, null, literal_column, \
+    join
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, load_only, aliased
 
-from Database import Airline, Asset, AircraftTemplate, Aircraft, CiriumAircrafts, \
-    AircraftRevision, DatabaseClient, Engine, AircraftEngine, AircraftManual, \
+from Config import AIRCRAFT_STREAM_BATCH
+from Database import Airline, AircraftTemplate, Aircraft, CiriumLatest, CiriumValuation, Asset, AircraftPolicy, \
+    AircraftLesseeLessor, DatabaseClient, Engine, AircraftEngine, AircraftManual, \
     AircraftEngineManual, AircraftTechnicalData
-from Scheduler.PowerPlatformJobs.Aircraft import update_create_aircraft_manual, load_references, get_engine_positions
+from Scheduler.PowerPlatformJobs.Aircraft import get_engine_positions
 from Schemas import AdditionalAircraftInfoSchema, AdditionalAircraftInfoValuationSchema, \
     PolicySchema, AircraftSchemaFull, EngineSchema, AirlineSchemaFull, TemplateSchemaFull, \
     AircraftSchemaLight, AirlineSchemaLight, TemplateSchemaLight, EngineTypeSchema, AircraftTechnicalDataSchema, \
     UpsertdelResponseSchema, UpsertdelStatusEnum, CiriumAircraftSchema, AircraftDataSourceEnum, \
-    AircraftInsuredStatusEnum
+    AircraftInsuredStatusEnum, AircraftPageSchemaFull, AircraftPageSchemaLight, EnginePositionEnum
 from Schemas.PowerPlatform.BodySchemas.AircraftSchemas import CreateUpdateAircraftBody, CreateAircraftTemplatesBody, \
     GetAircraftsFromCiriumBody, CreateAircraftsFromCiriumBody
 from Schemas.PowerPlatform.QuerySchemas.AircraftSchemas import GetAircraftQuery, GetEngineTypeQuery, \
-    GetAircraftTemplateQuery, GetAircraftIDQuery
-from Utils import map_asset
+    GetAircraftTemplateQuery, GetAircraftIDQuery, GetAircraftPageQuery
+from Utils import map_asset, with_asset_data, asset_url
+from Utils.BlobStore import get_blob_store, AssetBlobs
+from Utils.CiriumAirlineIndex import ensure_airlines_indexed, matched_airlines, party_of
+from Utils.ReferenceCache import get_references
+from Utils.FuzzyMatcher import get_reference_matcher
+from Utils.ReconcileQueue import enqueue_reconcile
 
 
 async def query_templates(
@@ -34,7 +42,7 @@ async def query_templates(
     stmt = select(AircraftTemplate).order_by(AircraftTemplate.template_name)
 
     if full:
-        stmt = stmt.options(selectinload(AircraftTemplate.asset))
+        stmt = stmt.options(with_asset_data(selectinload(AircraftTemplate.asset), payload.inline_assets))
 
     if payload.template_name is not None:
         template_name_clean = payload.template_name.strip().lower()
@@ -47,11 +55,14 @@ async def query_templates(
     aircraft_templates = result.scalars().all()
 
     if full:
+        blobs = (
+            await AssetBlobs().load(t.asset for t in aircraft_templates) if payload.inline_assets else None
+        )
         response = [
             TemplateSchemaFull(
                 template_id=t.id,
                 template_name=t.template_name,
-                asset=map_asset(t.asset)
+                asset=map_asset(t.asset, payload.inline_assets, blobs)
             )
             for t in aircraft_templates
         ]
@@ -82,15 +93,10 @@ async def query_create_template(session: AsyncSession, _payload: CreateAircraftT
         raise ValueError("Template already exists")
 
     if payload.file_data:
-        header, encoded = payload.file_data.split(",", 1)
-        mime_type = header.split(";")[0].replace("data:", "")
-        decoded_bytes = b64decode(encoded)
-
-        asset = Asset(
+        asset = await get_blob_store().asset_from_data_uri(
             asset_name=f"{payload.template_name}",
             asset_description=None,
-            mime_type=mime_type,
-            base64=decoded_bytes
+            data_uri=payload.file_data
         )
 
     template = AircraftTemplate(
@@ -104,41 +110,464 @@ async def query_create_template(session: AsyncSession, _payload: CreateAircraftT
     return True
 
 
+class _AircraftField:
+    """What one field of the aircraft schemas needs: columns to select, relationships to load, and its value"""
+    __slots__ = ("columns", "options", "value")
+
+    def __init__(self, value: Callable[[Aircraft], Any], columns: tuple = (), options: tuple = ()):
+        self.value = value
+        self.columns = columns
+        self.options = options
+
+
+def _active_lessee_lessor(a: Aircraft):
+    return next(
+        (
+            item
+            for item in a.lessee_lessors
+            if item.active
+        ),
+        None
+    )
+
+
+# lessee and lessor come from the same relationship
+_LOAD_LESSEE_LESSORS = selectinload(Aircraft.lessee_lessors)
+
+
+def _column_field(column) -> _AircraftField:
+    return _AircraftField(value=lambda a: getattr(a, column.key), columns=(column,))
+
+
+def _build_full_fields(inline_assets: bool, blobs: Optional[AssetBlobs] = None) -> Dict[str, _AircraftField]:
+    return {
+        "registration": _column_field(Aircraft.registration),
+        "msn": _column_field(Aircraft.msn),
+        "mtow": _column_field(Aircraft.mtow),
+        "agreed_value": _column_field(Aircraft.agreed_value),
+        "depreciation_rate": _column_field(Aircraft.depreciation_rate),
+        "depreciation_start_date": _column_field(Aircraft.depreciation_start_date),
+        "combined_single_limit": _column_field(Aircraft.combined_single_limit),
+        "hsl_deductible": _column_field(Aircraft.hsl_deductible),
+        "hd_deductible": _column_field(Aircraft.hd_deductible),
+        "policy": _AircraftField(
+            value=lambda a: [
+                PolicySchema(
+                    policy_id=p.id,
+                    policy_from=p.policy_from,
+                    policy_to=p.policy_to
+                )
+                for p in a.policy
+            ],
+            options=(selectinload(Aircraft.policy),)
+        ),
+        "technical_data": _AircraftField(
+            value=lambda a: (
+                AircraftTechnicalDataSchema(
+                    in_dashboard=a.technical_data.in_dashboard,
+                    status=a.technical_data.status,
+                    data_source=a.technical_data.data_source,
+                    av_fixed=a.technical_data.av_fixed
+                )
+                if a.technical_data else None
+            ),
+            options=(joinedload(Aircraft.technical_data),)
+        ),
+        "lessee": _AircraftField(
+            value=lambda a: (lessee_lessor := _active_lessee_lessor(a)) and lessee_lessor.lessee,
+            options=(_LOAD_LESSEE_LESSORS,)
+        ),
+        "lessor": _AircraftField(
+            value=lambda a: (lessee_lessor := _active_lessee_lessor(a)) and lessee_lessor.lessor,
+            options=(_LOAD_LESSEE_LESSORS,)
+        ),
+        "engines": _AircraftField(
+            value=lambda a: [
+                EngineSchema(
+                    engine=EngineTypeSchema(
+                        engine_id=engine.engine.id,
+                        engine_manufacture=engine.engine.engine_manufacture,
+                        engine_model=engine.engine.engine_model
+                    ),
+                    position=engine.position,
+                    msn=engine.engine_msn
+                )
+                for engine in a.engines
+                if engine.engine
+            ] if a.engines else [],
+            options=(selectinload(Aircraft.engines).joinedload(AircraftEngine.engine),)
+        ),
+        "airline": _AircraftField(
+            value=lambda a: AirlineSchemaFull(
+                airline_id=a.airline.id,
+                airline_name=a.airline.airline_name,
+                airline_icao=a.airline.icao,
+                airline_iata=a.airline.iata,
+                asset=map_asset(a.airline.asset, inline_assets, blobs)
+            ),
+            options=(with_asset_data(joinedload(Aircraft.airline).joinedload(Airline.asset), inline_assets),)
+        ),
+        "template": _AircraftField(
+            value=lambda a: TemplateSchemaFull(
+                template_id=a.template.id,
+                template_name=a.template.template_name,
+                asset=map_asset(a.template.asset, inline_assets, blobs)
+            ),
+            options=(with_asset_data(joinedload(Aircraft.template).joinedload(AircraftTemplate.asset), inline_assets),)
+        ),
+    }
+
+
+# inline_assets -> field specs of AircraftSchemaFull
+_FULL_FIELDS: Dict[bool, Dict[str, _AircraftField]] = {
+    False: _build_full_fields(False),
+    True: _build_full_fields(True),
+}
+
+_LIGHT_FIELDS: Dict[str, _AircraftField] = {
+    "registration": _column_field(Aircraft.registration),
+    "msn": _column_field(Aircraft.msn),
+    "status": _AircraftField(
+        value=lambda a: a.technical_data.status,
+        options=(joinedload(Aircraft.technical_data),)
+    ),
+    "airline": _AircraftField(
+        value=lambda a: AirlineSchemaLight(
+            airline_id=a.airline.id,
+            airline_name=a.airline.airline_name,
+            airline_icao=a.airline.icao,
+            airline_iata=a.airline.iata,
+        ),
+        options=(joinedload(Aircraft.airline),)
+    ),
+    "template": _AircraftField(
+        value=lambda a: TemplateSchemaLight(
+            template_id=a.template.id,
+            template_name=a.template.template_name
+        ),
+        options=(joinedload(Aircraft.template),)
+    ),
+}
+
+
+def _field_specs(full: bool, payload: GetAircraftQuery,
+                 blobs: Optional[AssetBlobs] = None) -> Dict[str, _AircraftField]:
+    """`blobs`: asset contents read for the response, mapped by specs built for it"""
+    if full and blobs is not None:
+        return _build_full_fields(payload.inline_assets, blobs)
+    return _FULL_FIELDS[payload.inline_assets] if full else _LIGHT_FIELDS
+
+
+def _projection(full: bool, payload: GetAircraftQuery,
+                blobs: Optional[AssetBlobs] = None) -> Optional[Dict[str, _AircraftField]]:
+    """Fields requested with `fields=` that exist in the schema, None for the whole schema"""
+    if not payload.fields:
+        return None
+    specs = _field_specs(full, payload, blobs)
+    return {name: specs[name] for name in payload.fields.split(",") if name in specs}
+
+
+def _aircrafts_statement(full: bool, payload: GetAircraftQuery) -> Select:
+    projection = _projection(full, payload)
+    if projection is not None:
+        return _aircrafts_projection_statement(projection, payload)
+
+    specs = _field_specs(full, payload)
+    stmt = (
+        select(Aircraft)
+        .join(Aircraft.airline)
+        .join(Aircraft.template)
+        .options(*{option for spec in specs.values() for option in spec.options})
+        .order_by(Aircraft.id.desc())
+    )
+
+    if payload.aircraft_registration:
+        stmt = stmt.where(Aircraft.registration == payload.aircraft_registration)
+    if payload.aircraft_msn:
+        stmt = stmt.where(Aircraft.msn == payload.aircraft_msn)
+    if payload.aircraft_id:
+        stmt = stmt.where(Aircraft.id == payload.aircraft_id)
+    if payload.airline_name:
+        stmt = stmt.where(Airline.airline_name == payload.airline_name)
+    if payload.airline_id:
+        stmt = stmt.where(Airline.id == payload.airline_id)
+    if payload.template_name:
+        stmt = stmt.where(AircraftTemplate.template_name == payload.template_name)
+    if payload.template_id:
+        stmt = stmt.where(AircraftTemplate.id == payload.template_id)
+
+    return stmt
+
+
+def _aircrafts_projection_statement(projection: Dict[str, _AircraftField], payload: GetAircraftQuery) -> Select:
+    """
+    Selects only the columns and loads only the relationships of the projection.
+    Airline/template are joined only to filter by their names; otherwise the same rows are kept
+    by requiring the foreign keys, like the inner joins of the full statement
+    """
+    columns = {column for spec in projection.values() for column in spec.columns}
+    options = {option for spec in projection.values() for option in spec.options}
+    stmt = (
+        select(Aircraft)
+        .options(load_only(Aircraft.id, *columns), *options)
+        .where(Aircraft.airline_id.is_not(None), Aircraft.template_id.is_not(None))
+        .order_by(Aircraft.id.desc())
+    )
+
+    if payload.aircraft_registration:
+        stmt = stmt.where(Aircraft.registration == payload.aircraft_registration)
+    if payload.aircraft_msn:
+        stmt = stmt.where(Aircraft.msn == payload.aircraft_msn)
+    if payload.aircraft_id:
+        stmt = stmt.where(Aircraft.id == payload.aircraft_id)
+    if payload.airline_name:
+        stmt = stmt.join(Aircraft.airline).where(Airline.airline_name == payload.airline_name)
+    if payload.airline_id:
+        stmt = stmt.where(Aircraft.airline_id == payload.airline_id)
+    if payload.template_name:
+        stmt = stmt.join(Aircraft.template).where(AircraftTemplate.template_name == payload.template_name)
+    if payload.template_id:
+        stmt = stmt.where(Aircraft.template_id == payload.template_id)
+
+    return stmt
+
+
+def _inlined_relationships(full: bool, payload: GetAircraftQuery) -> tuple[str, ...]:
+    """Relationships of the listing whose assets are inlined"""
+    if not (full and payload.inline_assets):
+        return ()
+    projection = _projection(full, payload)
+    return tuple(name for name in ("airline", "template") if projection is None or name in projection)
+
+
+def _inlined_assets(aircrafts: Sequence[Aircraft], relationships: tuple[str, ...]) -> list[Asset]:
+    return [
+        related.asset
+        for a in aircrafts
+        for name in relationships
+        if (related := getattr(a, name)) is not None
+    ]
+
+
+def _aircraft_mapper(full: bool, payload: GetAircraftQuery,
+                     blobs: Optional[AssetBlobs] = None) -> Callable[[Aircraft], BaseModel | dict]:
+    """Schema builder of the listing, or a builder of JSON-ready dicts with aircraft_id + the projected fields"""
+    schema = AircraftSchemaFull if full else AircraftSchemaLight
+    projection = _projection(full, payload, blobs)
+    if projection is None:
+        specs = _field_specs(full, payload, blobs)
+        return lambda a: schema(aircraft_id=a.id, **{name: spec.value(a) for name, spec in specs.items()})
+
+    include = {"aircraft_id", *projection}
+
+    def to_dict(a: Aircraft) -> dict:
+        values = {name: spec.value(a) for name, spec in projection.items()}
+        return schema.model_construct(aircraft_id=a.id, **values).model_dump(mode="json", include=include)
+
+    return to_dict
+
+
 async def query_aircrafts(
         session: AsyncSession, full: bool, _payload: GetAircraftQuery
-) -> List[AircraftSchemaFull] | List[AircraftSchemaLight]:
+) -> List[AircraftSchemaFull] | List[AircraftSchemaLight] | List[dict]:
     payload = GetAircraftQuery(
         **_payload.model_dump()
     )
 
+    result = await session.execute(_aircrafts_statement(full, payload))
+    aircrafts = result.scalars().unique().all()
+
+    # Each asset file is read once, off the event loop
+    relationships = _inlined_relationships(full, payload)
+    blobs = await AssetBlobs().load(_inlined_assets(aircrafts, relationships)) if relationships else None
+
+    to_schema = _aircraft_mapper(full, payload, blobs)
+    return [to_schema(a) for a in aircrafts]
+
+
+async def query_aircrafts_page(
+        session: AsyncSession, full: bool, _payload: GetAircraftPageQuery
+) -> AircraftPageSchemaFull | AircraftPageSchemaLight | dict:
+    """
+    Keyset pagination on Aircraft.id (descending, like the full listing).
+    `cursor` is the next_cursor of the previous page: only aircraft with a smaller id are returned
+    """
+    stmt = _aircrafts_statement(full, _payload)
+    if _payload.cursor is not None:
+        stmt = stmt.where(Aircraft.id < _payload.cursor)
+    # One extra row tells whether there is a next page
+    stmt = stmt.limit(_payload.limit + 1)
+
+    result = await session.execute(stmt)
+    aircrafts = result.scalars().unique().all()
+
+    has_next = len(aircrafts) > _payload.limit
+    aircrafts = aircrafts[:_payload.limit]
+    next_cursor = aircrafts[-1].id if has_next else None
+    relationships = _inlined_relationships(full, _payload)
+    blobs = await AssetBlobs().load(_inlined_assets(aircrafts, relationships)) if relationships else None
+    to_schema = _aircraft_mapper(full, _payload, blobs)
+    items = [to_schema(a) for a in aircrafts]
+
+    if _payload.fields:
+        return {"items": items, "next_cursor": next_cursor}
     if full:
-        stmt = (
-            select(Aircraft)
-            .join(Aircraft.airline)
-            .join(Aircraft.template)
-            .options(
-                joinedload(Aircraft.airline).joinedload(Airline.asset),
-                joinedload(Aircraft.template).joinedload(AircraftTemplate.asset),
-                selectinload(Aircraft.policy),
-                joinedload(Aircraft.technical_data),
-                selectinload(Aircraft.engines)
-                    .joinedload(AircraftEngine.engine),
-                selectinload(Aircraft.lessee_lessors)
-            )
-            .order_by(Aircraft.id.desc())
-        )
-    else:
-        stmt = (
-            select(Aircraft)
-            .join(Aircraft.airline)
-            .join(Aircraft.template)
-            .options(
-                joinedload(Aircraft.airline),
-                joinedload(Aircraft.template),
-                joinedload(Aircraft.technical_data),
-            )
-            .order_by(Aircraft.id.desc())
+        return AircraftPageSchemaFull(items=items, next_cursor=next_cursor)
+    return AircraftPageSchemaLight(items=items, next_cursor=next_cursor)
+
+
+async def stream_aircrafts(
+        session: AsyncSession, full: bool, _payload: GetAircraftQuery
+) -> AsyncIterator[AircraftSchemaFull | AircraftSchemaLight | dict]:
+    """Yields aircraft as they are read from a server-side cursor, AIRCRAFT_STREAM_BATCH rows at a time"""
+    stmt = _aircrafts_statement(full, _payload).execution_options(yield_per=AIRCRAFT_STREAM_BATCH)
+    relationships = _inlined_relationships(full, _payload)
+    blobs = AssetBlobs() if relationships else None
+    to_schema = _aircraft_mapper(full, _payload, blobs)
+
+    result = await session.stream_scalars(stmt)
+    async for a in result:
+        if blobs is not None:
+            await blobs.load(_inlined_assets((a,), relationships))
+        yield to_schema(a)
+
+
+# -----------------------------
+# AircraftSchemaFull built by Postgres (json_build_object / json_agg), no ORM objects or models in Python
+# -----------------------------
+def _json_object(**fields):
+    """json_build_object with inline keys: Postgres can't infer a type for bound keys of its VARIADIC "any" """
+    args = []
+    for key, value in fields.items():
+        args += [literal_column(f"'{key}'"), value]
+    return func.json_build_object(*args)
+
+
+def _sql_constant(value: int | str):
+    """Inline constant: a bound CASE result would reach json_build_object as text, turning ints into strings"""
+    if isinstance(value, int):
+        return literal_column(str(int(value)))
+    return literal_column("'" + str(value).replace("'", "''") + "'")
+
+
+def _enum_value(column, enum_cls):
+    """Enum columns hold member names, the schemas serialize values"""
+    return case(
+        {_sql_constant(member.name): _sql_constant(member.value) for member in enum_cls},
+        value=cast(column, String)
+    )
+
+
+def _asset_json(asset):
+    """Same object as map_asset (not inlined); all nulls when there is no asset (outer join)"""
+    return _json_object(
+        file_id=asset.id,
+        file_name=asset.asset_name,
+        file_description=asset.asset_description,
+        file_data=null(),
+        file_hash=asset.content_hash,
+        file_url=literal(asset_url(""), String) + asset.content_hash,
+    )
+
+
+def _json_array(element, order_by, from_, *where):
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(element, order_by)), literal_column("'[]'::json")))
+        .select_from(from_)
+        .where(*where)
+        .scalar_subquery()
+    )
+
+
+def _active_lessee_lessor_column(column):
+    return (
+        select(column)
+        .where(AircraftLesseeLessor.aircraft_id == Aircraft.id, AircraftLesseeLessor.active.is_(True))
+        .order_by(AircraftLesseeLessor.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _aircrafts_json_statement(payload: GetAircraftQuery) -> Select:
+    """One row per aircraft: the AircraftSchemaFull document as JSON text, fields in the schema order"""
+    airline_asset = aliased(Asset)
+    template_asset = aliased(Asset)
+
+    policy = _json_array(
+        _json_object(
+            policy_id=AircraftPolicy.id,
+            policy_from=AircraftPolicy.policy_from,
+            policy_to=AircraftPolicy.policy_to,
+        ),
+        AircraftPolicy.id,
+        AircraftPolicy,
+        AircraftPolicy.aircraft_id == Aircraft.id,
+    )
+    engines = _json_array(
+        _json_object(
+            engine=_json_object(
+                engine_id=Engine.id,
+                engine_manufacture=Engine.engine_manufacture,
+                engine_model=Engine.engine_model,
+            ),
+            position=_enum_value(AircraftEngine.position, EnginePositionEnum),
+            msn=AircraftEngine.engine_msn,
+        ),
+        AircraftEngine.id,
+        join(AircraftEngine, Engine, AircraftEngine.engine_id == Engine.id),
+        AircraftEngine.aircraft_id == Aircraft.id,
+    )
+    technical_data = case(
+        (AircraftTechnicalData.id.is_(None), null()),
+        else_=_json_object(
+            in_dashboard=AircraftTechnicalData.in_dashboard,
+            status=_enum_value(AircraftTechnicalData.status, AircraftInsuredStatusEnum),
+            data_source=_enum_value(AircraftTechnicalData.data_source, AircraftDataSourceEnum),
+            av_fixed=AircraftTechnicalData.av_fixed,
         )
+    )
+
+    document = _json_object(
+        aircraft_id=Aircraft.id,
+        registration=Aircraft.registration,
+        msn=Aircraft.msn,
+        mtow=Aircraft.mtow,
+        airline=_json_object(
+            airline_id=Airline.id,
+            airline_name=Airline.airline_name,
+            airline_icao=Airline.icao,
+            airline_iata=Airline.iata,
+            asset=_asset_json(airline_asset),
+        ),
+        template=_json_object(
+            template_id=AircraftTemplate.id,
+            template_name=AircraftTemplate.template_name,
+            asset=_asset_json(template_asset),
+        ),
+        policy=policy,
+        engines=engines,
+        agreed_value=Aircraft.agreed_value,
+        depreciation_rate=Aircraft.depreciation_rate,
+        depreciation_start_date=Aircraft.depreciation_start_date,
+        combined_single_limit=Aircraft.combined_single_limit,
+        hsl_deductible=Aircraft.hsl_deductible,
+        hd_deductible=Aircraft.hd_deductible,
+        lessee=_active_lessee_lessor_column(AircraftLesseeLessor.lessee),
+        lessor=_active_lessee_lessor_column(AircraftLesseeLessor.lessor),
+        technical_data=technical_data,
+    )
+
+    stmt = (
+        select(cast(document, Text))
+        .select_from(Aircraft)
+        .join(Airline, Aircraft.airline_id == Airline.id)
+        .join(AircraftTemplate, Aircraft.template_id == AircraftTemplate.id)
+        .outerjoin(airline_asset, Airline.asset_id == airline_asset.id)
+        .outerjoin(template_asset, AircraftTemplate.asset_id == template_asset.id)
+        .outerjoin(AircraftTechnicalData, AircraftTechnicalData.aircraft_id == Aircraft.id)
+        .order_by(Aircraft.id.desc())
+    )
 
     if payload.aircraft_registration:
         stmt = stmt.where(Aircraft.registration == payload.aircraft_registration)
@@ -155,103 +584,21 @@ async def query_aircrafts(
     if payload.template_id:
         stmt = stmt.where(AircraftTemplate.id == payload.template_id)
 
-    result = await session.execute(stmt)
-    aircrafts = result.scalars().unique().all()
+    return stmt
 
-    if full:
-        response = []
-        for a in aircrafts:
-            active_lessee_lessor = next(
-                (
-                    item
-                    for item in a.lessee_lessors
-                    if item.active
-                ),
-                None
-            )
 
-            response.append(
-                AircraftSchemaFull(
-                    aircraft_id=a.id,
-                    registration=a.registration,
-                    msn=a.msn,
-                    mtow=a.mtow,
-                    policy=[
-                        PolicySchema(
-                            policy_id=p.id,
-                            policy_from=p.policy_from,
-                            policy_to=p.policy_to
-                        )
-                        for p in a.policy
-                    ],
-                    technical_data=(
-                        AircraftTechnicalDataSchema(
-                            in_dashboard=a.technical_data.in_dashboard,
-                            status=a.technical_data.status,
-                            data_source=a.technical_data.data_source,
-                            av_fixed=a.technical_data.av_fixed
-                        )
-                        if a.technical_data else None
-                    ),
-                    agreed_value=a.agreed_value,
-                    depreciation_rate=a.depreciation_rate,
-                    depreciation_start_date=a.depreciation_start_date,
-                    combined_single_limit=a.combined_single_limit,
-                    hsl_deductible=a.hsl_deductible,
-                    hd_deductible=a.hd_deductible,
-                    lessee=active_lessee_lessor.lessee if active_lessee_lessor else None,
-                    lessor=active_lessee_lessor.lessor if active_lessee_lessor else None,
-                    engines=[
-                        EngineSchema(
-                            engine=EngineTypeSchema(
-                                engine_id=engine.engine.id,
-                                engine_manufacture=engine.engine.engine_manufacture,
-                                engine_model=engine.engine.engine_model
-                            ),
-                            position=engine.position,
-                            msn=engine.engine_msn
-                        )
-                        for engine in a.engines
-                        if engine.engine
-                    ] if a.engines else [],
-                    airline=AirlineSchemaFull(
-                        airline_id=a.airline.id,
-                        airline_name=a.airline.airline_name,
-                        airline_icao=a.airline.icao,
-                        airline_iata=a.airline.iata,
-                        asset=map_asset(a.airline.asset)
-                    ),
-                    template=TemplateSchemaFull(
-                        template_id=a.template.id,
-                        template_name=a.template.template_name,
-                        asset=map_asset(a.template.asset)
-                    )
-                )
-            )
+def supports_json_statement(payload: GetAircraftQuery) -> bool:
+    """Projections and inlined assets (blobs may live in the filesystem store) stay on the ORM path"""
+    return not payload.fields and not payload.inline_assets
 
-        return response
 
-    response = [
-        AircraftSchemaLight(
-            aircraft_id=a.id,
-            registration=a.registration,
-            msn=a.msn,
-            status=a.technical_data.status,
-            airline=AirlineSchemaLight(
-                airline_id=a.airline.id,
-                airline_name=a.airline.airline_name,
-                airline_icao=a.airline.icao,
-                airline_iata=a.airline.iata,
-            ),
-            template=TemplateSchemaLight(
-                template_id=a.template.id,
-                template_name=a.template.template_name
-            )
-        )
-        for a in aircrafts
-    ]
+async def stream_aircrafts_json(session: AsyncSession, _payload: GetAircraftQuery) -> AsyncIterator[str]:
+    """Yields AircraftSchemaFull documents encoded by Postgres, AIRCRAFT_STREAM_BATCH rows at a time"""
+    stmt = _aircrafts_json_statement(_payload).execution_options(yield_per=AIRCRAFT_STREAM_BATCH)
 
-    return response
+    result = await session.stream(stmt)
+    async for document in result.scalars():
+        yield document
 
 
 async def query_aircraft_additional(session: AsyncSession, aircraft_id: int) -> List[AdditionalAircraftInfoSchema]:
@@ -278,40 +625,36 @@ async def query_aircraft_additional(session: AsyncSession, aircraft_id: int) ->
 
     msn = str(msn)
 
-    last_revision_subq = select(
-        func.max(AircraftRevision.id)
-    ).scalar_subquery()
-
     stmt_aircraft = (
         select(
-            CiriumAircrafts.Manufacturer,
-            CiriumAircrafts.Aircraft_Sub_Series,
-            CiriumAircrafts.Serial_Number,
-            CiriumAircrafts.Age,
-            CiriumAircrafts.Number_Of_Engines,
-            CiriumAircrafts.Engine_Series,
-            CiriumAircrafts.APU_Type,
-            CiriumAircrafts.Number_of_Seats,
-            CiriumAircrafts.Certified_MTOW_lbs,
-            CiriumAircrafts.Indicative_Market_Lease_Rate_USm
+            CiriumLatest.Manufacturer,
+            CiriumLatest.Aircraft_Sub_Series,
+            CiriumLatest.Serial_Number,
+            CiriumLatest.Age,
+            CiriumLatest.Number_Of_Engines,
+            CiriumLatest.Engine_Series,
+            CiriumLatest.APU_Type,
+            CiriumLatest.Number_of_Seats,
+            CiriumLatest.Certified_MTOW_lbs,
+            CiriumLatest.Indicative_Market_Lease_Rate_USm
         )
         .where(
-            CiriumAircrafts.Registration == reg_num,
-            CiriumAircrafts.Serial_Number == msn,
-            CiriumAircrafts.revision_id == last_revision_subq
+            CiriumLatest.Registration == reg_num,
+            CiriumLatest.Serial_Number == msn
         )
     )
 
+    # One range of ux_cirium_valuation, however many revisions are loaded
     stmt_value = (
         select(
-            cast(CiriumAircrafts.created_at, Date),
-            CiriumAircrafts.Indicative_Market_Value_USm,
+            CiriumValuation.revision_date,
+            CiriumValuation.market_value,
         )
         .where(
-            CiriumAircrafts.Registration == reg_num,
-            CiriumAircrafts.Serial_Number == msn
+            CiriumValuation.registration == reg_num,
+            CiriumValuation.serial_number == msn
         )
-        .order_by(CiriumAircrafts.revision_id.asc())
+        .order_by(CiriumValuation.revision_id.asc())
     )
 
     result_aircraft = await session.execute(stmt_aircraft)
@@ -337,13 +680,13 @@ async def query_aircraft_additional(session: AsyncSession, aircraft_id: int) ->
     valuation_list = []
     for value in values:
         _market_value = 0
-        market_value = value.get("Indicative_Market_Value_USm")
+        market_value = value.get("market_value")
         if market_value or market_value != 0:
             _market_value = market_value / 1_000_000
 
         valuation_list.append(
             AdditionalAircraftInfoValuationSchema(
-                date=value.get("created_at").strftime("%d-%m-%Y"),
+                date=value.get("revision_date").strftime("%d-%m-%Y"),
                 market_value=_market_value
             )
         )
@@ -546,15 +889,11 @@ async def query_create_update_aircraft(session: AsyncSession, _payload: CreateUp
 
     await session.flush()
 
-    manual_id = manual.id
+    # Applied to the aircraft by the reconcile queue, committed with the edit
+    await enqueue_reconcile(session, [manual.id])
 
     await session.commit()
 
-    import asyncio
-    asyncio.create_task(
-        update_create_aircraft_manual(manual_id)
-    )
-
     return status
 
 
@@ -566,58 +905,37 @@ async def query_get_aircrafts_cirium(session: AsyncSession, _payload: GetAircraf
         **_payload.model_dump()
     )
 
-    filters = []
-    airline_cases = []
-
-    for company in payload.airlines_name:
-        pattern = f"%{company}%"
-
-        condition = or_(
-            CiriumAircrafts.Operator.ilike(pattern),
-            CiriumAircrafts.Sub_Lessor.ilike(pattern),
-            CiriumAircrafts.Owner.ilike(pattern),
-        )
-
-        filters.append(condition)
-
-        airline_cases.append(
-            (condition, literal(company))
-        )
-
-    airline_case_expr = case(
-        *airline_cases,
-        else_=None
-    ).label("airline")
+    # Equality joins on the airline index instead of ILIKE '%name%' per airline over the snapshot
+    names = list(dict.fromkeys(payload.airlines_name))
+    await ensure_airlines_indexed(names)
+    match = matched_airlines(names)
 
     stmt = (
         select(
-            CiriumAircrafts.Registration.label("registration"),
-            CiriumAircrafts.Serial_Number.label("msn"),
+            CiriumLatest.Registration.label("registration"),
+            CiriumLatest.Serial_Number.label("msn"),
             (
-                    CiriumAircrafts.Manufacturer +
+                    CiriumLatest.Manufacturer +
                     literal(" ") +
-                    CiriumAircrafts.Aircraft_Sub_Series
+                    CiriumLatest.Aircraft_Sub_Series
             ).label("master_series"),
-            airline_case_expr
+            match.c.airline_name.label("airline")
         )
+        .join(match, party_of(match))
         .where(
-            CiriumAircrafts.revision_id == (
-                select(func.max(CiriumAircrafts.revision_id))
-                .scalar_subquery()
-            ),
-            or_(*filters),
-
-            CiriumAircrafts.Registration.isnot(None),
+            CiriumLatest.Registration.isnot(None),
 
-            ~CiriumAircrafts.Status.in_(EXCLUDED_STATUSES)
+            ~CiriumLatest.Status.in_(EXCLUDED_STATUSES)
         )
         .distinct(
-            CiriumAircrafts.Registration,
-            CiriumAircrafts.Serial_Number
+            CiriumLatest.Registration,
+            CiriumLatest.Serial_Number
         )
         .order_by(
-            CiriumAircrafts.Registration,
-            CiriumAircrafts.Serial_Number
+            CiriumLatest.Registration,
+            CiriumLatest.Serial_Number,
+            # the first airline of the payload that matches
+            match.c.priority
         )
     )
 
@@ -644,26 +962,21 @@ async def query_create_aircrafts_cirium(session: AsyncSession, _payload: CreateA
 
     async with client.session("cirium") as cirium_session:
         cirium_stmt = (
-            select(CiriumAircrafts)
+            select(CiriumLatest)
             .where(
                 or_(
-                    CiriumAircrafts.Registration.in_(payload.registrations),
-                    CiriumAircrafts.Serial_Number.in_(payload.msns),
-                ),
-
-                CiriumAircrafts.revision_id == (
-                    select(func.max(CiriumAircrafts.revision_id))
-                    .scalar_subquery()
+                    CiriumLatest.Registration.in_(payload.registrations),
+                    CiriumLatest.Serial_Number.in_(payload.msns),
                 ),
 
-                ~CiriumAircrafts.Status.in_(EXCLUDED_STATUSES),
-                CiriumAircrafts.Registration.is_not(None),
-                func.length(CiriumAircrafts.Registration) > 3,
+                ~CiriumLatest.Status.in_(EXCLUDED_STATUSES),
+                CiriumLatest.Registration.is_not(None),
+                func.length(CiriumLatest.Registration) > 3,
             )
         )
 
         cirium_result = await cirium_session.execute(cirium_stmt)
-        cirium_aircrafts: Sequence[CiriumAircrafts] = cirium_result.scalars().all()
+        cirium_aircrafts: Sequence[CiriumLatest] = cirium_result.scalars().all()
 
     if not cirium_aircrafts:
         return []
@@ -672,8 +985,6 @@ async def query_create_aircrafts_cirium(session: AsyncSession, _payload: CreateA
         select(Aircraft)
         .options(
             selectinload(Aircraft.engines),
-            selectinload(Aircraft.airline),
-            selectinload(Aircraft.template),
             selectinload(Aircraft.technical_data),
         )
         .where(
@@ -688,7 +999,8 @@ async def query_create_aircrafts_cirium(session: AsyncSession, _payload: CreateA
         a.msn: a for a in result.scalars().all()
     }
 
-    refs = await load_references(session)
+    refs = await get_references()
+    matcher = await get_reference_matcher()
 
     created = []
     for cirium in cirium_aircrafts:
@@ -714,13 +1026,15 @@ async def query_create_aircrafts_cirium(session: AsyncSession, _payload: CreateA
 
             session.add(aircraft)
 
-        aircraft.airline = refs["airlines"].get(cirium.Operator)
+        airline = matcher.resolve_airline(cirium.Operator)
+        aircraft.airline_id = airline.id if airline else None
 
-        aircraft.template = refs["templates"].get(
+        template = refs.templates_by_name.get(
             f"{cirium.Manufacturer} {cirium.Series}"
         )
+        aircraft.template_id = template.id if template else None
 
-        engine = refs["engines"].get(cirium.Engine_Master_Series)
+        engine = matcher.resolve_engine(cirium.Engine_Manufacturer, cirium.Engine_Master_Series)
 
         aircraft.engines = []
         if engine:
@@ -731,7 +1045,7 @@ async def query_create_aircrafts_cirium(session: AsyncSession, _payload: CreateA
             aircraft.engines = [
                 AircraftEngine(
                     aircraft=aircraft,
-                    engine=engine,
+                    engine_id=engine.id,
                     position=pos,
                 )
                 for pos in positions
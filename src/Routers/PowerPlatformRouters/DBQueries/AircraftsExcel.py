@@ -1,49 +1,20 @@
 import tempfile
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Iterable
 
 import pandas as pd
 from fastapi import UploadFile
+from sqlalchemy import select, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from Database import AircraftManual, AircraftEngineManual, AircraftTemplate, AircraftDataSourceEnum, \
-    AircraftInsuredStatusEnum, EnginePositionEnum, Airline, Engine, CiriumAircrafts, DatabaseClient
-from Scheduler.PowerPlatformJobs.Aircraft import update_create_aircraft_manual
-from Schemas import UpsertdelResponseSchema, UpsertdelStatusEnum, ExcelAircraftSchema
+from Database import AircraftManual, AircraftEngineManual, AircraftDataSourceEnum, \
+    AircraftInsuredStatusEnum, EnginePositionEnum, CiriumLatest, get_session_factory
+from Schemas import UpsertdelStatusEnum, ExcelAircraftSchema, ImportedAircraftSchema
 from Schemas.PowerPlatform.BodySchemas.AircraftSchemas import CreateAircraftsFromExcelSchema
-
-
-async def fuzzy_find_one(session: AsyncSession, model, field, value: str, threshold: float = 0.4):
-    result = await session.execute(
-        select(
-            model,
-            func.similarity(
-                field,
-                value
-            ).label("score")
-        )
-        .where(field.is_not(None))
-        .order_by(
-            func.similarity(
-                field,
-                value
-            ).desc()
-        )
-        .limit(1)
-    )
-
-    row = result.first()
-
-    if not row:
-        return None
-
-    obj, score = row
-
-    if score < threshold:
-        return None
-
-    return obj
+from Utils.ReferenceCache import get_references
+from Utils.FuzzyMatcher import get_reference_matcher
+from Utils.ReconcileQueue import enqueue_reconcile
 
 
 ENGINE_POSITION_MAP = {
@@ -107,106 +78,50 @@ def parse_date(value):
     return pd.to_datetime(value).date()
 
 
-async def get_airline_id(session: AsyncSession, airline_name: Optional[str]) -> Optional[int]:
-    if not airline_name or pd.isna(airline_name):
+def _clean(value) -> Optional[str]:
+    if value is None or pd.isna(value):
         return None
-
-    airline_name = str(airline_name).strip()
-
-    airline = await session.scalar(
-        select(Airline)
-        .where(
-            Airline.airline_name.op("%")(airline_name)
-        )
-        .order_by(
-            func.similarity(
-                Airline.airline_name,
-                airline_name
-            ).desc()
-        )
-        .limit(1)
-    )
-
-    return airline.id if airline else None
-
-
-async def get_cirium_aircraft(client: DatabaseClient, msn: Optional[int]) -> Optional[CiriumAircrafts]:
-    if not msn:
-        return None
-
-    async with client.session("cirium") as session:
-        return await session.scalar(
-            select(CiriumAircrafts).where(
-                CiriumAircrafts.Serial_Number == str(msn),
-                CiriumAircrafts.revision_id == (
-                    select(func.max(CiriumAircrafts.revision_id))
-                    .scalar_subquery()
-                )
+    value = str(value).strip()
+    return value or None
+
+
+async def resolve_cirium_aircrafts(msns: Iterable[int]) -> dict[int, Row]:
+    """Snapshot rows of all MSNs in one query of one cirium session"""
+    msns = sorted(set(msns))
+    if not msns:
+        return {}
+
+    async with get_session_factory("cirium")() as session:
+        result = await session.execute(
+            select(
+                CiriumLatest.Serial_Number,
+                CiriumLatest.Manufacturer,
+                CiriumLatest.Series,
+                CiriumLatest.Engine_Manufacturer,
+                CiriumLatest.Engine_Master_Series,
             )
+            .where(CiriumLatest.Serial_Number.in_([str(msn) for msn in msns]))
+            .order_by(CiriumLatest.id)
         )
 
+    aircrafts = {}
+    for row in result:
+        aircrafts.setdefault(int(row.Serial_Number), row)
+    return aircrafts
 
-async def get_template_id(session: AsyncSession, cirium_aircraft: Optional[CiriumAircrafts]) -> Optional[int]:
-    if not cirium_aircraft:
-        return None
-
-    template_name = (
-        f"{cirium_aircraft.Manufacturer} "
-        f"{cirium_aircraft.Series}"
-    ).strip()
-
-    template = await session.scalar(
-        select(AircraftTemplate).where(
-            AircraftTemplate.template_name.ilike(
-                template_name
-            )
-        )
-    )
-
-    return template.id if template else None
-
-
-from sqlalchemy import select, func
-
-
-async def get_engine_id(session: AsyncSession, cirium_aircraft: Optional[CiriumAircrafts]) -> Optional[int]:
-    if not cirium_aircraft:
-        return None
 
-    manufacturer = str(cirium_aircraft.Engine_Manufacturer or "").strip()
+def template_key(cirium_aircraft: Row) -> str:
+    return f"{cirium_aircraft.Manufacturer} {cirium_aircraft.Series}".strip().casefold()
 
-    model = str(cirium_aircraft.Engine_Master_Series or "").strip()
 
-    engine = await session.scalar(
-        select(Engine)
-        .where(
-            Engine.engine_manufacture.op("%")(
-                manufacturer
-            ),
-            Engine.engine_model.op("%")(model),
-        )
-        .order_by(
-            (
-                    func.similarity(
-                        Engine.engine_manufacture,
-                        manufacturer,
-                    )
-                    +
-                    func.similarity(
-                        Engine.engine_model,
-                        model,
-                    )
-            ).desc()
-        )
-        .limit(1)
+def engine_key(cirium_aircraft: Row) -> tuple[str, str]:
+    return (
+        str(cirium_aircraft.Engine_Manufacturer or "").strip(),
+        str(cirium_aircraft.Engine_Master_Series or "").strip(),
     )
 
-    return engine.id if engine else None
-
-
-async def build_engines(session: AsyncSession, aircraft: CreateAircraftsFromExcelSchema, cirium_aircraft: Optional[CiriumAircrafts]) -> list[
-    AircraftEngineManual]:
 
+def build_engines(aircraft: CreateAircraftsFromExcelSchema, engine_id: Optional[int]) -> list[AircraftEngineManual]:
     engine_msns = list(filter(None, [
         aircraft.engine_msn_1,
         aircraft.engine_msn_2,
@@ -221,8 +136,6 @@ async def build_engines(session: AsyncSession, aircraft: CreateAircraftsFromExce
 
     positions = ENGINE_POSITION_MAP[engine_count]
 
-    engine_id = await get_engine_id(session, cirium_aircraft)
-
     engines: list[AircraftEngineManual] = []
 
     for engine_msn, position in zip(engine_msns, positions):
@@ -286,43 +199,92 @@ async def query_parse_aircrafts_excel(file: UploadFile) -> List[ExcelAircraftSch
 
 
 
-async def query_import_aircrafts(session: AsyncSession, _payload: List[CreateAircraftsFromExcelSchema]) -> List[UpsertdelResponseSchema]:
-    import asyncio
+async def query_import_aircrafts(session: AsyncSession, _payload: List[CreateAircraftsFromExcelSchema]) -> List[ImportedAircraftSchema]:
+    """
+    Batch import: MSNs of all rows are resolved in one query, airlines, templates and engines in memory,
+    the manual entries are written and queued for the reconcile with their aircraft in one transaction.
+    Returns a result per row
+    """
     payload = [
         CreateAircraftsFromExcelSchema(**p.model_dump())
         for p in _payload
     ]
 
-    created = 0
-    updated = 0
+    msns = [parse_int(item.msn) if item.msn else None for item in payload]
+    valid_msns = [msn for msn in msns if msn]
 
-    client: DatabaseClient = DatabaseClient()
+    cirium_aircrafts = await resolve_cirium_aircrafts(valid_msns)
 
-    for item in payload:
-        msn = parse_int(item.msn)
+    # Trigram matches in memory, same scoring as the former `%` / similarity() queries
+    matcher = await get_reference_matcher()
+    airline_ids = {
+        name: airline.id
+        for name, airline in matcher.airline_many(_clean(item.airline) for item in payload).items()
+    }
+    engine_ids = {
+        pair: engine.id
+        for pair, engine in matcher.engine_many(engine_key(row) for row in cirium_aircrafts.values()).items()
+    }
 
-        cirium_aircraft = await get_cirium_aircraft(client, msn)
+    # The former `template_name ILIKE name`: case-insensitive equality, the first template by id wins
+    template_ids: dict[str, int] = {}
+    for template in (await get_references()).templates_by_name.values():
+        template_ids.setdefault(template.template_name.casefold(), template.id)
 
-        aircraft_manual = await session.scalar(
+    manuals: dict[int, AircraftManual] = {}
+    if valid_msns:
+        existing = await session.execute(
             select(AircraftManual)
             .options(
                 selectinload(AircraftManual.engines)
             )
-            .where(
-                AircraftManual.msn == msn
-            )
+            .where(AircraftManual.msn.in_(set(valid_msns)))
+            .order_by(AircraftManual.id)
         )
+        for manual in existing.scalars():
+            manuals.setdefault(manual.msn, manual)
 
-        is_new = aircraft_manual is None
+    results: List[ImportedAircraftSchema] = []
+    imported: list[tuple[ImportedAircraftSchema, AircraftManual]] = []
 
-        if is_new:
+    for index, (item, msn) in enumerate(zip(payload, msns), start=1):
+        if not msn:
+            results.append(ImportedAircraftSchema(row=index, msn=None, status=None, error="MSN is missing"))
+            continue
+
+        result = ImportedAircraftSchema(row=index, msn=msn, status=UpsertdelStatusEnum.UPDATED)
+
+        # Rows of the same MSN update one entry, the last row wins
+        aircraft_manual = manuals.get(msn)
+        if aircraft_manual is None:
             aircraft_manual = AircraftManual()
+            aircraft_manual.engines = []
+            session.add(aircraft_manual)
+            manuals[msn] = aircraft_manual
+            result.status = UpsertdelStatusEnum.CREATED
+
+        cirium_aircraft = cirium_aircrafts.get(msn)
+        airline_name = _clean(item.airline)
+
+        result.airline_id = airline_ids.get(airline_name) if airline_name else None
+        if airline_name and result.airline_id is None:
+            result.warnings.append(f"Airline '{airline_name}' not found")
+
+        if cirium_aircraft is None:
+            result.warnings.append("MSN not found in Cirium: no template and engine type")
+        else:
+            result.template_id = template_ids.get(template_key(cirium_aircraft))
+            result.engine_id = engine_ids.get(engine_key(cirium_aircraft))
+            if result.template_id is None:
+                result.warnings.append("Template not found")
+            if result.engine_id is None:
+                result.warnings.append("Engine type not found")
 
         aircraft_manual.registration = item.registration
         aircraft_manual.msn = msn
-        aircraft_manual.airline_id = await get_airline_id(session, item.airline)
+        aircraft_manual.airline_id = result.airline_id
         aircraft_manual.mtow = item.mtow
-        aircraft_manual.template_id = await get_template_id(session, cirium_aircraft)
+        aircraft_manual.template_id = result.template_id
 
         aircraft_manual.av_fixed = item.av_fixed
         aircraft_manual.agreed_value = item.agreed_value
@@ -344,33 +306,21 @@ async def query_import_aircrafts(session: AsyncSession, _payload: List[CreateAir
         aircraft_manual.status = AircraftInsuredStatusEnum.NOT_INSURED
         aircraft_manual.in_dashboard = True
 
-        new_engines = await build_engines(
-            session=session,
-            aircraft=item,
-            cirium_aircraft=cirium_aircraft
-        )
-
         aircraft_manual.engines.clear()
-        aircraft_manual.engines.extend(new_engines)
+        aircraft_manual.engines.extend(build_engines(item, result.engine_id))
 
-        if is_new:
-            session.add(aircraft_manual)
-            created += 1
-        else:
-            updated += 1
-
-        await session.flush()
-
-        manual_id = aircraft_manual.id
-
-        asyncio.create_task(
-            update_create_aircraft_manual(manual_id)
-        )
+        results.append(result)
+        imported.append((result, aircraft_manual))
 
+    # One flush: batched INSERTs of the new entries and their engines, UPDATEs of the existing ones.
+    # The reconcile queue applies them to their aircraft, queued in the same transaction
+    await session.flush()
+    await enqueue_reconcile(session, [aircraft_manual.id for _, aircraft_manual in imported])
     await session.commit()
 
-    return [
-        UpsertdelResponseSchema(
-            status=UpsertdelStatusEnum.CREATED,
-        )
-    ]
+    for result, aircraft_manual in imported:
+        result.manual_id = aircraft_manual.id
+        # Aircraft of new entries are created by the queue
+        result.aircraft_id = aircraft_manual.aircraft_id
+
+    return results
@@ -1,17 +1,17 @@
-from base64 import b64decode
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from Database import Airline, User, Asset, UserAirlineAccess
+from Database import Airline, User, UserAirlineAccess
 from Schemas import UserSchemaLight, AirlineUsersSchemaLight, AirlineUsersSchemaFull, UpsertdelResponseSchema, \
     UpsertdelStatusEnum
 from Schemas.PowerPlatform.BodySchemas.AirlineSchemas import CreateAirlinesBody
 from Schemas.PowerPlatform.QuerySchemas.AirlineSchemas import GetAirlineQuery
-from Utils import map_asset
+from Utils import map_asset, with_asset_data
+from Utils.BlobStore import get_blob_store, AssetBlobs
 
 
 async def query_create_airline(session: AsyncSession, _payload: CreateAirlinesBody) -> List[UpsertdelResponseSchema]:
@@ -28,15 +28,10 @@ async def query_create_airline(session: AsyncSession, _payload: CreateAirlinesBo
             raise ValueError("Airline already exists")
 
         if payload.file_data:
-            header, encoded = payload.file_data.split(",", 1)
-            mime_type = header.split(";")[0].replace("data:", "")
-            decoded_bytes = b64decode(encoded)
-
-            asset = Asset(
+            asset = await get_blob_store().asset_from_data_uri(
                 asset_name=f"{payload.airline_name}",
                 asset_description=None,
-                mime_type=mime_type,
-                base64=decoded_bytes
+                data_uri=payload.file_data
             )
 
         airline = Airline(
@@ -69,7 +64,15 @@ async def query_create_airline(session: AsyncSession, _payload: CreateAirlinesBo
         raise _ex
 
 
-async def map_airline_to_schema(airline, full: bool) -> AirlineUsersSchemaFull | AirlineUsersSchemaLight:
+async def _asset_blobs(airlines, full: bool, inline_assets: bool) -> Optional[AssetBlobs]:
+    """Logos of the airlines read once for the response, when they are inlined"""
+    if not (full and inline_assets):
+        return None
+    return await AssetBlobs().load(airline.asset for airline in airlines)
+
+
+async def map_airline_to_schema(airline, full: bool, inline_assets: bool = False,
+                                blobs: Optional[AssetBlobs] = None) -> AirlineUsersSchemaFull | AirlineUsersSchemaLight:
     users_list = [
         UserSchemaLight(
             user_id=user.user_id,
@@ -84,7 +87,7 @@ async def map_airline_to_schema(airline, full: bool) -> AirlineUsersSchemaFull |
             airline_name=airline.airline_name,
             airline_icao=airline.icao,
             airline_iata=airline.iata,
-            asset=map_asset(asset=airline.asset),
+            asset=map_asset(asset=airline.asset, inline=inline_assets, blobs=blobs),
             users=users_list
         )
         return response
@@ -99,13 +102,12 @@ async def map_airline_to_schema(airline, full: bool) -> AirlineUsersSchemaFull |
         return response
 
 
-async def get_by_user_id(session: AsyncSession, user_id: UUID, full: bool) -> List[AirlineUsersSchemaFull] | List[
-    AirlineUsersSchemaLight]:
+async def get_by_user_id(session: AsyncSession, user_id: UUID, full: bool,
+                         inline_assets: bool = False) -> List[AirlineUsersSchemaFull] | List[AirlineUsersSchemaLight]:
     stmt = (
         select(User)
         .options(
-            selectinload(User.airlines)
-            .selectinload(Airline.asset),
+            with_asset_data(selectinload(User.airlines).selectinload(Airline.asset), inline_assets),
             selectinload(User.airlines)
             .selectinload(Airline.users)
         )
@@ -118,14 +120,15 @@ async def get_by_user_id(session: AsyncSession, user_id: UUID, full: bool) -> Li
     if not user:
         raise ValueError("User not found")
 
-    return [await map_airline_to_schema(airline, full) for airline in user.airlines]
+    blobs = await _asset_blobs(user.airlines, full, inline_assets)
+    return [await map_airline_to_schema(airline, full, inline_assets, blobs) for airline in user.airlines]
 
 
 async def get_by_airline(session: AsyncSession, full: bool, airline_id: int | None = None,
-                         airline_name: str | None = None) -> List[AirlineUsersSchemaFull] | List[
-    AirlineUsersSchemaLight]:
+                         airline_name: str | None = None,
+                         inline_assets: bool = False) -> List[AirlineUsersSchemaFull] | List[AirlineUsersSchemaLight]:
     stmt = select(Airline).options(
-        selectinload(Airline.asset),
+        with_asset_data(selectinload(Airline.asset), inline_assets),
         selectinload(Airline.users)
     ).order_by(Airline.id)
     if airline_id:
@@ -138,15 +141,16 @@ async def get_by_airline(session: AsyncSession, full: bool, airline_id: int | No
     if not airline:
         raise ValueError("Airline not found")
 
-    return [await map_airline_to_schema(airline, full)]
+    blobs = await _asset_blobs([airline], full, inline_assets)
+    return [await map_airline_to_schema(airline, full, inline_assets, blobs)]
 
 
-async def get_all_airlines(session: AsyncSession, full: bool) -> List[AirlineUsersSchemaFull] | List[
-    AirlineUsersSchemaLight]:
+async def get_all_airlines(session: AsyncSession, full: bool,
+                           inline_assets: bool = False) -> List[AirlineUsersSchemaFull] | List[AirlineUsersSchemaLight]:
     stmt = (
         select(Airline)
         .options(
-            selectinload(Airline.asset),
+            with_asset_data(selectinload(Airline.asset), inline_assets),
             selectinload(Airline.users)
         )
         .order_by(Airline.airline_name)
@@ -156,7 +160,8 @@ async def get_all_airlines(session: AsyncSession, full: bool) -> List[AirlineUse
     if not airlines:
         raise ValueError("Airline not found")
 
-    return [await map_airline_to_schema(airline, full) for airline in airlines]
+    blobs = await _asset_blobs(airlines, full, inline_assets)
+    return [await map_airline_to_schema(airline, full, inline_assets, blobs) for airline in airlines]
 
 
 async def query_airline(session: AsyncSession, full: bool, _payload: GetAirlineQuery) -> List[AirlineUsersSchemaFull] | List[AirlineUsersSchemaLight]:
@@ -165,7 +170,7 @@ async def query_airline(session: AsyncSession, full: bool, _payload: GetAirlineQ
     )
 
     if payload.user_id:
-        return await get_by_user_id(session, payload.user_id, full)
+        return await get_by_user_id(session, payload.user_id, full, payload.inline_assets)
     if payload.airline_id or payload.airline_name:
-        return await get_by_airline(session, full, payload.airline_id, payload.airline_name)
-    return await get_all_airlines(session, full)
+        return await get_by_airline(session, full, payload.airline_id, payload.airline_name, payload.inline_assets)
+    return await get_all_airlines(session, full, payload.inline_assets)
@@ -9,7 +9,8 @@ from Schemas import OSTypeEnum, AppearanceEnum, UpsertdelResponseSchema, Upsertd
 from Schemas.PowerPlatform.DefaultSchemas import FontSchema, ApplicationSchema, ApplicationAppearanceSchema
 from Schemas.PowerPlatform.QuerySchemas.ApplicationSchemas import GetApplicationIdQuery, DeviceInfo, \
     UpsertAppearanceQuery
-from Utils import map_asset
+from Utils import map_asset, with_asset_data
+from Utils.BlobStore import AssetBlobs
 
 
 async def query_apps(session: AsyncSession, _payload: GetApplicationIdQuery) -> List[ApplicationSchema]:
@@ -21,7 +22,7 @@ async def query_apps(session: AsyncSession, _payload: GetApplicationIdQuery) ->
         stmt = (
             select(Application)
             .options(
-                selectinload(Application.asset)
+                with_asset_data(selectinload(Application.asset), payload.inline_assets)
             )
         )
         if payload.application_id:
@@ -29,6 +30,7 @@ async def query_apps(session: AsyncSession, _payload: GetApplicationIdQuery) ->
 
         result = await session.execute(stmt)
         apps = result.scalars().all()
+        blobs = await AssetBlobs().load(app.asset for app in apps) if payload.inline_assets else None
 
         apps_list = []
 
@@ -39,7 +41,7 @@ async def query_apps(session: AsyncSession, _payload: GetApplicationIdQuery) ->
                     application_name=app.application_name,
                     application_description=app.application_description,
                     application_status=app.status,
-                    asset=map_asset(app.asset)
+                    asset=map_asset(app.asset, payload.inline_assets, blobs)
                 )
             )
 
@@ -1,14 +1,17 @@
-from base64 import b64decode, b64encode
-from typing import List
+from base64 import b64encode
+from typing import List, Optional
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from Database import Asset
 from Schemas import UpsertdelStatusEnum
 from Schemas.PowerPlatform.BodySchemas.DefaultSchemas import ApplicationFileLoadBody
 from Schemas.PowerPlatform.DefaultSchemas import AssetSchema, UpsertdelResponseSchema
 from Schemas.PowerPlatform.QuerySchemas.ApplicationSchemas import GetApplicationFileQuery
+from Utils import asset_url
+from Utils.BlobStore import get_blob_store, read_asset
 
 
 async def query_load_file(session: AsyncSession, _payload: ApplicationFileLoadBody) -> List[UpsertdelResponseSchema]:
@@ -17,15 +20,10 @@ async def query_load_file(session: AsyncSession, _payload: ApplicationFileLoadBo
     )
 
     try:
-        header, encoded = payload.file_data.split(",", 1)
-        mime_type = header.split(";")[0].replace("data:", "")
-        decoded_bytes = b64decode(encoded)
-
-        file = Asset(
+        file = await get_blob_store().asset_from_data_uri(
             asset_name=payload.file_name,
             asset_description=payload.file_description,
-            mime_type=mime_type,
-            base64=decoded_bytes
+            data_uri=payload.file_data
         )
 
         session.add(file)
@@ -43,7 +41,7 @@ async def query_file(session: AsyncSession, _payload: GetApplicationFileQuery) -
     )
 
     try:
-        stmt = select(Asset)
+        stmt = select(Asset).options(undefer(Asset.base64))
         if payload.file_name:
             stmt = stmt.where(Asset.asset_name == payload.file_name)
         if payload.file_id:
@@ -54,17 +52,40 @@ async def query_file(session: AsyncSession, _payload: GetApplicationFileQuery) -
         if file is None:
             raise ValueError("File not found")
 
-        encoded = b64encode(file.base64).decode()
+        data = await read_asset(file)
+        if data is None:
+            raise ValueError("File content not found")
+
+        encoded = b64encode(data).decode()
         data_uri = f"data:{file.mime_type};base64,{encoded}"
 
         response = AssetSchema(
             file_name=file.asset_name,
             file_id=file.id,
             file_description=file.asset_description,
-            file_data=data_uri
+            file_data=data_uri,
+            file_hash=file.content_hash,
+            file_url=asset_url(file.content_hash) if file.content_hash else None
         )
 
         return [response]
 
     except Exception as _ex:
         raise _ex
+
+
+async def query_asset_mime_type(session: AsyncSession, content_hash: str) -> Optional[str]:
+    stmt = select(Asset.mime_type).where(Asset.content_hash == content_hash).limit(1)
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def query_asset_by_hash(session: AsyncSession, content_hash: str) -> Optional[Asset]:
+    stmt = (
+        select(Asset)
+        .options(undefer(Asset.base64))
+        .where(Asset.content_hash == content_hash)
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().first()
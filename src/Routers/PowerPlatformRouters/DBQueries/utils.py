@@ -4,6 +4,20 @@ from Database import Aircraft, Engine
 from Schemas import AircraftSchemaFull, EngineSchema, EngineTypeSchema, AirlineSchemaLight, TemplateSchemaLight, \
     PolicySchema, AircraftTechnicalDataSchema
 from Schemas.PowerPlatform.BodySchemas.AircraftSchemas import CreateUpdateAircraftBody
+from Utils.ReferenceCache import get_references, reference_cache, EngineRef
+
+
+async def _engine_type(session: AsyncSession, engines_by_id: dict[int, EngineRef], engine_id: int) -> EngineRef | Engine:
+    """Engine from the reference cache; a miss (engine added since the last load) is read from the database"""
+    engine_type = engines_by_id.get(engine_id)
+    if engine_type is not None:
+        return engine_type
+
+    engine_type = await session.get(Engine, engine_id)
+    if engine_type is None:
+        raise ValueError(f"Engine {engine_id} not found")
+    reference_cache.invalidate()
+    return engine_type
 
 
 async def get_aircraft_db_schema(session: AsyncSession, aircraft: Aircraft) -> AircraftSchemaFull:
@@ -11,9 +25,10 @@ async def get_aircraft_db_schema(session: AsyncSession, aircraft: Aircraft) -> A
     policy_db_from = policy_db_to = None
     lessee_lessor_db = [(l.lessee, l.lessor) for l in aircraft.lessee_lessors if l.active]
     lessee_db = lessor_db = None
+    engines_by_id = (await get_references()).engines_by_id
     engines = []
     for engine in aircraft.engines:
-        engine_type = await session.get(Engine, engine.engine_id)
+        engine_type = await _engine_type(session, engines_by_id, engine.engine_id)
         engines.append(
             EngineSchema(
                 engine=EngineTypeSchema(
@@ -66,9 +81,10 @@ async def get_aircraft_db_schema(session: AsyncSession, aircraft: Aircraft) -> A
 
 
 async def get_aircraft_payload_schema(session: AsyncSession, aircraft: CreateUpdateAircraftBody) -> AircraftSchemaFull:
+    engines_by_id = (await get_references()).engines_by_id
     engines = []
     for engine in aircraft.engines:
-        engine_type = await session.get(Engine, engine.engine_id)
+        engine_type = await _engine_type(session, engines_by_id, engine.engine_id)
         engines.append(
             EngineSchema(
                 engine=EngineTypeSchema(
@@ -39,7 +39,7 @@ async def upload_file(request: Request, response: Response, _payload: Annotated[
             key=cache_key,
             db_name="powerplatform",
             update_func=db_query,
-            ttl=600
+            tags=["asset"]
         )
 
         return success_response(request=request, response=response, data=result, msg="File uploaded successfully", status_code=status.HTTP_201_CREATED)
@@ -73,7 +73,8 @@ async def get_file(request: Request, response: Response, _payload: Annotated[Get
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=600
+            tags=["asset"],
+            raw=True
         )
         if len(file_data) > 0:
             return success_response(request=request, response=response, data=file_data,
@@ -38,7 +38,7 @@ async def get_rules(request: Request, response: Response):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            raw=True
         )
 
         if len(rules_data) > 0:
@@ -69,7 +69,7 @@ async def get_rules(request: Request, response: Response, application_id: UUID):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            raw=True
         )
 
         if len(rules_data) > 0:
@@ -41,7 +41,7 @@ async def users(request: Request, response: Response):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            raw=True
         )
 
         if len(users_data) > 0:
@@ -73,7 +73,7 @@ async def users(request: Request, response: Response):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=60
+            raw=True
         )
 
         if len(users_data) > 0:
@@ -105,7 +105,7 @@ async def users(request: Request, response: Response, user_id: UUID):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=30
+            raw=True
         )
 
         if len(user_data) > 0:
@@ -136,7 +136,7 @@ async def users(request: Request, response: Response, user_id: UUID):
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=30
+            raw=True
         )
 
         if len(user_data) > 0:
@@ -170,7 +170,7 @@ async def users_access(request: Request, response: Response, user_id: UUID, _pay
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=120
+            raw=True
         )
 
         if len(user_data) > 0:
@@ -203,7 +203,7 @@ async def switch_user_appearance(request: Request, response: Response, _payload:
             key=cache_key,
             db_name="powerplatform",
             query_func=db_query,
-            ttl=2
+            raw=True
         )
 
         if len(data) > 0:
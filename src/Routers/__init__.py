@@ -7,6 +7,7 @@ from .PowerPlatformRouters.User import router as user
 from .PowerPlatformRouters.Rule import router as rule
 from .PowerPlatformRouters.Application import router as application
 from .PowerPlatformRouters.File import router as file
+from .PowerPlatformRouters.Assets import router as assets
 from .PowerPlatformRouters.Airlines import router as airlines
 from .PowerPlatformRouters.Aircrafts import router as aircrafts
 # from .PowerPlatformRouters.Claim import router as claim
@@ -1,36 +1,23 @@
+import hashlib
 from typing import Sequence, Optional, Set
 
+import orjson
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
-from Database import DatabaseClient, ASGAircrafts, Aircraft, Airline, Engine, AircraftTemplate, AircraftEngine, \
+from Config import setup_logger, AIRCRAFT_SYNC_BATCH
+from Database import DatabaseClient, ASGAircrafts, Aircraft, AircraftTemplate, AircraftEngine, \
     AircraftTechnicalData, AircraftLesseeLessor, AircraftPolicy, CiriumAircrafts, AircraftManual
 from Schemas import AircraftInsuredStatusEnum, EnginePositionEnum
 from Schemas.Enums import AircraftDataSourceEnum
+from Utils.ReferenceCache import get_references, AirlineRef, EngineRef, TemplateRef
+from Utils.FuzzyMatcher import get_reference_matcher
 
-
-async def load_references(session: AsyncSession) -> dict:
-    return {
-        "airlines": {
-            a.airline_name: a
-            for a in (
-                await session.execute(select(Airline))
-            ).scalars()
-        },
-        "engines": {
-            e.engine_model: e
-            for e in (
-                await session.execute(select(Engine))
-            ).scalars()
-        },
-        "templates": {
-            t.template_name: t
-            for t in (
-                await session.execute(select(AircraftTemplate))
-            ).scalars()
-        },
-    }
+logger = setup_logger(
+    "aircraft_sync",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
 
 
 async def load_lessee_lessors(session: AsyncSession, aircraft_id: Optional[int] = None) -> dict:
@@ -58,123 +45,206 @@ def get_engine_positions(number: int) -> Set[EnginePositionEnum]:
     raise ValueError(f"Invalid engine position number: {number}")
 
 
-async def update_aircrafts():
-    client: DatabaseClient = DatabaseClient()
+# Bump when the mapping changes: every aircraft is rewritten by the next sync
+_SYNC_HASH_VERSION = 1
+
+# The ASGAircrafts columns the sync maps
+_CIRIUM_SYNC_COLUMNS = (
+    ASGAircrafts.id, ASGAircrafts.Serial_Number, ASGAircrafts.Registration, ASGAircrafts.Airline,
+    ASGAircrafts.Manufacturer, ASGAircrafts.Series, ASGAircrafts.Engine_Manufacturer,
+    ASGAircrafts.Engine_Master_Series, ASGAircrafts.Number_Of_Engines, ASGAircrafts.Operational_Lessor,
+    ASGAircrafts.Operating_MTOW_lbs, ASGAircrafts.Indicative_Market_Value_USm,
+)
+
+
+class _CiriumTarget:
+    """Values of one ASGAircrafts row mapped onto its aircraft, and their hash"""
+    __slots__ = ("row_id", "registration", "airline_id", "template_id", "engine_id", "positions", "lessee", "lessor",
+                 "mtow", "agreed_value_result", "content_hash")
+
+    def __init__(self, row, airline: Optional[AirlineRef], template: Optional[TemplateRef],
+                 engine: Optional[EngineRef]):
+        self.row_id = row.id
+        self.registration = row.Registration
+        self.airline_id = airline.id if airline else None
+        self.template_id = template.id if template else None
+        self.engine_id = engine.id if engine else None
+        self.positions = sorted(get_engine_positions(row.Number_Of_Engines if row.Number_Of_Engines else 2))
+        self.lessee = row.Airline
+        self.lessor = row.Operational_Lessor
+        self.mtow = round((row.Operating_MTOW_lbs or 0) * 0.45359237)
+        self.agreed_value_result = row.Indicative_Market_Value_USm
+
+        self.content_hash = hashlib.sha256(orjson.dumps([
+            _SYNC_HASH_VERSION, self.airline_id, self.template_id, self.engine_id, self.positions,
+            self.lessee, self.lessor, self.mtow, self.agreed_value_result,
+        ])).hexdigest()
+
+
+def _apply_cirium(target: _CiriumTarget, aircraft: Aircraft):
+    """Copies the mapped Cirium values onto an aircraft with its engines and lessee_lessors loaded"""
+    if target.airline_id:
+        aircraft.airline_id = target.airline_id
+
+    if target.template_id:
+        aircraft.template_id = target.template_id
+
+    # Engines are rebuilt only when the set differs; an unresolved engine type keeps the current ones
+    # (engine_id is NOT NULL)
+    if target.engine_id:
+        current = {(engine.position, engine.engine_id) for engine in aircraft.engines}
+        wanted = {(position, target.engine_id) for position in target.positions}
+        if len(aircraft.engines) != len(wanted) or current != wanted:
+            aircraft.engines = [
+                AircraftEngine(
+                    engine_id=target.engine_id,
+                    position=position,
+                )
+                for position in target.positions
+            ]
+
+    lessee_lessor = next(
+        (
+            item
+            for item in aircraft.lessee_lessors
+            if item.lessee == target.lessee
+               and item.lessor == target.lessor
+        ),
+        None
+    )
 
-    async with client.session("cirium") as cirium_session:
-        cirium_stmt = select(ASGAircrafts).order_by(ASGAircrafts.Airline.desc())
+    if not lessee_lessor:
+        for item in aircraft.lessee_lessors:
+            item.active = False
 
-        result = await cirium_session.execute(cirium_stmt)
+        aircraft.lessee_lessors.append(
+            AircraftLesseeLessor(
+                lessee=target.lessee,
+                lessor=target.lessor,
+                active=True,
+            )
+        )
+    else:
+        lessee_lessor.active = True
 
-        cirium_aircrafts: Sequence[ASGAircrafts] = result.scalars().all()
+    aircraft.mtow = target.mtow
+    aircraft.agreed_value_result = target.agreed_value_result
 
-    async with client.session("powerplatform") as pp_session:
-        stmt = (
-            select(Aircraft)
-            .options(
-                joinedload(Aircraft.technical_data),
-                joinedload(Aircraft.airline),
-                joinedload(Aircraft.template),
+    aircraft.cirium_hash = target.content_hash
 
-                selectinload(Aircraft.engines)
-                .joinedload(AircraftEngine.engine),
 
-                selectinload(Aircraft.lessee_lessors),
-                selectinload(Aircraft.policy),
+async def update_aircrafts() -> dict[str, int]:
+    """
+    Incremental Cirium -> PowerPlatform aircraft sync. The mapped values of every ASGAircrafts row are hashed
+    and compared with the hash the previous run stored on the aircraft (Aircraft.cirium_hash): only new and
+    changed aircraft are loaded and written, AIRCRAFT_SYNC_BATCH per transaction. Returns the counts
+    """
+    counts = dict.fromkeys(("created", "updated", "unchanged", "skipped"), 0)
+    client: DatabaseClient = DatabaseClient()
+
+    async with client.session("cirium") as cirium_session:
+        rows = (
+            await cirium_session.execute(
+                select(*_CIRIUM_SYNC_COLUMNS).order_by(ASGAircrafts.Airline.desc())
             )
+        ).all()
+
+    refs = await get_references()
+    matcher = await get_reference_matcher()
+    airlines: dict[Optional[str], Optional[AirlineRef]] = {}
+    engines: dict[tuple, Optional[EngineRef]] = {}
+
+    # MSN -> target; of several rows the last wins, like the former row-by-row writes
+    targets: dict[int, _CiriumTarget] = {}
+    for row in rows:
+        try:
+            msn = int(row.Serial_Number)
+        except (TypeError, ValueError):
+            counts["skipped"] += 1
+            continue
+
+        if row.Airline not in airlines:
+            airlines[row.Airline] = matcher.resolve_airline(row.Airline)
+        engine_key = (row.Engine_Manufacturer, row.Engine_Master_Series)
+        if engine_key not in engines:
+            engines[engine_key] = matcher.resolve_engine(*engine_key)
+
+        targets[msn] = _CiriumTarget(
+            row,
+            airline=airlines[row.Airline],
+            template=refs.templates_by_name.get(f"{row.Manufacturer} {row.Series}"),
+            engine=engines[engine_key],
         )
 
-        result = await pp_session.execute(stmt)
-
-        pp_aircrafts = {
-            a.msn: a
-            for a in result.scalars().unique().all()
-        }
-
-        refs = await load_references(pp_session)
-
-        for cirium_aircraft in cirium_aircrafts:
-            pp_aircraft = pp_aircrafts.get(int(cirium_aircraft.Serial_Number))
+    async with client.session("powerplatform") as pp_session:
+        current = await pp_session.execute(
+            select(Aircraft.id, Aircraft.msn, Aircraft.cirium_hash, AircraftTechnicalData.data_source)
+            .outerjoin(AircraftTechnicalData, AircraftTechnicalData.aircraft_id == Aircraft.id)
+            .order_by(Aircraft.id)
+        )
+        existing = {msn: (aircraft_id, cirium_hash, data_source)
+                    for aircraft_id, msn, cirium_hash, data_source in current}
+
+        changed: list[tuple[int, _CiriumTarget]] = []
+        new: list[tuple[int, _CiriumTarget]] = []
+        for msn, target in targets.items():
+            if msn not in existing:
+                new.append((msn, target))
+                continue
 
-            if not pp_aircraft:
-                pp_aircraft = Aircraft(
-                    registration=cirium_aircraft.Registration,
-                    msn=int(cirium_aircraft.Serial_Number),
+            aircraft_id, cirium_hash, data_source = existing[msn]
+            if data_source is not None and data_source != AircraftDataSourceEnum.CIRIUM:
+                counts["skipped"] += 1
+            elif cirium_hash == target.content_hash:
+                counts["unchanged"] += 1
+            else:
+                changed.append((aircraft_id, target))
+
+        for start in range(0, len(changed), AIRCRAFT_SYNC_BATCH):
+            batch = dict(changed[start:start + AIRCRAFT_SYNC_BATCH])
+            result = await pp_session.execute(
+                select(Aircraft)
+                .options(
+                    selectinload(Aircraft.engines),
+                    selectinload(Aircraft.lessee_lessors),
+                )
+                .where(Aircraft.id.in_(batch))
+            )
+            for aircraft in result.scalars():
+                _apply_cirium(batch[aircraft.id], aircraft)
+                counts["updated"] += 1
+
+            await pp_session.commit()
+            pp_session.expunge_all()
+
+        for start in range(0, len(new), AIRCRAFT_SYNC_BATCH):
+            for msn, target in new[start:start + AIRCRAFT_SYNC_BATCH]:
+                aircraft = Aircraft(
+                    registration=target.registration,
+                    msn=msn,
                 )
 
-                pp_aircraft.engines = []
-                pp_aircraft.lessee_lessors = []
-                pp_aircraft.engines = []
+                aircraft.engines = []
+                aircraft.lessee_lessors = []
 
-                pp_aircraft.technical_data = AircraftTechnicalData(
+                aircraft.technical_data = AircraftTechnicalData(
                     data_source=AircraftDataSourceEnum.CIRIUM,
-                    data_source_row_id=cirium_aircraft.id,
+                    data_source_row_id=target.row_id,
                     status=AircraftInsuredStatusEnum.NOT_INSURED,
                     av_fixed=True,
                     in_dashboard=True
                 )
 
-                pp_session.add(pp_aircraft)
-
-            technical_data: AircraftTechnicalData = pp_aircraft.technical_data
-
-            if technical_data and technical_data.data_source != AircraftDataSourceEnum.CIRIUM:
-                continue
-
-            airline: Optional[Airline] = refs.get("airlines", {}).get(cirium_aircraft.Airline, None)
-            if airline:
-                pp_aircraft.airline = airline
-
-            template: Optional[AircraftTemplate] = refs.get("templates", {}).get(
-                f"{cirium_aircraft.Manufacturer} {cirium_aircraft.Series}", None)
-            if template:
-                pp_aircraft.template = template
-
-            engine: Engine = refs.get("engines").get(cirium_aircraft.Engine_Master_Series)
-
-            engine_positions = get_engine_positions(
-                cirium_aircraft.Number_Of_Engines if cirium_aircraft.Number_Of_Engines else 2)
-
-            aircraft_engines = []
-            for engine_position in engine_positions:
-                aircraft_engines.append(
-                    AircraftEngine(
-                        aircraft=pp_aircraft,
-                        engine=engine,
-                        position=engine_position,
-                    )
-                )
-
-            pp_aircraft.engines = aircraft_engines
+                _apply_cirium(target, aircraft)
+                pp_session.add(aircraft)
+                counts["created"] += 1
 
-            lessee_lessor = next(
-                (
-                    item
-                    for item in pp_aircraft.lessee_lessors
-                    if item.lessee == cirium_aircraft.Airline
-                       and item.lessor == cirium_aircraft.Operational_Lessor
-                ),
-                None
-            )
+            await pp_session.commit()
+            pp_session.expunge_all()
 
-            if not lessee_lessor:
-                for item in pp_aircraft.lessee_lessors:
-                    item.active = False
-
-                pp_aircraft.lessee_lessors.append(
-                    AircraftLesseeLessor(
-                        lessee=cirium_aircraft.Airline,
-                        lessor=cirium_aircraft.Operational_Lessor,
-                        active=True,
-                    )
-                )
-            else:
-                lessee_lessor.active = True
-
-            pp_aircraft.mtow = round((cirium_aircraft.Operating_MTOW_lbs or 0) * 0.45359237)
-            pp_aircraft.agreed_value_result = cirium_aircraft.Indicative_Market_Value_USm
-
-        await pp_session.commit()
+    logger.info(f"Aircraft sync: {counts['created']} created, {counts['updated']} updated, "
+                f"{counts['unchanged']} unchanged, {counts['skipped']} skipped")
+    return counts
 
 
 async def update_aircraft_templates():
@@ -193,13 +263,9 @@ async def update_aircraft_templates():
     for manufacturer, series in _cirium_templates:
         cirium_templates.append(f"{manufacturer} {series}")
 
-    existing_stmt = (
-        select(AircraftTemplate.template_name)
-    )
+    existing_templates = (await get_references()).templates_by_name
 
     async with client.session('powerplatform') as pp_session:
-        pp_result = await pp_session.execute(existing_stmt)
-        existing_templates = pp_result.scalars().all()
 
         new_templates = []
         for template in cirium_templates:
@@ -215,50 +281,132 @@ async def update_aircraft_templates():
         await pp_session.commit()
 
 
-async def update_create_aircraft_manual(target: int):
-    client: DatabaseClient = DatabaseClient()
+def _apply_manual(manual_aircraft: AircraftManual, aircraft: Aircraft):
+    """Copies a manual entry onto its aircraft (technical data, active policy, lessee/lessor, engines)"""
+    aircraft.registration = manual_aircraft.registration
+    aircraft.msn = manual_aircraft.msn
 
-    async with client.session("powerplatform") as session:
-        manual_stmt = (
-            select(AircraftManual)
-            .options(
-                selectinload(AircraftManual.engines)
-            )
-            .where(AircraftManual.id == target)
-        )
+    aircraft.airline_id = manual_aircraft.airline_id
+    aircraft.template_id = manual_aircraft.template_id
 
-        manual_result = await session.execute(manual_stmt)
+    aircraft.mtow = manual_aircraft.mtow
 
-        manual_aircraft: Optional[AircraftManual] = (
-            manual_result.scalars().one_or_none()
+    aircraft.agreed_value = manual_aircraft.agreed_value
+    aircraft.agreed_value_result = manual_aircraft.agreed_value_result
+
+    aircraft.combined_single_limit = manual_aircraft.combined_single_limit
+
+    aircraft.hsl_deductible = manual_aircraft.hsl_deductible
+
+    aircraft.hd_deductible = manual_aircraft.hd_deductible
+
+    aircraft.depreciation_rate = manual_aircraft.depreciation_rate
+
+    aircraft.depreciation_start_date = manual_aircraft.depreciation_start_date
+
+    # The next Cirium sync rewrites the aircraft, as it did before the sync was incremental
+    aircraft.cirium_hash = None
+
+    if not aircraft.technical_data:
+        aircraft.technical_data = AircraftTechnicalData(
+            aircraft_id=aircraft.id,
+            data_source=AircraftDataSourceEnum.MANUAL,
+            data_source_row_id=manual_aircraft.id,
+            status=AircraftInsuredStatusEnum.NOT_INSURED,
         )
 
-        if not manual_aircraft:
-            raise ValueError(
-                f"AircraftManual with id={target} not found"
+    else:
+        aircraft.technical_data.data_source = manual_aircraft.data_source
+        aircraft.technical_data.data_source_row_id = manual_aircraft.id
+        aircraft.technical_data.status = manual_aircraft.status
+
+    for policy in aircraft.policy:
+        policy.active = False
+
+    existing_policy = next(
+        (
+            policy for policy in aircraft.policy
+            if policy.policy_from == manual_aircraft.policy_start and policy.policy_to == manual_aircraft.policy_end
+        ),
+        None
+    )
+
+    if manual_aircraft.policy_start or manual_aircraft.policy_end:
+        if existing_policy:
+            existing_policy.active = True
+
+        else:
+            aircraft.policy.append(
+                AircraftPolicy(
+                    policy_from=manual_aircraft.policy_start,
+                    policy_to=manual_aircraft.policy_end,
+                    active=True
+                )
             )
 
-        stmt = (
+    for item in aircraft.lessee_lessors:
+        item.active = False
+
+    existing_lessee_lessor = next(
+        (
+            item for item in aircraft.lessee_lessors
+            if item.lessee == manual_aircraft.lessee and item.lessor == manual_aircraft.lessor
+        ),
+        None
+    )
+
+    if manual_aircraft.lessee or manual_aircraft.lessor:
+        if existing_lessee_lessor:
+            existing_lessee_lessor.active = True
+
+        else:
+            aircraft.lessee_lessors.append(
+                AircraftLesseeLessor(
+                    lessee=manual_aircraft.lessee,
+                    lessor=manual_aircraft.lessor,
+                    active=True
+                )
+            )
+
+    aircraft.engines.clear()
+
+    for engine_manual in manual_aircraft.engines:
+        if not engine_manual.engine_id:
+            continue
+
+        aircraft.engines.append(
+            AircraftEngine(
+                engine_id=engine_manual.engine_id,
+                position=engine_manual.position,
+                engine_msn=engine_manual.engine_msn
+            )
+        )
+
+    if manual_aircraft.aircraft_id is None:
+        manual_aircraft.aircraft_id = aircraft.id
+
+
+async def _reconcile_manuals(session: AsyncSession, manuals: Sequence[AircraftManual]) -> dict[int, Aircraft]:
+    """Applies manual entries to their aircraft (created when missing) with one load and one flush for all"""
+    aircraft_ids = {manual.aircraft_id for manual in manuals if manual.aircraft_id}
+    existing: dict[int, Aircraft] = {}
+    if aircraft_ids:
+        result = await session.execute(
             select(Aircraft)
             .options(
                 joinedload(Aircraft.technical_data),
-                joinedload(Aircraft.airline),
-                joinedload(Aircraft.template),
-
-                selectinload(Aircraft.engines)
-                .joinedload(AircraftEngine.engine),
-
+                selectinload(Aircraft.engines),
                 selectinload(Aircraft.lessee_lessors),
                 selectinload(Aircraft.policy),
             )
-            .where(Aircraft.id == manual_aircraft.aircraft_id)
+            .where(Aircraft.id.in_(aircraft_ids))
         )
+        existing = {aircraft.id: aircraft for aircraft in result.scalars().unique()}
 
-        result = await session.execute(stmt)
-
-        aircraft: Optional[Aircraft] = (
-            result.scalars().one_or_none()
-        )
+    reconciled: dict[int, Aircraft] = {}
+    created = False
+    for manual_aircraft in manuals:
+        aircraft = existing.get(manual_aircraft.aircraft_id)
 
         if not aircraft:
             aircraft = Aircraft(
@@ -272,111 +420,73 @@ async def update_create_aircraft_manual(target: int):
             aircraft.engines = []
 
             session.add(aircraft)
+            created = True
 
-            await session.flush()
-
-        aircraft.registration = manual_aircraft.registration
-        aircraft.msn = manual_aircraft.msn
-
-        aircraft.airline_id = manual_aircraft.airline_id
-        aircraft.template_id = manual_aircraft.template_id
-
-        aircraft.mtow = manual_aircraft.mtow
-
-        aircraft.agreed_value = manual_aircraft.agreed_value
-        aircraft.agreed_value_result = manual_aircraft.agreed_value_result
+        reconciled[manual_aircraft.id] = aircraft
 
-        aircraft.combined_single_limit = manual_aircraft.combined_single_limit
+    # ids of the new aircraft for their technical data
+    if created:
+        await session.flush()
 
-        aircraft.hsl_deductible = manual_aircraft.hsl_deductible
+    for manual_aircraft in manuals:
+        _apply_manual(manual_aircraft, reconciled[manual_aircraft.id])
 
-        aircraft.hd_deductible = manual_aircraft.hd_deductible
+    return reconciled
 
-        aircraft.depreciation_rate = manual_aircraft.depreciation_rate
 
-        aircraft.depreciation_start_date = manual_aircraft.depreciation_start_date
+async def update_create_aircraft_manual(target: int):
+    client: DatabaseClient = DatabaseClient()
 
-        if not aircraft.technical_data:
-            aircraft.technical_data = AircraftTechnicalData(
-                aircraft_id=aircraft.id,
-                data_source=AircraftDataSourceEnum.MANUAL,
-                data_source_row_id=manual_aircraft.id,
-                status=AircraftInsuredStatusEnum.NOT_INSURED,
+    async with client.session("powerplatform") as session:
+        manual_stmt = (
+            select(AircraftManual)
+            .options(
+                selectinload(AircraftManual.engines)
             )
-
-        else:
-            aircraft.technical_data.data_source = manual_aircraft.data_source
-            aircraft.technical_data.data_source_row_id = manual_aircraft.id
-            aircraft.technical_data.status = manual_aircraft.status
-
-        for policy in aircraft.policy:
-            policy.active = False
-
-        existing_policy = next(
-            (
-                policy for policy in aircraft.policy
-                if policy.policy_from == manual_aircraft.policy_start and policy.policy_to == manual_aircraft.policy_end
-            ),
-            None
+            .where(AircraftManual.id == target)
         )
 
-        if manual_aircraft.policy_start or manual_aircraft.policy_end:
-            if existing_policy:
-                existing_policy.active = True
+        manual_result = await session.execute(manual_stmt)
 
-            else:
-                aircraft.policy.append(
-                    AircraftPolicy(
-                        policy_from=manual_aircraft.policy_start,
-                        policy_to=manual_aircraft.policy_end,
-                        active=True
-                    )
-                )
+        manual_aircraft: Optional[AircraftManual] = (
+            manual_result.scalars().one_or_none()
+        )
 
-        for item in aircraft.lessee_lessors:
-            item.active = False
+        if not manual_aircraft:
+            raise ValueError(
+                f"AircraftManual with id={target} not found"
+            )
 
-        existing_lessee_lessor = next(
-            (
-                item for item in aircraft.lessee_lessors
-                if item.lessee == manual_aircraft.lessee and item.lessor == manual_aircraft.lessor
-            ),
-            None
-        )
+        aircraft = (await _reconcile_manuals(session, [manual_aircraft]))[manual_aircraft.id]
 
-        if manual_aircraft.lessee or manual_aircraft.lessor:
-            if existing_lessee_lessor:
-                existing_lessee_lessor.active = True
+        await session.commit()
 
-            else:
-                aircraft.lessee_lessors.append(
-                    AircraftLesseeLessor(
-                        lessee=manual_aircraft.lessee,
-                        lessor=manual_aircraft.lessor,
-                        active=True
-                    )
-                )
+        return aircraft
 
-        aircraft.engines.clear()
 
-        for engine_manual in manual_aircraft.engines:
-            if not engine_manual.engine_id:
-                continue
+async def reconcile_aircraft_manuals(targets: Sequence[int]) -> dict[int, int]:
+    """update_create_aircraft_manual for many entries in one transaction. Returns manual id -> aircraft id"""
+    if not targets:
+        return {}
 
-            aircraft.engines.append(
-                AircraftEngine(
-                    engine_id=engine_manual.engine_id,
-                    position=engine_manual.position,
-                    engine_msn=engine_manual.engine_msn
-                )
+    client: DatabaseClient = DatabaseClient()
+
+    async with client.session("powerplatform") as session:
+        result = await session.execute(
+            select(AircraftManual)
+            .options(
+                selectinload(AircraftManual.engines)
             )
+            .where(AircraftManual.id.in_(targets))
+            .order_by(AircraftManual.id)
+        )
+        manuals = result.scalars().all()
 
-        if manual_aircraft.aircraft_id is None:
-            manual_aircraft.aircraft_id = aircraft.id
+        reconciled = await _reconcile_manuals(session, manuals)
 
         await session.commit()
 
-        return aircraft
+        return {manual_id: aircraft.id for manual_id, aircraft in reconciled.items()}
 
 
 if __name__ == "__main__":
@@ -1,33 +1,25 @@
-from sqlalchemy import select, func
+from sqlalchemy import select
 
-from Database import DatabaseClient, Airline, CiriumAircrafts
+from Database import DatabaseClient, Airline, CiriumLatest
+from Utils.ReferenceCache import get_references
 
 
 async def sync_airlines():
     client: DatabaseClient = DatabaseClient()
 
     stmt = (
-        select(CiriumAircrafts.Operator, CiriumAircrafts.Operator_ICAO, CiriumAircrafts.Operator_IATA)
-        .order_by(CiriumAircrafts.Operator)
+        select(CiriumLatest.Operator, CiriumLatest.Operator_ICAO, CiriumLatest.Operator_IATA)
+        .order_by(CiriumLatest.Operator)
         .distinct()
-        .where(
-            CiriumAircrafts.revision_id == (
-                select(func.max(CiriumAircrafts.revision_id))
-                .scalar_subquery()
-            )
-        )
     )
     async with client.session("cirium") as cirium_session:
         result = await cirium_session.execute(stmt)
         airlines = result.all()
 
 
-    existing_stmt = (
-        select(Airline.airline_name)
-    )
+    existing_airlines = (await get_references()).airlines_by_name
+
     async with client.session('powerplatform') as pp_session:
-        existing_result = await pp_session.execute(existing_stmt)
-        existing_airlines = set(existing_result.scalars().all())
 
         new_airlines = []
         for airline_name, airline_icao, airline_iata in airlines:
@@ -1,6 +1,8 @@
 from Database import DatabaseClient, Engine, CiriumAircrafts
 from sqlalchemy import select
 
+from Utils.ReferenceCache import get_references
+
 async def sync_engines_from_cirium():
     client: DatabaseClient = DatabaseClient()
 
@@ -18,11 +20,9 @@ async def sync_engines_from_cirium():
         cirium_engines = cirium_result.all()
 
 
-    existing_stmt = select(Engine.engine_model)
+    existing_models = (await get_references()).engines_by_model
 
     async with client.session('powerplatform') as pp_session:
-        existing_result = await pp_session.execute(existing_stmt)
-        existing_models = set(existing_result.scalars().all())
         new_engines = []
 
         for manufacture, model in cirium_engines:
@@ -7,7 +7,7 @@ from pydantic import BaseModel
 
 from .DefaultSchemas import AssetSchema
 from .AirlineSchemas import AirlineSchemaFull, AirlineSchemaLight
-from ..Enums import AircraftInsuredStatusEnum, EnginePositionEnum
+from ..Enums import AircraftInsuredStatusEnum, EnginePositionEnum, UpsertdelStatusEnum
 
 
 class TemplateSchemaFull(BaseModel):
@@ -83,6 +83,16 @@ class AircraftSchemaLight(BaseModel):
     template: TemplateSchemaFull | TemplateSchemaLight
 
 
+class AircraftPageSchemaFull(BaseModel):
+    items: List[AircraftSchemaFull]
+    next_cursor: Optional[int]
+
+
+class AircraftPageSchemaLight(BaseModel):
+    items: List[AircraftSchemaLight]
+    next_cursor: Optional[int]
+
+
 class AdditionalAircraftInfoValuationSchema(BaseModel):
     date: str
     market_value: Optional[float]
@@ -140,6 +150,19 @@ class ExcelAircraftSchema(BaseModel):
     engine_msn_4: Optional[str]
 
 
+class ImportedAircraftSchema(BaseModel):
+    row: int
+    msn: Optional[int]
+    status: Optional[UpsertdelStatusEnum]
+    manual_id: Optional[int] = None
+    aircraft_id: Optional[int] = None
+    airline_id: Optional[int] = None
+    template_id: Optional[int] = None
+    engine_id: Optional[int] = None
+    warnings: List[str] = []
+    error: Optional[str] = None
+
+
 _current_module = sys.modules[__name__]
 
 __all__ = [
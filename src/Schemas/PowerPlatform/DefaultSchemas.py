@@ -48,6 +48,8 @@ class AssetSchema(BaseModel):
     file_name: Optional[str]
     file_description: Optional[str]
     file_data: Optional[str]
+    file_hash: Optional[str] = None
+    file_url: Optional[str] = None
 
 
 class RuleSchema(BaseModel):
@@ -1,9 +1,13 @@
 from typing import Optional, List
 
 from fastapi import Query
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
+from Config import AIRCRAFT_PAGE_DEFAULT_LIMIT, AIRCRAFT_PAGE_MAX_LIMIT
 from Schemas.decorators import exactly_one_of, at_most_one_of
+from ..AircraftSchemas import AircraftSchemaFull, AircraftSchemaLight
+
+_AIRCRAFT_FIELDS = (set(AircraftSchemaFull.model_fields) | set(AircraftSchemaLight.model_fields)) - {"aircraft_id"}
 
 
 class GetAircraftIDQuery(BaseModel):
@@ -14,6 +18,7 @@ class GetAircraftIDQuery(BaseModel):
 class GetAircraftTemplateQuery(BaseModel):
     template_name: Optional[str] = Query(default=None, description="Template name")
     template_id: Optional[int] = Query(default=None, description="Template ID")
+    inline_assets: bool = Query(default=False, description="Embed template images as base64 data URIs")
 
 
 @at_most_one_of('template_id', 'template_name', 'aircraft_registration',
@@ -26,6 +31,28 @@ class GetAircraftQuery(BaseModel):
     template_id: Optional[int] = Query(default=None, description="Template ID")
     airline_name: Optional[str] = Query(default=None, description="Airline name")
     airline_id: Optional[int] = Query(default=None, description="Airline ID")
+    fields: Optional[str] = Query(default=None,
+                                  description="Comma-separated fields to return (aircraft_id is always included), "
+                                              "e.g. registration,agreed_value. Only the needed relationships are loaded")
+    inline_assets: bool = Query(default=False, description="Embed airline/template images as base64 data URIs")
+
+    @field_validator("fields")
+    @classmethod
+    def _normalize_fields(cls, value: Optional[str]) -> Optional[str]:
+        """Sorted and deduplicated, so equal projections share a cache key"""
+        if value is None:
+            return None
+        fields = {field.strip() for field in value.split(",") if field.strip()} - {"aircraft_id"}
+        unknown = fields - _AIRCRAFT_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown field(-s): {', '.join(sorted(unknown))}. "
+                             f"Available: {', '.join(sorted(_AIRCRAFT_FIELDS))}")
+        return ",".join(sorted(fields)) or None
+
+
+class GetAircraftPageQuery(GetAircraftQuery):
+    cursor: Optional[int] = Query(default=None, description="next_cursor of the previous page")
+    limit: int = Query(default=AIRCRAFT_PAGE_DEFAULT_LIMIT, ge=1, le=AIRCRAFT_PAGE_MAX_LIMIT, description="Page size")
 
 
 @exactly_one_of('engine_id', 'engine_type', 'engine_manufacture')
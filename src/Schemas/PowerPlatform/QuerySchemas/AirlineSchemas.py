@@ -11,4 +11,5 @@ from Schemas.decorators import exactly_one_of
 class GetAirlineQuery(BaseModel):
     airline_name: Optional[str] = Query(default=None, description="Airline name")
     airline_id: Optional[int] = Query(default=None, description="Airline ID")
-    user_id: Optional[UUID] = Query(default=None, description="User ID")
\ No newline at end of file
+    user_id: Optional[UUID] = Query(default=None, description="User ID")
+    inline_assets: bool = Query(default=False, description="Embed airline images as base64 data URIs")
\ No newline at end of file
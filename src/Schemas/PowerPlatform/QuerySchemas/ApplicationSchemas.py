@@ -11,6 +11,7 @@ from Schemas.Enums import OSTypeEnum
 
 class GetApplicationIdQuery(BaseModel):
     application_id: Optional[UUID] = Query(default=None, description="Application ID")
+    inline_assets: bool = Query(default=False, description="Embed application images as base64 data URIs")
 
 
 class GetApplicationSizeQuery(BaseModel):
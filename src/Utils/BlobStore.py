@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from base64 import b64decode
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select, update
+
+from Config import setup_logger, ASSETS_PATH, ASSET_STORE_BACKEND, ASSET_MIGRATE_BLOBS, ASSET_MIGRATION_BATCH
+from Database import Asset, get_session_factory
+
+logger = setup_logger(
+    "blob_store",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+# Base64 text decoded and written per step (a multiple of 4, so every slice decodes on its own)
+_DECODE_CHUNK = 256 * 1024
+
+
+class StoredBlob:
+    __slots__ = ("content_hash", "size")
+
+    def __init__(self, content_hash: str, size: int):
+        self.content_hash = content_hash
+        self.size = size
+
+
+def split_data_uri(data_uri: str) -> tuple[str, str]:
+    """`data:<mime>;base64,<data>` -> (mime type, base64 text)"""
+    header, encoded = data_uri.split(",", 1)
+    mime_type = header.split(";")[0].replace("data:", "")
+    return mime_type, encoded
+
+
+def iter_base64(encoded: str) -> Iterator[bytes]:
+    """Decodes base64 text slice by slice instead of materializing the whole blob"""
+    if any(c in encoded for c in " \r\n\t"):
+        encoded = "".join(encoded.split())
+    for start in range(0, len(encoded), _DECODE_CHUNK):
+        yield b64decode(encoded[start:start + _DECODE_CHUNK])
+
+
+class BlobStore(ABC):
+    """
+    Where the contents of new assets go.
+    Postgres keeps the metadata (name, mime type, content_hash, size) with any store
+    """
+    name: str = ""
+
+    @abstractmethod
+    async def asset_from_data_uri(self, asset_name: str, asset_description: Optional[str], data_uri: str) -> Asset:
+        """New (unsaved) Asset holding or referencing the decoded contents of a data URI"""
+
+
+class DatabaseBlobStore(BlobStore):
+    """Blob in assets.base64 (the layout before the filesystem store)"""
+    name = "database"
+
+    async def asset_from_data_uri(self, asset_name: str, asset_description: Optional[str], data_uri: str) -> Asset:
+        mime_type, encoded = split_data_uri(data_uri)
+        data = b64decode(encoded)
+        return Asset(
+            asset_name=asset_name,
+            asset_description=asset_description,
+            mime_type=mime_type,
+            base64=data,
+            size_bytes=len(data)
+        )
+
+
+class FilesystemBlobStore(BlobStore):
+    """
+    Content-addressed directory: <root>/<hash[:2]>/<hash[2:4]>/<sha256>.
+    Files are written to a temporary file and renamed into place, so a file under its hash is always complete;
+    equal contents are stored once
+    """
+    name = "filesystem"
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.tmp = self.root / ".tmp"
+
+    def path(self, content_hash: str) -> Path:
+        return self.root / content_hash[:2] / content_hash[2:4] / content_hash
+
+    def find(self, content_hash: Optional[str]) -> Optional[Path]:
+        if not content_hash:
+            return None
+        path = self.path(content_hash)
+        return path if path.is_file() else None
+
+    def write(self, chunks: Iterable[bytes]) -> StoredBlob:
+        """Blocking, run in a thread"""
+        self.tmp.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    file.write(chunk)
+                file.flush()
+                os.fsync(file.fileno())
+
+            blob = StoredBlob(digest.hexdigest(), size)
+            path = self.path(blob.content_hash)
+            if path.is_file():
+                os.unlink(tmp_name)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, path)
+            return blob
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    async def asset_from_data_uri(self, asset_name: str, asset_description: Optional[str], data_uri: str) -> Asset:
+        mime_type, encoded = split_data_uri(data_uri)
+        blob = await asyncio.to_thread(self.write, iter_base64(encoded))
+        return Asset(
+            asset_name=asset_name,
+            asset_description=asset_description,
+            mime_type=mime_type,
+            base64=None,
+            content_hash=blob.content_hash,
+            size_bytes=blob.size
+        )
+
+
+filesystem_store = FilesystemBlobStore(ASSETS_PATH)
+
+_STORES: dict[str, BlobStore] = {
+    FilesystemBlobStore.name: filesystem_store,
+    DatabaseBlobStore.name: DatabaseBlobStore(),
+}
+
+
+def get_blob_store() -> BlobStore:
+    try:
+        return _STORES[ASSET_STORE_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown ASSET_STORE_BACKEND '{ASSET_STORE_BACKEND}', expected one of {list(_STORES)}")
+
+
+def _read_files(content_hashes: Iterable[str]) -> dict[str, bytes]:
+    """Blocking, run in a thread"""
+    blobs = {}
+    for content_hash in content_hashes:
+        path = filesystem_store.find(content_hash)
+        if path:
+            blobs[content_hash] = path.read_bytes()
+    return blobs
+
+
+class AssetBlobs:
+    """
+    Contents of the assets of one response. Blobs of the filesystem store are read in a thread,
+    each content hash once however many rows share it (the same airline logo on every aircraft)
+    """
+    __slots__ = ("_files",)
+
+    def __init__(self):
+        self._files: dict[str, bytes] = {}
+
+    async def load(self, assets: Iterable[Optional[Asset]]) -> "AssetBlobs":
+        """Reads the files of assets loaded with their blob column (see with_asset_data) and not read yet"""
+        missing = {
+            asset.content_hash
+            for asset in assets
+            if asset is not None and asset.base64 is None and asset.content_hash
+               and asset.content_hash not in self._files
+        }
+        if missing:
+            self._files.update(await asyncio.to_thread(_read_files, missing))
+        return self
+
+    def get(self, asset: Asset) -> Optional[bytes]:
+        """Contents of a loaded asset: the table, else the filesystem store"""
+        if asset.base64 is not None:
+            return asset.base64
+        return self._files.get(asset.content_hash)
+
+
+async def read_asset(asset: Asset) -> Optional[bytes]:
+    """Contents of one asset loaded with its blob column"""
+    return (await AssetBlobs().load([asset])).get(asset)
+
+
+async def migrate_assets_to_filesystem(batch: int = ASSET_MIGRATION_BATCH) -> int:
+    """
+    Moves blobs from assets.base64 to the filesystem store, `batch` rows per transaction.
+    A file is written (and synced) before its row drops the blob, so an interrupted run loses nothing
+    and the next one resumes. Opt-in (ASSET_MIGRATE_BLOBS with the filesystem backend): the table copy is dropped,
+    so ASSETS_PATH must be durable. Returns the number of moved blobs
+    """
+    if ASSET_STORE_BACKEND != FilesystemBlobStore.name or not ASSET_MIGRATE_BLOBS:
+        logger.warning("Asset blob migration skipped: needs ASSET_STORE_BACKEND=filesystem and ASSET_MIGRATE_BLOBS=true")
+        return 0
+
+    session_factory = get_session_factory("powerplatform")
+    moved = 0
+    last_id = 0
+
+    try:
+        while True:
+            async with session_factory() as session:
+                stmt = (
+                    select(Asset.id, Asset.base64)
+                    .where(Asset.base64.is_not(None), Asset.id > last_id)
+                    .order_by(Asset.id)
+                    .limit(batch)
+                )
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    break
+
+                for asset_id, data in rows:
+                    blob = await asyncio.to_thread(filesystem_store.write, (data,))
+                    await session.execute(
+                        update(Asset)
+                        .where(Asset.id == asset_id)
+                        .values(base64=None, content_hash=blob.content_hash, size_bytes=blob.size)
+                    )
+                await session.commit()
+
+            moved += len(rows)
+            last_id = rows[-1].id
+    except Exception as _ex:
+        logger.error(f"Asset blob migration stopped after {moved} blobs: {_ex}")
+
+    if moved:
+        logger.info(f"Moved {moved} asset blobs to {filesystem_store.root}")
+    return moved
+
+
+__all__ = ["StoredBlob", "BlobStore", "DatabaseBlobStore", "FilesystemBlobStore", "filesystem_store",
+           "get_blob_store", "AssetBlobs", "read_asset", "migrate_assets_to_filesystem", "split_data_uri",
+           "iter_base64"]
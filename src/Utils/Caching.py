@@ -0,0 +1,573 @@
+import asyncio
+import hashlib
+import json
+import random
+import struct
+import time
+import uuid
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Optional, Iterable, Callable, Coroutine
+
+import orjson
+from pydantic import BaseModel
+from redis.asyncio import Redis
+
+from Config import (setup_logger, CACHE_KEY_VERSION, LOCAL_CACHE_MAX_ITEMS, LOCAL_CACHE_TTL, CACHE_INVALIDATION_CHANNEL,
+                    CACHE_LOCK_TTL_MS, CACHE_LOCK_POLL_MS, CACHE_TAG_TTL, CACHE_COMPRESS_MIN_BYTES,
+                    CACHE_COMPRESS_LEVEL, CACHE_DEFAULT_TTL, CACHE_STALE_TTL, CACHE_NEGATIVE_TTL, CACHE_TTL_JITTER,
+                    CACHE_MAX_VALUE_BYTES)
+
+logger = setup_logger(
+    "cache",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+_INVALIDATE_ALL = "*"
+
+# Releases the lock only if it is still held by the same owner
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+# Namespaces of keys built by build_cache_key, used to group statistics
+_namespaces: set[str] = set()
+
+
+def _normalize(value: Any) -> Any:
+    """Drops null filters. Lists and strings are kept as sent: their order and spacing may change the result"""
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, set):
+        return sorted((_normalize(v) for v in value), key=orjson.dumps)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def build_cache_key(name: str, query: Optional[BaseModel | dict] = None, version: int = CACHE_KEY_VERSION,
+                    unordered: Iterable[str] = ()) -> str:
+    """
+    Canonical cache key of a query: `{name}:v{version}.{hash}` where the hash covers every non-null filter,
+    or `{name}:v{version}.all` without filters.
+    Filters named in `unordered` are lists whose order does not matter to the query and are sorted;
+    different filters never share a key
+    """
+    _namespaces.add(name)
+
+    data = query.model_dump(mode="json") if isinstance(query, BaseModel) else (query or {})
+    data = _normalize(data)
+    for field in unordered:
+        if isinstance(data.get(field), list):
+            data[field] = sorted(data[field], key=orjson.dumps)
+    if not data:
+        return f"{name}:v{version}.all"
+
+    digest = hashlib.blake2b(orjson.dumps(data, option=orjson.OPT_SORT_KEYS), digest_size=12).hexdigest()
+    return f"{name}:v{version}.{digest}"
+
+
+def namespace_of(key: str) -> str:
+    namespace = key.rsplit(":", 1)[0]
+    if namespace in _namespaces:
+        return namespace
+    return key.split(":", 1)[0]
+
+
+class CacheStats:
+    """Per-namespace cache counters of the process: hits by tier, misses, stale hits and bytes"""
+
+    _fields = ("local_hits", "redis_hits", "misses", "stale_hits", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self._counters: dict[str, dict[str, int]] = defaultdict(lambda: dict.fromkeys(self._fields, 0))
+
+    def hit(self, key: str, tier: str, size: int = 0):
+        counters = self._counters[namespace_of(key)]
+        counters[f"{tier}_hits"] += 1
+        counters["bytes_read"] += size
+
+    def miss(self, key: str):
+        self._counters[namespace_of(key)]["misses"] += 1
+
+    def stale(self, key: str):
+        self._counters[namespace_of(key)]["stale_hits"] += 1
+
+    def written(self, key: str, size: int):
+        self._counters[namespace_of(key)]["bytes_written"] += size
+
+    def snapshot(self) -> dict[str, dict[str, int | float]]:
+        result = {}
+        for namespace, counters in sorted(self._counters.items()):
+            hits = counters["local_hits"] + counters["redis_hits"]
+            total = hits + counters["misses"]
+            result[namespace] = {**counters, "hit_ratio": round(hits / total, 4) if total else 0.0}
+        return result
+
+    def reset(self):
+        self._counters.clear()
+
+
+cache_stats = CacheStats()
+
+
+class CachedJSON:
+    """
+    Pre-serialized JSON value as it is stored in the cache.
+    Routers can pass it to success_response as is, the bytes go straight into the HTTP body.
+
+    Wire format: version (1 byte) | flags (1 byte) | items count (4 bytes) | fresh until (8 bytes, epoch seconds) |
+    orjson payload (zlib if FLAG_COMPRESSED).
+    After `fresh_until` the entry is stale: it can still be served while it is refreshed in the background.
+    FLAG_NOT_FOUND marks a negative entry: the query raised ValueError, the payload is its message
+    """
+
+    VERSION = 2
+    FLAG_COMPRESSED = 0x01
+    FLAG_NOT_FOUND = 0x02
+    _header = struct.Struct(">BBId")
+    _header_v1 = struct.Struct(">BBI")
+
+    __slots__ = ("body", "count", "fresh_until", "not_found")
+
+    def __init__(self, body: bytes, count: int, fresh_until: float = float("inf"), not_found: bool = False):
+        self.body = body
+        self.count = count
+        self.fresh_until = fresh_until
+        self.not_found = not_found
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return True
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+    @classmethod
+    def dump(cls, value: Any, fresh_for: Optional[int] = None) -> "CachedJSON":
+        count = len(value) if isinstance(value, (list, dict)) else 1
+        fresh_until = time.time() + fresh_for if fresh_for else float("inf")
+        return cls(orjson.dumps(value), count, fresh_until)
+
+    @classmethod
+    def dump_not_found(cls, exc: ValueError, fresh_for: Optional[int] = None) -> "CachedJSON":
+        entry = cls.dump(str(exc), fresh_for)
+        entry.count, entry.not_found = 0, True
+        return entry
+
+    def load(self) -> Any:
+        if self.not_found:
+            raise ValueError(orjson.loads(self.body))
+        return orjson.loads(self.body)
+
+    def encode(self) -> bytes:
+        flags, payload = self.FLAG_NOT_FOUND if self.not_found else 0, self.body
+        if len(payload) >= CACHE_COMPRESS_MIN_BYTES:
+            flags |= self.FLAG_COMPRESSED
+            payload = zlib.compress(payload, CACHE_COMPRESS_LEVEL)
+        return self._header.pack(self.VERSION, flags, self.count, self.fresh_until) + payload
+
+    @classmethod
+    def decode(cls, data: bytes | str) -> "CachedJSON":
+        # Plain JSON written before the binary format was introduced
+        if isinstance(data, str) or data[:1] in (b"[", b"{", b'"'):
+            return cls.dump(orjson.loads(data))
+
+        if data[0] == cls.VERSION:
+            _, flags, count, fresh_until = cls._header.unpack_from(data)
+            payload = data[cls._header.size:]
+        elif data[0] == 1:
+            _, flags, count = cls._header_v1.unpack_from(data)
+            fresh_until = float("inf")
+            payload = data[cls._header_v1.size:]
+        else:
+            raise ValueError(f"Unsupported cache entry version: {data[0]}")
+
+        if flags & cls.FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return cls(payload, count, fresh_until, bool(flags & cls.FLAG_NOT_FOUND))
+
+
+class CachePolicy:
+    """
+    Caching rules of a key namespace:
+    - ttl: seconds the value is fresh, extended by up to `jitter` * ttl so that keys don't expire together
+    - stale_ttl: extra seconds the value may be served stale while it is refreshed in the background
+    - negative_ttl: seconds empty results and "not found" (ValueError) answers are cached, 0 disables it
+    - max_bytes: values bigger than that are never cached
+    """
+
+    def __init__(self, ttl: int = CACHE_DEFAULT_TTL, stale_ttl: int = CACHE_STALE_TTL,
+                 negative_ttl: int = CACHE_NEGATIVE_TTL, jitter: float = CACHE_TTL_JITTER,
+                 max_bytes: int = CACHE_MAX_VALUE_BYTES):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.jitter = jitter
+        self.max_bytes = max_bytes
+
+    def __repr__(self) -> str:
+        return (f"CachePolicy(ttl={self.ttl}, stale_ttl={self.stale_ttl}, negative_ttl={self.negative_ttl}, "
+                f"jitter={self.jitter}, max_bytes={self.max_bytes})")
+
+    @property
+    def hard_ttl(self) -> int:
+        return self.ttl + self.stale_ttl
+
+    def fresh_ttl(self) -> int:
+        return self.ttl + random.randint(0, int(self.ttl * self.jitter))
+
+    def override(self, **kwargs) -> "CachePolicy":
+        values = {**vars(self), **{k: v for k, v in kwargs.items() if v is not None}}
+        return CachePolicy(**values)
+
+
+class CachePolicyRegistry:
+    """
+    Cache policies by key namespace. The most specific registered prefix of the key (by `:` segments) wins:
+    `aircraft_template:full:v1.all` -> `aircraft_template:full` -> `aircraft_template` -> default
+    """
+
+    def __init__(self, default: CachePolicy):
+        self.default = default
+        self._policies: dict[str, CachePolicy] = {}
+
+    def register(self, namespace: str, policy: CachePolicy):
+        self._policies[namespace] = policy
+
+    def get(self, key: str) -> CachePolicy:
+        parts = key.split(":")
+        for end in range(len(parts), 0, -1):
+            policy = self._policies.get(":".join(parts[:end]))
+            if policy is not None:
+                return policy
+        return self.default
+
+    def items(self):
+        return self._policies.items()
+
+
+cache_policies = CachePolicyRegistry(default=CachePolicy())
+
+# Rows of these namespaces are invalidated by database triggers (Utils/DBNotifications.py),
+# so TTLs are long. Reference data changes rarely and may stay stale for minutes
+for _namespace in ("aircraft_template", "engine_type", "engine", "template"):
+    cache_policies.register(_namespace, CachePolicy(ttl=30 * 60, stale_ttl=10 * 60, negative_ttl=30))
+cache_policies.register("fonts", CachePolicy(ttl=2, stale_ttl=10 * 60, negative_ttl=30))
+cache_policies.register("application", CachePolicy(ttl=600, stale_ttl=10 * 60, negative_ttl=30))
+cache_policies.register("file", CachePolicy(ttl=30 * 60, stale_ttl=10 * 60, negative_ttl=30))
+
+cache_policies.register("aircraft", CachePolicy(ttl=10 * 60))
+cache_policies.register("aircraft:cirium", CachePolicy(ttl=60))
+cache_policies.register("aircraft_additional", CachePolicy(ttl=60))
+cache_policies.register("airline", CachePolicy(ttl=10 * 60))
+cache_policies.register("rules", CachePolicy(ttl=60))
+cache_policies.register("users", CachePolicy(ttl=30))
+cache_policies.register("users:full:all", CachePolicy(ttl=60))
+cache_policies.register("users:light:all", CachePolicy(ttl=60))
+cache_policies.register("user_access", CachePolicy(ttl=120))
+
+# Per-user settings and file processing results must not be served stale or negatively cached
+cache_policies.register("appearance", CachePolicy(ttl=1, stale_ttl=0, negative_ttl=0, jitter=0))
+cache_policies.register("users:appearance", CachePolicy(ttl=2, stale_ttl=0, negative_ttl=0, jitter=0))
+cache_policies.register("aircraft_manual_parse", CachePolicy(ttl=60, stale_ttl=0, negative_ttl=0))
+cache_policies.register("aircraft_manual_import", CachePolicy(ttl=60, stale_ttl=0, negative_ttl=0))
+
+
+class LocalCache:
+    """
+    In-process, size-bounded LRU cache with per-entry TTL.
+    First cache tier in front of Redis, shared by every DBProxy of the process
+    """
+
+    def __init__(self, max_items: int, ttl: int):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        if self.max_items <= 0:
+            return
+
+        ttl = self.ttl if not ttl else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+local_cache = LocalCache(max_items=LOCAL_CACHE_MAX_ITEMS, ttl=LOCAL_CACHE_TTL)
+
+
+async def publish_invalidation(redis: Redis, keys: Iterable[str]):
+    """Broadcasts deleted keys to every worker, so they drop them from the local tier"""
+    keys = list(keys)
+    if not keys:
+        return
+    receivers = await redis.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys))
+    logger.debug(f"Redis PUBLISH {CACHE_INVALIDATION_CHANNEL} {keys} -> receivers={receivers}")
+
+
+# Deletes every key registered under the given tag sets, then the sets themselves. Returns deleted keys
+_INVALIDATE_TAGS_SCRIPT = """
+local deleted = {}
+for _, tag_key in ipairs(KEYS) do
+    local members = redis.call('smembers', tag_key)
+    for i = 1, #members, 1000 do
+        redis.call('del', unpack(members, i, math.min(i + 999, #members)))
+    end
+    for _, member in ipairs(members) do
+        deleted[#deleted + 1] = member
+    end
+    redis.call('del', tag_key)
+end
+return deleted
+"""
+
+
+class TagIndex:
+    """
+    Tag -> keys index stored as Redis sets (cache:tag:{tag}).
+    Cached keys are registered under tags like `aircraft`, `airline:{id}`, `template:{id}`,
+    a write invalidates whole tags in a single Lua call instead of scanning the keyspace
+    """
+
+    prefix = "cache:tag:"
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+        self._invalidate_script = redis.register_script(_INVALIDATE_TAGS_SCRIPT)
+
+    @classmethod
+    def tag_key(cls, tag: str) -> str:
+        return f"{cls.prefix}{tag}"
+
+    async def register(self, key: str, tags: Iterable[str], ttl: Optional[int] = None):
+        tags = set(tags)
+        if not tags:
+            return
+
+        ttl = max(ttl or 0, CACHE_TAG_TTL)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.sadd(self.tag_key(tag), key)
+                pipe.expire(self.tag_key(tag), ttl)
+            await pipe.execute()
+        logger.debug(f"Redis TAG {key} -> {sorted(tags)}")
+
+    async def invalidate(self, tags: Iterable[str]) -> list[str]:
+        tag_keys = [self.tag_key(tag) for tag in set(tags)]
+        if not tag_keys:
+            return []
+
+        deleted = await self._invalidate_script(keys=tag_keys)
+        logger.debug(f"Redis INVALIDATE tags {tag_keys} -> deleted={len(deleted)}")
+        return list(deleted)
+
+
+def result_tags(*static: str, items_key: Optional[str] = None, **paths: tuple[str, ...]) -> Callable[[Any], set[str]]:
+    """
+    Builds a tags factory for get_or_cache from the JSON-ready result.
+    result_tags("aircraft", airline=("airline", "airline_id")) -> {"aircraft", "airline:1", "airline:2", ...}
+    `items_key` points to the list of a wrapped result, e.g. "items" of a page
+    """
+
+    def build(data: Any) -> set[str]:
+        tags = set(static)
+        if items_key and isinstance(data, dict):
+            data = data.get(items_key) or []
+        for item in data if isinstance(data, list) else [data]:
+            for tag, path in paths.items():
+                value = item
+                for field in path:
+                    value = value.get(field) if isinstance(value, dict) else None
+                if value is not None:
+                    tags.add(f"{tag}:{value}")
+        return tags
+
+    return build
+
+
+class CacheInvalidationListener:
+    """
+    Subscribes to the invalidation channel and evicts keys from the local cache.
+    After a lost connection the local cache is cleared, because messages may have been missed
+    """
+
+    def __init__(self, redis: Redis, cache: LocalCache = local_cache, channel: str = CACHE_INVALIDATION_CHANNEL):
+        self.redis = redis
+        self.cache = cache
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        delay = 1
+        while True:
+            try:
+                async with self.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    logger.info(f"Listening for cache invalidations on '{self.channel}'")
+                    delay = 1
+                    async for message in pubsub.listen():
+                        self._handle(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as _ex:
+                logger.warning(f"Cache invalidation listener failed: {_ex}. Reconnecting in {delay}s")
+                self.cache.clear()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    def _handle(self, data: Any):
+        if not data:
+            return
+        try:
+            keys = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Malformed cache invalidation message: {data!r}")
+            return
+
+        if _INVALIDATE_ALL in keys:
+            self.cache.clear()
+        else:
+            self.cache.delete(*keys)
+        logger.debug(f"Local cache invalidated: {keys}")
+
+
+class SingleFlight:
+    """
+    Per-key coalescing of concurrent computations inside one process.
+    The first caller of a key runs the function, every concurrent caller awaits the same result (or exception)
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._waiters: dict[str, int] = {}
+        self.coalesced: int = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, func: Callable[[], Coroutine[Any, Any, Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self._waiters[key] += 1
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the computation
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.do(key, func)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self._waiters[key] = 0
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as _ex:
+            future.set_exception(_ex)
+            # Retrieve the exception so that an unobserved future doesn't log "exception was never retrieved"
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+            waiters = self._waiters.pop(key, 0)
+            if waiters:
+                logger.info(f"Single-flight {key}: coalesced {waiters} waiter(s), total={self.coalesced}")
+
+
+single_flight = SingleFlight()
+
+
+class RedisLock:
+    """
+    Short-lived cluster-wide lock (SET NX PX) used to let a single worker recompute a missing key
+    """
+
+    def __init__(self, redis: Redis, key: str, ttl_ms: int = CACHE_LOCK_TTL_MS):
+        self.redis = redis
+        self.key = f"lock:{key}"
+        self.ttl_ms = ttl_ms
+        self.token = str(uuid.uuid4())
+
+    async def acquire(self) -> bool:
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms))
+
+    async def release(self):
+        try:
+            await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, self.key, self.token)
+        except Exception as _ex:
+            logger.warning(f"Failed to release {self.key}: {_ex}")
+
+    async def wait_for(self, getter: Callable[[], Coroutine[Any, Any, Any]]) -> Optional[Any]:
+        """Polls the getter while another worker holds the lock. Returns None if the lock expired without a value"""
+        deadline = time.monotonic() + self.ttl_ms / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_MS / 1000)
+            value = await getter()
+            if value:
+                return value
+            if not await self.redis.exists(self.key):
+                return None
+        return None
+
+
+__all__ = ["build_cache_key", "namespace_of", "CacheStats", "cache_stats", "CachedJSON", "LocalCache", "local_cache",
+           "publish_invalidation", "TagIndex", "result_tags", "CacheInvalidationListener", "SingleFlight",
+           "single_flight", "RedisLock", "CachePolicy", "CachePolicyRegistry", "cache_policies"]
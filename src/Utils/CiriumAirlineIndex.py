@@ -0,0 +1,136 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import select, delete, text, func, literal, or_, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from Config import setup_logger
+from Database import CiriumLatest, CiriumParty, CiriumPartyAirline, CiriumIndexedAirline, get_session_factory
+
+logger = setup_logger(
+    "cirium_airline_index",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+_PARTIES = CiriumParty.__table__.name
+_MATCHES = CiriumPartyAirline.__table__.name
+
+
+def _unique(names: Iterable[Optional[str]]) -> list[str]:
+    return list(dict.fromkeys(name for name in names if name))
+
+
+async def _add_new_parties(session: AsyncSession, revision_id: Optional[int]) -> list[str]:
+    """Operator / Sub Lessor / Owner strings of the snapshot not seen before"""
+    result = await session.execute(
+        text(f"""
+            INSERT INTO {_PARTIES} (party, first_revision_id)
+            SELECT DISTINCT v.party, :revision_id
+            FROM {CiriumLatest.__table__.name} AS c
+            CROSS JOIN LATERAL (VALUES (c."Operator"), (c."Sub Lessor"), (c."Owner")) AS v(party)
+            WHERE v.party IS NOT NULL
+            ON CONFLICT (party) DO NOTHING
+            RETURNING party
+        """),
+        {"revision_id": revision_id}
+    )
+    return list(result.scalars())
+
+
+async def _match(session: AsyncSession, names: list[str], parties: Optional[list[str]] = None):
+    """
+    Stores the parties containing each name, like `party ILIKE '%name%'`.
+    Against all known parties (trigram index) or the given new ones
+    """
+    if not names:
+        return
+    if parties is None:
+        source = f"{_PARTIES} AS p"
+    elif parties:
+        source = "unnest(CAST(:parties AS text[])) AS p(party)"
+    else:
+        return
+
+    await session.execute(
+        text(f"""
+            INSERT INTO {_MATCHES} (party, airline_name)
+            SELECT p.party, n.name
+            FROM {source}
+            JOIN unnest(CAST(:names AS text[])) AS n(name) ON p.party ILIKE '%' || n.name || '%'
+            ON CONFLICT ON CONSTRAINT ux_cirium_party_airline DO NOTHING
+        """),
+        {"names": names, "parties": parties}
+    )
+
+
+async def index_new_parties(session: AsyncSession, revision_id: Optional[int] = None) -> int:
+    """After a snapshot swap: records its new parties and matches them with the indexed airlines"""
+    parties = await _add_new_parties(session, revision_id)
+    indexed = list((await session.execute(select(CiriumIndexedAirline.airline_name))).scalars())
+    await _match(session, indexed, parties)
+    await session.commit()
+
+    if parties:
+        logger.info(f"Indexed {len(parties)} new Cirium parties against {len(indexed)} airlines")
+    return len(parties)
+
+
+async def index_airlines(session: AsyncSession, names: Iterable[str], prune: bool = False):
+    """
+    Matches airline names not indexed yet against all parties.
+    With prune=True `names` is the complete list: other indexed airlines are removed
+    """
+    names = _unique(names)
+    indexed = set((await session.execute(select(CiriumIndexedAirline.airline_name))).scalars())
+
+    new = [name for name in names if name not in indexed]
+    if new:
+        await _match(session, new)
+        await session.execute(
+            insert(CiriumIndexedAirline)
+            .values([{"airline_name": name} for name in new])
+            .on_conflict_do_nothing(index_elements=[CiriumIndexedAirline.airline_name])
+        )
+
+    removed = indexed - set(names) if prune else set()
+    if removed:
+        await session.execute(delete(CiriumPartyAirline).where(CiriumPartyAirline.airline_name.in_(removed)))
+        await session.execute(delete(CiriumIndexedAirline).where(CiriumIndexedAirline.airline_name.in_(removed)))
+
+    await session.commit()
+    if new or removed:
+        logger.info(f"Airline index: {len(new)} airlines added, {len(removed)} removed")
+
+
+async def ensure_airlines_indexed(names: Iterable[str]):
+    """Indexes names of a request that weren't seen yet, in a session of its own"""
+    async with get_session_factory("cirium")() as session:
+        await index_airlines(session, names)
+
+
+def matched_airlines(names: list[str]):
+    """
+    (party, airline_name) pairs of the given names, with `priority`: the position of the name in `names`,
+    to keep the first matching airline per aircraft like the former CASE over the ILIKE conditions
+    """
+    return (
+        select(
+            CiriumPartyAirline.party,
+            CiriumPartyAirline.airline_name,
+            func.array_position(literal(names, ARRAY(String)), CiriumPartyAirline.airline_name).label("priority"),
+        )
+        .where(CiriumPartyAirline.airline_name.in_(names))
+        .subquery()
+    )
+
+
+def party_of(match):
+    """Join condition of CiriumLatest with matched_airlines: the party is its operator, sub lessor or owner"""
+    return or_(
+        CiriumLatest.Operator == match.c.party,
+        CiriumLatest.Sub_Lessor == match.c.party,
+        CiriumLatest.Owner == match.c.party,
+    )
+
+
+__all__ = ["index_new_parties", "index_airlines", "ensure_airlines_indexed", "matched_airlines", "party_of"]
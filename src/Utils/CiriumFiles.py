@@ -8,7 +8,10 @@ from sqlalchemy import select, insert, String, Float, Date, Boolean
 
 from Config import setup_logger
 from Database.Models import AircraftRevision, CiriumAircrafts
-from Utils import performance_timer
+from Utils import performance_timer, DBProxy
+from Utils.CiriumSnapshot import refresh_cirium_latest
+from Utils.CiriumAirlineIndex import index_new_parties
+from Utils.CiriumValuations import append_valuations
 
 logger = setup_logger("cirium_processor")
 
@@ -184,7 +187,7 @@ async def bulk_insert_df(
 
 
 @performance_timer
-async def process_cirium_file(session, file: str):
+async def process_cirium_file(session, file: str, db_proxy: DBProxy | None = None):
     file_path = Path(file)
     if not file_path.exists():
         raise FileNotFoundError(f"Excel file not found: {file}")
@@ -208,6 +211,10 @@ async def process_cirium_file(session, file: str):
 
         logger.info(f"Processed file {file_path.name}, rows: {len_rows}. Revision: {rev.revision_number}")
 
+        await append_valuations(session, rev.id)
+        await refresh_cirium_latest(session, rev.id, db_proxy=db_proxy)
+        await index_new_parties(session, rev.id)
+
     except Exception as _ex:
         logger.error(f"Processing file {file_path.name} failed: {_ex}")
     finally:
@@ -0,0 +1,98 @@
+from typing import Optional
+
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from Config import setup_logger
+from Database import CiriumAircrafts, CiriumLatest, get_session_factory
+from Utils import DBProxy
+from .CiriumAirlineIndex import index_new_parties
+
+logger = setup_logger(
+    "cirium_snapshot",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+_SOURCE = CiriumAircrafts.__table__.name
+_SNAPSHOT = CiriumLatest.__table__.name
+_BUILD = f"{_SNAPSHOT}_build"
+
+# index suffix -> columns
+_INDEXES = {
+    "serial_number": '"Serial Number"',
+    "registration": '"Registration"',
+    "operator": '"Operator"',
+    "sub_lessor": '"Sub Lessor"',
+    "owner": '"Owner"',
+    "registration_serial_number": '"Registration", "Serial Number"',
+}
+
+
+async def latest_revision_id(session: AsyncSession) -> Optional[int]:
+    return await session.scalar(select(func.max(CiriumAircrafts.revision_id)))
+
+
+async def refresh_cirium_latest(session: AsyncSession, revision_id: Optional[int] = None,
+                                db_proxy: Optional[DBProxy] = None) -> int:
+    """
+    Copies a revision (default: the latest loaded one) into a new table, indexes it and swaps it in
+    as cirium_latest in the same transaction: readers see the previous snapshot until the commit.
+    Then invalidates the responses cached under the `cirium` tag (when `db_proxy` is given).
+    Returns the number of rows
+    """
+    if revision_id is None:
+        revision_id = await latest_revision_id(session)
+    if revision_id is None:
+        return 0
+
+    # One build at a time, ingests of several files may finish together
+    await session.execute(text(f"SELECT pg_advisory_xact_lock(hashtext('{_SNAPSHOT}'))"))
+    await session.execute(text(f"DROP TABLE IF EXISTS {_BUILD}"))
+    await session.execute(text(f"CREATE TABLE {_BUILD} (LIKE {_SOURCE})"))
+    result = await session.execute(
+        text(f"INSERT INTO {_BUILD} SELECT * FROM {_SOURCE} WHERE revision_id = :revision_id"),
+        {"revision_id": revision_id}
+    )
+    await session.execute(text(f"ALTER TABLE {_BUILD} ADD PRIMARY KEY (id)"))
+    for suffix, columns in _INDEXES.items():
+        await session.execute(text(f"CREATE INDEX ix_{_BUILD}_{suffix} ON {_BUILD} ({columns})"))
+    await session.execute(text(f"ANALYZE {_BUILD}"))
+
+    await session.execute(text(f"DROP TABLE IF EXISTS {_SNAPSHOT}"))
+    await session.execute(text(f"ALTER TABLE {_BUILD} RENAME TO {_SNAPSHOT}"))
+    await session.execute(text(f"ALTER INDEX {_BUILD}_pkey RENAME TO {_SNAPSHOT}_pkey"))
+    for suffix in _INDEXES:
+        await session.execute(text(f"ALTER INDEX ix_{_BUILD}_{suffix} RENAME TO ix_{_SNAPSHOT}_{suffix}"))
+    await session.commit()
+
+    logger.info(f"{_SNAPSHOT} swapped to revision {revision_id}: {result.rowcount} rows")
+
+    if db_proxy is not None:
+        try:
+            await db_proxy.invalidate(tags=["cirium"])
+        except Exception as _ex:
+            logger.warning(f"Failed to invalidate cached cirium responses: {_ex}")
+    return result.rowcount
+
+
+async def ensure_cirium_latest(db_proxy: Optional[DBProxy] = None):
+    """Builds the snapshot when it is missing or behind the latest revision (e.g. an ingest failed before the swap)"""
+    try:
+        async with get_session_factory("cirium")() as session:
+            revision_id = await latest_revision_id(session)
+            if revision_id is None:
+                return
+
+            exists = await session.scalar(text(f"SELECT to_regclass('{_SNAPSHOT}') IS NOT NULL"))
+            if exists:
+                current = await session.scalar(select(CiriumLatest.revision_id).limit(1))
+                if current == revision_id:
+                    return
+
+            await refresh_cirium_latest(session, revision_id, db_proxy=db_proxy)
+            await index_new_parties(session, revision_id)
+    except Exception as _ex:
+        logger.error(f"Failed to refresh {_SNAPSHOT}: {_ex}")
+
+
+__all__ = ["refresh_cirium_latest", "ensure_cirium_latest", "latest_revision_id"]
@@ -0,0 +1,58 @@
+from sqlalchemy import select, exists, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from Config import setup_logger
+from Database import AircraftRevision, CiriumAircrafts, CiriumValuation, get_session_factory
+
+logger = setup_logger(
+    "cirium_valuations",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+_SOURCE = CiriumAircrafts.__table__.name
+_VALUATIONS = CiriumValuation.__table__.name
+
+
+async def append_valuations(session: AsyncSession, revision_id: int) -> int:
+    """
+    Appends the valuations of a loaded revision (no commit: ingest commits them with the snapshot swap).
+    The date of a point is the load date of the revision, like the former history over ciriumaircraft
+    """
+    result = await session.execute(
+        text(f"""
+            INSERT INTO {_VALUATIONS} (registration, serial_number, revision_id, revision_date, market_value, lease_rate)
+            SELECT "Registration", "Serial Number", revision_id, created_at::date,
+                   "Indicative Market Value (US$m)", "Indicative Market Lease Rate (US$m)"
+            FROM {_SOURCE}
+            WHERE revision_id = :revision_id AND "Registration" IS NOT NULL AND "Serial Number" IS NOT NULL
+            ON CONFLICT ON CONSTRAINT ux_cirium_valuation DO NOTHING
+        """),
+        {"revision_id": revision_id}
+    )
+    return result.rowcount
+
+
+async def backfill_valuations() -> int:
+    """Appends the revisions loaded before the valuations table (or whose append failed), one transaction each"""
+    appended = 0
+    try:
+        async with get_session_factory("cirium")() as session:
+            stmt = (
+                select(AircraftRevision.id)
+                .where(~exists().where(CiriumValuation.revision_id == AircraftRevision.id))
+                .order_by(AircraftRevision.id)
+            )
+            revision_ids = list((await session.execute(stmt)).scalars())
+
+            for revision_id in revision_ids:
+                appended += await append_valuations(session, revision_id)
+                await session.commit()
+    except Exception as _ex:
+        logger.error(f"Valuations backfill stopped after {appended} rows: {_ex}")
+
+    if appended:
+        logger.info(f"Backfilled {appended} valuations")
+    return appended
+
+
+__all__ = ["append_valuations", "backfill_valuations"]
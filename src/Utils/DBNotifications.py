@@ -0,0 +1,237 @@
+import asyncio
+import json
+from typing import Optional, Iterable, Callable
+
+import asyncpg
+from redis.asyncio import Redis
+
+from Config import setup_logger, CACHE_DB_CHANNEL, CACHE_DB_DEBOUNCE_MS
+from Database import get_db_settings
+from Database.Models import Aircraft, AircraftPolicy, AircraftTechnicalData, AircraftLesseeLessor, AircraftEngine, \
+    Airline, AircraftTemplate, Engine, Asset, Claim
+from Utils.Caching import TagIndex, local_cache, publish_invalidation
+from Utils.ReferenceCache import reference_cache, REFERENCE_TABLES
+
+logger = setup_logger(
+    "cache_db_listener",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+# Above that many changed rows the notification carries no ids and whole tags are invalidated
+MAX_NOTIFY_IDS = 500
+
+# table -> (tags invalidated on any change, tag template for a changed/deleted row id)
+TABLE_TAGS: dict[str, tuple[tuple[str, ...], Optional[str]]] = {
+    Aircraft.__table__.name: (("aircraft",), None),
+    AircraftPolicy.__table__.name: (("aircraft",), None),
+    AircraftTechnicalData.__table__.name: (("aircraft",), None),
+    AircraftLesseeLessor.__table__.name: (("aircraft",), None),
+    AircraftEngine.__table__.name: (("aircraft",), None),
+    Airline.__table__.name: (("airline",), "airline:{id}"),
+    AircraftTemplate.__table__.name: (("template",), "template:{id}"),
+    Engine.__table__.name: (("engine", "aircraft"), None),
+    Asset.__table__.name: (("asset", "airline", "template", "aircraft"), None),
+    Claim.__table__.name: (("claim",), None),
+}
+
+# Tags whose cached values embed rows of the table. Used when the changed ids are unknown
+EMBEDDING_TAGS: dict[str, tuple[str, ...]] = {
+    Airline.__table__.name: ("aircraft",),
+    AircraftTemplate.__table__.name: ("aircraft",),
+}
+
+_TRIGGER_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION cache_notify_changes() RETURNS trigger AS $$
+DECLARE
+    changed_ids bigint[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT array_agg(id) INTO changed_ids FROM (SELECT id FROM old_rows LIMIT {MAX_NOTIFY_IDS + 1}) AS changed;
+    ELSE
+        SELECT array_agg(id) INTO changed_ids FROM (SELECT id FROM new_rows LIMIT {MAX_NOTIFY_IDS + 1}) AS changed;
+    END IF;
+
+    IF changed_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+    IF array_length(changed_ids, 1) > {MAX_NOTIFY_IDS} THEN
+        changed_ids := NULL;
+    END IF;
+
+    PERFORM pg_notify(
+        '{CACHE_DB_CHANNEL}',
+        json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'ids', changed_ids)::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Transition tables allow a single event per trigger, so every table gets three statement-level triggers
+_TRIGGERS = {
+    "INSERT": "REFERENCING NEW TABLE AS new_rows",
+    "UPDATE": "REFERENCING NEW TABLE AS new_rows",
+    "DELETE": "REFERENCING OLD TABLE AS old_rows",
+}
+
+
+_INSTALLED_TRIGGERS = """
+SELECT c.relname, t.tgname FROM pg_trigger AS t
+JOIN pg_class AS c ON c.oid = t.tgrelid
+WHERE NOT t.tgisinternal AND t.tgname LIKE 'cache_notify_%' AND pg_table_is_visible(c.oid)
+"""
+
+
+def _trigger_statements(table: str, installed: set[tuple[str, str]] = frozenset()) -> list[str]:
+    """CREATE TRIGGER statements of the triggers of `table` missing from `installed` ((table, trigger) pairs)"""
+    statements = []
+    for op, referencing in _TRIGGERS.items():
+        name = f"cache_notify_{op.lower()}"
+        if (table, name) in installed:
+            continue
+        statements.append(
+            f'CREATE TRIGGER {name} AFTER {op} ON "{table}" {referencing} '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION cache_notify_changes()'
+        )
+    return statements
+
+
+def tags_for_change(table: str, op: str, ids: Optional[Iterable[int]]) -> set[str]:
+    if table not in TABLE_TAGS:
+        return set()
+
+    list_tags, id_tag = TABLE_TAGS[table]
+    if op == "INSERT" or not id_tag:
+        return set(list_tags)
+    if ids is None:
+        return {*list_tags, *EMBEDDING_TAGS.get(table, ())}
+    return {*list_tags, *(id_tag.format(id=_id) for _id in ids)}
+
+
+class DBInvalidationListener:
+    """
+    LISTENs to row changes of the powerplatform tables (statement-level triggers + pg_notify)
+    and invalidates the matching cache tags, so writes made outside DBProxy (scheduler jobs, file ingest)
+    don't stay cached until the TTL expires.
+    Notifications are debounced: bulk jobs produce one invalidation per burst.
+    Every worker drops its reference cache on a change; only the leader (`is_leader`) flushes the shared tags
+    """
+
+    def __init__(self, redis: Redis, db_name: str = "powerplatform", is_leader: Callable[[], bool] = lambda: True):
+        self.redis = redis
+        self.is_leader = is_leader
+        self.tags = TagIndex(redis)
+        self.db_name = db_name
+        self._pending: set[str] = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: set[asyncio.Task] = set()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dsn(self) -> str:
+        return get_db_settings().get_db_url(self.db_name).replace("postgresql+asyncpg://", "postgresql://")
+
+    async def install_triggers(self):
+        """Creates the notify function and the triggers missing on the tracked tables. Run by the leader"""
+        conn = None
+        try:
+            conn = await asyncpg.connect(self._dsn())
+            async with conn.transaction():
+                # Serialize with a previous leader still installing
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('cache_notify_changes'))")
+                await conn.execute(_TRIGGER_FUNCTION)
+                installed = {(row["relname"], row["tgname"]) for row in await conn.fetch(_INSTALLED_TRIGGERS)}
+                created = 0
+                for table in TABLE_TAGS:
+                    for statement in _trigger_statements(table, installed):
+                        await conn.execute(statement)
+                        created += 1
+            logger.info(f"Cache invalidation triggers checked on {len(TABLE_TAGS)} tables, {created} created")
+        except Exception as _ex:
+            logger.warning(f"Failed to install cache invalidation triggers: {_ex}")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+
+    async def _run(self):
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self._dsn())
+                closed = asyncio.Event()
+                conn.add_termination_listener(lambda _conn: closed.set())
+                await conn.add_listener(CACHE_DB_CHANNEL, self._on_notify)
+                logger.info(f"Listening for database changes on '{CACHE_DB_CHANNEL}'")
+
+                # Changes made while disconnected were missed
+                if delay > 1:
+                    reference_cache.invalidate()
+                    self._queue({tag for list_tags, _ in TABLE_TAGS.values() for tag in list_tags})
+                delay = 1
+
+                await closed.wait()
+                logger.warning("Database listener connection closed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as _ex:
+                logger.warning(f"Database listener failed: {_ex}. Reconnecting in {delay}s")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Malformed database notification: {payload!r}")
+            return
+        if change.get("table") in REFERENCE_TABLES:
+            reference_cache.invalidate()
+        self._queue(tags_for_change(change.get("table"), change.get("op"), change.get("ids")))
+
+    def _queue(self, tags: set[str]):
+        # Tags live in the shared Redis: one flush per change is enough
+        if not tags or not self.is_leader():
+            return
+        self._pending |= tags
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(CACHE_DB_DEBOUNCE_MS / 1000, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self):
+        tags, self._pending = self._pending, set()
+        if not tags:
+            return
+        try:
+            keys = await self.tags.invalidate(tags)
+            if keys:
+                local_cache.delete(*keys)
+                await publish_invalidation(self.redis, keys)
+            logger.debug(f"Database changes invalidated tags {sorted(tags)} -> {len(keys)} keys")
+        except Exception as _ex:
+            logger.warning(f"Failed to invalidate tags {sorted(tags)}: {_ex}")
+
+
+__all__ = ["DBInvalidationListener", "tags_for_change", "TABLE_TAGS"]
@@ -5,13 +5,14 @@ import pandas as pd
 from sqlalchemy import create_engine
 
 from API.DremioAPI import transfer_tables_to_dremio
-from Config import setup_logger, DBSettings
+from Config import setup_logger
+from Database import get_db_settings
 
 logger = setup_logger(name="excel_processor")
 
 async def process_excel_file(session, excel_file: str):
     global xls, sync_engine
-    db_settings = DBSettings()
+    db_settings = get_db_settings()
     tables = []
     try:
         xls = pd.ExcelFile(excel_file)
@@ -0,0 +1,157 @@
+import heapq
+import re
+from collections import Counter
+from typing import Any, Iterable, Optional
+
+from Config import FUZZY_AIRLINE_THRESHOLD, FUZZY_ENGINE_THRESHOLD
+from .ReferenceCache import References, AirlineRef, EngineRef, get_references
+
+# pg_trgm words: runs of letters and digits
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: Optional[str]) -> frozenset[str]:
+    """Trigram set of pg_trgm (show_trgm): lower-cased words padded with two spaces in front and one behind"""
+    if not text:
+        return frozenset()
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    """pg_trgm similarity(): shared trigrams / trigrams of both"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    shared = len(grams_a & grams_b)
+    return shared / (len(grams_a) + len(grams_b) - shared)
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over (text, item) entries. Only the entries sharing a trigram with the query are scored,
+    with the similarity() formula, so scores and `%` thresholds agree with pg_trgm.
+    Equal scores rank by insertion order
+    """
+    __slots__ = ("items", "_sizes", "_postings")
+
+    def __init__(self, entries: Iterable[tuple[Optional[str], Any]]):
+        self.items: list[Any] = []
+        self._sizes: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+
+        for text, item in entries:
+            position = len(self.items)
+            grams = trigrams(text)
+            self.items.append(item)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def scores(self, query: Optional[str], threshold: float) -> dict[int, float]:
+        """position -> similarity of the entries at or above the threshold (`text % query`)"""
+        grams = trigrams(query)
+        if not grams:
+            return {}
+
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+
+        scores = {}
+        for position, count in shared.items():
+            score = count / (len(grams) + self._sizes[position] - count)
+            if score >= threshold:
+                scores[position] = score
+        return scores
+
+    def search(self, query: Optional[str], k: int = 1, threshold: float = 0.3) -> list[tuple[Any, float]]:
+        """Top-k (item, score), best first"""
+        best = heapq.nsmallest(k, self.scores(query, threshold).items(), key=lambda entry: (-entry[1], entry[0]))
+        return [(self.items[position], score) for position, score in best]
+
+    def search_many(self, queries: Iterable[Optional[str]], k: int = 1,
+                    threshold: float = 0.3) -> dict[str, list[tuple[Any, float]]]:
+        """search() of every distinct query"""
+        return {query: self.search(query, k, threshold) for query in set(queries) if query}
+
+
+class ReferenceMatcher:
+    """Fuzzy lookups over one References version: airline names, engine manufacturer + model"""
+    __slots__ = ("references", "airlines", "engine_manufacturers", "engine_models")
+
+    def __init__(self, references: References):
+        self.references = references
+
+        airlines = sorted(references.airlines_by_id.values(), key=lambda airline: airline.id)
+        self.airlines = TrigramIndex((airline.airline_name, airline) for airline in airlines)
+
+        engines = sorted(references.engines_by_id.values(), key=lambda engine: engine.id)
+        self.engine_manufacturers = TrigramIndex((engine.engine_manufacture, engine) for engine in engines)
+        self.engine_models = TrigramIndex((engine.engine_model, engine) for engine in engines)
+
+    def airline(self, name: Optional[str], threshold: float = FUZZY_AIRLINE_THRESHOLD) -> Optional[AirlineRef]:
+        """`airline_name % name ORDER BY similarity DESC LIMIT 1`"""
+        best = self.airlines.search(name, 1, threshold)
+        return best[0][0] if best else None
+
+    def airline_many(self, names: Iterable[Optional[str]],
+                     threshold: float = FUZZY_AIRLINE_THRESHOLD) -> dict[str, AirlineRef]:
+        return {name: best[0][0] for name, best in self.airlines.search_many(names, 1, threshold).items() if best}
+
+    def engine(self, manufacturer: Optional[str], model: Optional[str],
+               threshold: float = FUZZY_ENGINE_THRESHOLD) -> Optional[EngineRef]:
+        """Both strings must match (`%`), ranked by the sum of both similarities"""
+        models = self.engine_models.scores(model, threshold)
+        if not models:
+            return None
+        manufacturers = self.engine_manufacturers.scores(manufacturer, threshold)
+
+        candidates = [(models[position] + manufacturers[position], position)
+                      for position in models.keys() & manufacturers.keys()]
+        if not candidates:
+            return None
+        _, position = min(candidates, key=lambda candidate: (-candidate[0], candidate[1]))
+        return self.engine_models.items[position]
+
+    def engine_many(self, pairs: Iterable[tuple[Optional[str], Optional[str]]],
+                    threshold: float = FUZZY_ENGINE_THRESHOLD) -> dict[tuple[str, str], EngineRef]:
+        matches = {}
+        for manufacturer, model in set(pairs):
+            engine = self.engine(manufacturer, model, threshold)
+            if engine:
+                matches[(manufacturer, model)] = engine
+        return matches
+
+    def resolve_airline(self, name: Optional[str]) -> Optional[AirlineRef]:
+        """Exact name, else the best fuzzy match"""
+        if not name:
+            return None
+        return self.references.airlines_by_name.get(name) or self.airline(name)
+
+    def resolve_engine(self, manufacturer: Optional[str], model: Optional[str]) -> Optional[EngineRef]:
+        """Exact model, else the best fuzzy match of manufacturer + model"""
+        if not model:
+            return None
+        return self.references.engines_by_model.get(model) or self.engine(manufacturer, model)
+
+
+_matcher: Optional[ReferenceMatcher] = None
+
+
+async def get_reference_matcher() -> ReferenceMatcher:
+    """Matcher of the current references, rebuilt when the reference cache loads a new version"""
+    global _matcher
+    references = await get_references()
+    if _matcher is None or _matcher.references is not references:
+        _matcher = ReferenceMatcher(references)
+    return _matcher
+
+
+__all__ = ["trigrams", "similarity", "TrigramIndex", "ReferenceMatcher", "get_reference_matcher"]
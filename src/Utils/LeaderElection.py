@@ -0,0 +1,121 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Callable, Coroutine, Any, Optional
+
+from redis.asyncio import Redis
+
+from Config import setup_logger, LEADER_LEASE_KEY, LEADER_LEASE_TTL_MS
+
+logger = setup_logger(
+    "leader_election",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+# Extends the lease only while it is still held by this process
+_RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """
+    Redis lease (SET NX PX + renewal) electing the single process that owns the background work
+    (scheduler, file watchers, Graph subscription renewal).
+
+    Every worker runs the loop; the leader renews the lease every `ttl / 3`.
+    When the leader dies its lease expires and another worker takes over within `ttl`.
+    A leader that can't renew (lease taken over, Redis unreachable until the lease would have expired)
+    steps down before another worker can be elected
+    """
+
+    def __init__(self, redis: Redis,
+                 on_elected: Callable[[], Coroutine[Any, Any, None]],
+                 on_demoted: Callable[[], Coroutine[Any, Any, None]],
+                 key: str = LEADER_LEASE_KEY, ttl_ms: int = LEADER_LEASE_TTL_MS):
+        self.redis = redis
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.key = key
+        self.ttl_ms = ttl_ms
+        self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._valid_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+            try:
+                await self.redis.eval(_RELEASE_LEASE_SCRIPT, 1, self.key, self.identity)
+            except Exception as _ex:
+                logger.warning(f"Failed to release leader lease: {_ex}")
+
+    async def _try_lease(self) -> bool:
+        started = time.monotonic()
+        if self.is_leader:
+            held = bool(await self.redis.eval(_RENEW_LEASE_SCRIPT, 1, self.key, self.identity, self.ttl_ms))
+        else:
+            held = bool(await self.redis.set(self.key, self.identity, nx=True, px=self.ttl_ms))
+        if held:
+            self._valid_until = started + self.ttl_ms / 1000
+        return held
+
+    async def _run(self):
+        interval = self.ttl_ms / 3000
+        while True:
+            try:
+                held = await self._try_lease()
+            except asyncio.CancelledError:
+                raise
+            except Exception as _ex:
+                logger.warning(f"Leader lease check failed: {_ex}")
+                # Keep the role while the last lease is still valid
+                held = self.is_leader and time.monotonic() < self._valid_until - interval
+
+            if held and not self.is_leader:
+                self.is_leader = True
+                logger.info(f"{self.identity} elected leader, starting background work")
+                try:
+                    await self.on_elected()
+                except Exception as _ex:
+                    logger.error(f"Failed to start background work: {_ex}")
+            elif not held and self.is_leader:
+                logger.warning(f"{self.identity} lost the leader lease, stopping background work")
+                await self._demote()
+
+            await asyncio.sleep(interval)
+
+    async def _demote(self):
+        self.is_leader = False
+        try:
+            await self.on_demoted()
+        except Exception as _ex:
+            logger.error(f"Failed to stop background work: {_ex}")
+
+
+__all__ = ["LeaderElection"]
@@ -6,10 +6,12 @@ import sys
 from base64 import b64encode
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import List, Any, Iterable
+from typing import List, Any, Iterable, Optional
 
+from Config import API_ROOT_URL
 from Database import Asset
 from Schemas import AssetSchema
+from .BlobStore import AssetBlobs
 
 
 def cache_key_first_non_null(name: str, data: dict[str, Any], keys: Iterable[str], fallback: str = "all") -> Any:
@@ -28,7 +30,21 @@ def str_to_list(text: str | List[str]) -> List[str]:
     return sorted(text)
 
 
-def map_asset(asset: Asset) -> AssetSchema:
+def asset_url(content_hash: str) -> str:
+    return f"{API_ROOT_URL}/powerplatform/assets/{content_hash}"
+
+
+def with_asset_data(loader, inline: bool):
+    """Adds the (deferred) asset blob to a loader option ending at an Asset relationship when it is inlined"""
+    return loader.undefer(Asset.base64) if inline else loader
+
+
+def map_asset(asset: Asset, inline: bool = False, blobs: Optional[AssetBlobs] = None) -> AssetSchema:
+    """
+    Asset reference: hash + URL of the content-addressed endpoint.
+    With inline=True file_data also carries the base64 data URI: the blob must be loaded (see with_asset_data)
+    and, for the filesystem store, read by `blobs` (AssetBlobs.load) beforehand
+    """
     if not asset:
         return AssetSchema(
         file_name=None,
@@ -37,14 +53,19 @@ def map_asset(asset: Asset) -> AssetSchema:
         file_id=None
     )
 
-    encoded = b64encode(asset.base64).decode()
-    data_uri = f"data:{asset.mime_type};base64,{encoded}"
+    data_uri = None
+    if inline:
+        data = blobs.get(asset) if blobs is not None else asset.base64
+        if data is not None:
+            data_uri = f"data:{asset.mime_type};base64,{b64encode(data).decode()}"
 
     return AssetSchema(
         file_name=asset.asset_name,
         file_description=asset.asset_description,
         file_data=data_uri,
-        file_id=asset.id
+        file_id=asset.id,
+        file_hash=asset.content_hash,
+        file_url=asset_url(asset.content_hash) if asset.content_hash else None
     )
 
 
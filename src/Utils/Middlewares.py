@@ -1,24 +1,30 @@
 import asyncio
 import functools
 import inspect
-import json
 import time
 import uuid
 from functools import wraps
-from typing import Any, Callable, Optional, Coroutine
+from typing import Any, Callable, Optional, Coroutine, Iterable
 
 from fastapi import Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Scope, Receive, Send, Message
 
-from Config import setup_logger, DBSettings, ENABLE_PERFORMANCE_LOGGER
-from Database import DatabaseClient
+from Config import setup_logger, ENABLE_PERFORMANCE_LOGGER, CACHE_LOCK_ENABLED, SERVER_TIMING_HEADER, LEADER_ELECTION
+from Database import DatabaseClient, get_session_factory, get_db_settings
+from Database.SchemaPatches import apply_schema_patches
 from Schemas import DefaultResponse, DetailField
 from Schemas.Enums.service import FilesExtensionEnum
+from Utils.Caching import (local_cache, publish_invalidation, CacheInvalidationListener, single_flight, RedisLock,
+                           TagIndex, CachedJSON, cache_stats, CachePolicy, cache_policies)
 from Utils.FilesFinder import Finder
+from Utils.LeaderElection import LeaderElection
+from Utils.Timing import TimedRedis, start_request_timings, stop_request_timings, current_timings
 
 logger = setup_logger(
     'fastapi_app',
@@ -30,39 +36,45 @@ perf_dec_logger = setup_logger(
     log_format="%(levelname)s:     [%(name)s] %(asctime)s | %(message)s"
 )
 
-engine_cache = {}
-session_cache = {}
+# Strong references to background refresh tasks, so they are not garbage collected mid-flight
+_background_tasks: set[asyncio.Task] = set()
+
+# Static tags or a callable building them from the JSON-ready result
+CacheTags = Optional[Iterable[str] | Callable[[Any], Iterable[str]]]
 
 
 class DBProxy:
     """
-    DBProxy wraps the database and Redis interface:
-    - get_or_cache: retrieves an object from Redis, or if not, from the database, and stores it in Redis
-    - update_and_cache: updates the object in the database and directly in Redis
+    DBProxy wraps the database and a two-tier cache (in-process LRU -> Redis):
+    - get_or_cache: retrieves an object from the local cache, then Redis, or if not, from the database, and stores it in both.
+      Concurrent misses of the same key are coalesced into a single database query per process (and per cluster via a Redis lock)
+      Cached keys are registered under tags (`aircraft`, `airline:{id}`, `template:{id}`, ...)
+    - update_and_cache: updates the object in the database and directly in Redis, invalidating the given tags
+    - invalidate: deletes keys and tags from Redis and notifies every worker to drop them from the local cache
+
+    Values are cached as CachedJSON (orjson bytes, zlib-compressed in Redis when large).
+    get_or_cache(raw=True) returns them without decoding, so they can be written straight into the response body
+
+    Stale-while-revalidate: an entry is fresh for `ttl` seconds and kept in Redis for `ttl + stale_ttl`.
+    A stale entry is returned immediately while a single background task refreshes it
+
+    TTLs, negative caching of empty/not found results and size limits come from the namespace policy
+    in `cache_policies`; explicit `ttl`/`stale_ttl` arguments override it
     """
 
-    def __init__(self, redis: Redis):
+    def __init__(self, redis: Redis, cache_redis: Optional[Redis] = None):
         self._open_sessions = []
-        self.db_settings = DBSettings()
         self.redis = redis
+        # Binary client (decode_responses=False) for cached values
+        self.cache_redis = cache_redis or redis
+        self.tags = TagIndex(redis)
 
-    async def get_db(self, db_name: str):
-        if db_name not in session_cache:
-            url = self.db_settings.get_db_url(db_name)
-            engine = create_async_engine(url,
-                                         future=True,
-                                         echo=False,
-                                         pool_pre_ping=True,
-                                         pool_recycle=300,
-                                         pool_size=10,
-                                         max_overflow=20,
-                                         )
-            engine_cache[db_name] = engine
-            session_cache[db_name] = async_sessionmaker(
-                bind=engine, class_=AsyncSession, expire_on_commit=False
-            )
+    @staticmethod
+    def _session_factory(db_name: str) -> async_sessionmaker[AsyncSession]:
+        return get_session_factory(db_name)
 
-        session = session_cache[db_name]()
+    async def get_db(self, db_name: str):
+        session = self._session_factory(db_name)()
         self._open_sessions.append(session)
         return session
 
@@ -71,42 +83,27 @@ class DBProxy:
             await session.close()
         self._open_sessions.clear()
 
-    # @asynccontextmanager
-    # async def get_db(self, db_name: str):
-    #     if db_name not in session_cache:
-    #         url = self.db_settings.get_db_url(db_name)
-    #         engine = create_async_engine(
-    #             url,
-    #             pool_pre_ping=True,
-    #             pool_recycle=300,
-    #             pool_size=10,
-    #             max_overflow=20,
-    #         )
-    #         engine_cache[db_name] = engine
-    #         session_cache[db_name] = async_sessionmaker(
-    #             bind=engine,
-    #             class_=AsyncSession,
-    #             expire_on_commit=False
-    #         )
-    #
-    #     async with session_cache[db_name]() as session:
-    #         yield session
-
     # -----------------------------
     # Redis utils
     # -----------------------------
     async def redis_set(self, key: str, value: Any, ttl: Optional[int] = None):
-        data = json.dumps(value)
+        entry = value if isinstance(value, CachedJSON) else CachedJSON.dump(value)
+        data = entry.encode()
         if ttl:
-            await self.redis.setex(key, ttl, data)
+            await self.cache_redis.setex(key, ttl, data)
         else:
-            await self.redis.set(key, data)
-        logger.debug(f"Redis SET {key} -> {value}")
+            await self.cache_redis.set(key, data)
+        cache_stats.written(key, len(data))
+        logger.debug(f"Redis SET {key} -> {len(data)} bytes")
+
+    async def redis_get_raw(self, key: str) -> Optional[CachedJSON]:
+        data = await self.cache_redis.get(key)
+        logger.debug(f"Redis GET {key} -> {len(data) if data else 0} bytes")
+        return CachedJSON.decode(data) if data else None
 
     async def redis_get(self, key: str) -> Optional[Any]:
-        data = await self.redis.get(key)
-        logger.debug(f"Redis GET {key} -> {data}")
-        return json.loads(data) if data else None
+        entry = await self.redis_get_raw(key)
+        return entry.load() if entry else None
 
     async def redis_delete(self, key: str):
         deleted = await self.redis.delete(key)
@@ -116,49 +113,176 @@ class DBProxy:
         await self.redis.expire(key, ttl)
         logger.debug(f"Redis EXPIRE {key} -> {ttl}s")
 
+    async def invalidate(self, *keys: str, tags: Optional[Iterable[str]] = None):
+        keys = list(keys)
+        if keys:
+            deleted = await self.redis.delete(*keys)
+            logger.debug(f"Redis DEL {keys} -> deleted={deleted}")
+        if tags:
+            keys.extend(await self.tags.invalidate(tags))
+        if not keys:
+            return
+
+        local_cache.delete(*keys)
+        await publish_invalidation(self.redis, keys)
+
     # -----------------------------
     # DB + Cache logic
     # -----------------------------
     async def get_or_cache(self, key: str, db_name: str, query_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
-                           ttl: int = 60) -> Optional[Any]:
+                           ttl: Optional[int] = None, tags: CacheTags = None, raw: bool = False,
+                           stale_ttl: Optional[int] = None) -> Optional[Any]:
+        policy = cache_policies.get(key).override(ttl=ttl, stale_ttl=stale_ttl)
+
+        cached = local_cache.get(key)
+        if cached is not None:
+            cache_stats.hit(key, "local", len(cached.body))
+            logger.debug(f"{key} returned from local cache")
+        else:
+            cached = await self.redis_get_raw(key)
+            if cached is not None:
+                cache_stats.hit(key, "redis", len(cached.body))
+                local_cache.set(key, cached, policy.hard_ttl)
+                logger.debug(f"{key} returned from cache")
+            else:
+                cache_stats.miss(key)
+                cached = await single_flight.do(
+                    key, lambda: self._load_and_cache(key, db_name, query_func, policy, tags)
+                )
+
+        if isinstance(cached, CachedJSON):
+            if cached.is_stale:
+                cache_stats.stale(key)
+                self._schedule_refresh(key, db_name, query_func, policy, tags)
+            if not raw or cached.not_found:
+                return cached.load()
+        return cached
+
+    async def _get_fresh(self, key: str) -> Optional[CachedJSON]:
+        cached = await self.redis_get_raw(key)
+        return cached if cached is not None and not cached.is_stale else None
+
+    async def _load_and_cache(self, key: str, db_name: str,
+                              query_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
+                              policy: CachePolicy, tags: CacheTags = None) -> Optional[Any]:
+        lock = None
+        if CACHE_LOCK_ENABLED:
+            lock = RedisLock(self.redis, key)
+            if await lock.acquire():
+                # Another worker could have filled the key right before we took the lock
+                cached = await self._get_fresh(key)
+                if cached:
+                    await lock.release()
+                    local_cache.set(key, cached, policy.hard_ttl)
+                    return cached
+            else:
+                cached = await lock.wait_for(lambda: self._get_fresh(key))
+                if cached:
+                    local_cache.set(key, cached, policy.hard_ttl)
+                    logger.debug(f"{key} returned from cache after waiting for lock")
+                    return cached
+                lock = None
 
-        cached = await self.redis_get(key)
-        if cached:
-            logger.debug(f"{key} returned from cache")
-            return cached
+        try:
+            session = await self.get_db(db_name)
+            return await self._query_and_cache(session, key, query_func, policy, tags)
+        finally:
+            if lock:
+                await lock.release()
+
+    def _schedule_refresh(self, key: str, db_name: str,
+                          query_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
+                          policy: CachePolicy, tags: CacheTags):
+        refresh_key = f"{key}#refresh"
+        if key in single_flight or refresh_key in single_flight:
+            return
+
+        task = asyncio.create_task(
+            single_flight.do(refresh_key, lambda: self._refresh(key, db_name, query_func, policy, tags))
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    async def _refresh(self, key: str, db_name: str,
+                       query_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
+                       policy: CachePolicy, tags: CacheTags) -> Optional[Any]:
+        """Background revalidation of a stale key. Uses its own session, the request's ones are closed with it"""
+        lock = RedisLock(self.redis, key) if CACHE_LOCK_ENABLED else None
+        if lock and not await lock.acquire():
+            # Another worker refreshes the key: pick up its value if it is already there
+            fresh = await self._get_fresh(key)
+            if fresh:
+                local_cache.set(key, fresh, policy.hard_ttl)
+            logger.debug(f"{key} is already being refreshed by another worker")
+            return fresh
 
-        session = await self.get_db(db_name)
-        result = await query_func(session)
-        if result:
-            if isinstance(result, BaseModel):
-                _result = result.model_dump(mode="json")
-            elif isinstance(result, list):
-                _result = [
-                    item.model_dump(mode="json") if isinstance(item, BaseModel) else item
-                    for item in result
-                ]
-            else:
-                _result = result
-            await self.redis_set(key, _result, ttl)
-            logger.debug(f"{key} returned from database")
+        try:
+            async with self._session_factory(db_name)() as session:
+                result = await self._query_and_cache(session, key, query_func, policy, tags)
+            logger.debug(f"{key} refreshed in background")
+            return result
+        except ValueError:
+            # Not found anymore: already stored as a negative entry
+            return None
+        except Exception as _ex:
+            logger.warning(f"Background refresh of {key} failed: {_ex}")
+        finally:
+            if lock:
+                await lock.release()
 
-        return result
+    async def _query_and_cache(self, session: AsyncSession, key: str,
+                               query_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
+                               policy: CachePolicy, tags: CacheTags = None) -> Optional[Any]:
+        try:
+            result = await query_func(session)
+        except ValueError as _ex:
+            if policy.negative_ttl:
+                await self._store(key, CachedJSON.dump_not_found(_ex, fresh_for=policy.negative_ttl),
+                                  policy.negative_ttl, tags, [])
+            raise
+
+        if not result:
+            if policy.negative_ttl and result is not None:
+                await self._store(key, CachedJSON.dump(result, fresh_for=policy.negative_ttl),
+                                  policy.negative_ttl, tags, result)
+            return result
+
+        if isinstance(result, BaseModel):
+            _result = result.model_dump(mode="json")
+        elif isinstance(result, list):
+            _result = [
+                item.model_dump(mode="json") if isinstance(item, BaseModel) else item
+                for item in result
+            ]
+        else:
+            _result = result
+
+        ttl = policy.fresh_ttl()
+        entry = CachedJSON.dump(_result, fresh_for=ttl)
+        if len(entry.body) > policy.max_bytes:
+            logger.warning(f"{key} is not cached: {len(entry.body)} bytes exceed the limit of {policy.max_bytes}")
+            return entry
+
+        await self._store(key, entry, ttl + policy.stale_ttl, tags, _result)
+        logger.debug(f"{key} returned from database")
+        return entry
+
+    async def _store(self, key: str, entry: CachedJSON, ttl: int, tags: CacheTags = None, data: Any = None):
+        await self.redis_set(key, entry, ttl)
+        if tags:
+            # Negative entries get the static part of callable tags (built from an empty result)
+            await self.tags.register(key, tags(data) if callable(tags) else tags, ttl)
+        local_cache.set(key, entry, ttl)
 
     async def update_and_cache(self, key: str, db_name: str,
                                update_func: Callable[[AsyncSession], Coroutine[Any, Any, Any]],
-                               ttl: int = 60, related_pattern: Optional[str] = None) -> Any:
+                               ttl: Optional[int] = None, tags: Optional[Iterable[str]] = None) -> Any:
 
         session = await self.get_db(db_name)
         result = await update_func(session)
         await session.commit()
 
-        await self.redis_delete(key)
-        logger.debug(f"Redis DEL {key} (main key)")
-
-        if related_pattern:
-            async for rk in self.redis.scan_iter(match=related_pattern):
-                await self.redis_delete(rk)
-                logger.debug(f"Redis DEL {rk} (related key via pattern {related_pattern})")
+        await self.invalidate(key, tags=tags)
 
         if result:
             if isinstance(result, BaseModel):
@@ -170,7 +294,7 @@ class DBProxy:
                 ]
             else:
                 _result = result
-            await self.redis_set(key, _result, ttl)
+            await self.redis_set(key, _result, ttl or cache_policies.get(key).fresh_ttl())
             logger.debug(f"{key} updated in database and cache")
 
         return result
@@ -179,14 +303,15 @@ class DBProxy:
 # -----------------------------
 # Decorator for simplification
 # -----------------------------
-def cache_query(key_template: str, ttl: int = 60, update: bool = False, related_pattern: Optional[str] = None):
+def cache_query(key_template: str, ttl: Optional[int] = None, update: bool = False,
+                tags: Optional[Iterable[str]] = None, stale_ttl: Optional[int] = None):
     """
     Wrapper for methods in endpoints:
-    - If update=False → get_or_cache
-    - If update=True → update_and_cache
+    - If update=False → get_or_cache, the key is registered under tags and may be served stale for `stale_ttl`
+    - If update=True → update_and_cache, tags are invalidated
 
     Example:
-    @cache_query("registration:{reg}", ttl=120)
+    @cache_query("registration:{reg}", ttl=120, tags=("aircraft", "airline:{airline_id}"))
     async def get_registration(session, reg): ...
     """
 
@@ -201,115 +326,224 @@ def cache_query(key_template: str, ttl: int = 60, update: bool = False, related_
             db: DBProxy = request.app.state.db_proxy
             db_name = kwargs.get("db_name")
 
-            _related_pattern = related_pattern.format(**kwargs) if related_pattern else None
+            _tags = [tag.format(**kwargs) for tag in tags] if tags else None
 
             if update:
                 return await db.update_and_cache(key, db_name, lambda session: func(session, *args, **kwargs), ttl,
-                                                 related_pattern=_related_pattern)
+                                                 tags=_tags)
             else:
-                return await db.get_or_cache(key, db_name, lambda session: func(session, *args, **kwargs), ttl)
+                return await db.get_or_cache(key, db_name, lambda session: func(session, *args, **kwargs), ttl,
+                                             tags=_tags, stale_ttl=stale_ttl)
 
         return wrapper
 
     return decorator
 
 
+class _RequestState(dict):
+    """
+    Backing dict of `request.state`. `db_proxy` is created on first access,
+    so requests that never touch the database or the cache don't allocate one
+    """
+    __slots__ = ("_factories",)
+
+    def __init__(self, initial: Optional[dict], factories: dict[str, Callable[[], Any]]):
+        super().__init__(initial or ())
+        self._factories = factories
+
+    def __missing__(self, key: str) -> Any:
+        factory = self._factories.get(key)
+        if factory is None:
+            raise KeyError(key)
+        value = self[key] = factory()
+        return value
+
+
+class RequestContextMiddleware:
+    """
+    Pure ASGI middleware: correlation id, request timings (access log + Server-Timing) and DBProxy session lifecycle.
+    Replaces two BaseHTTPMiddleware layers, which added a task and a response stream per request
+    """
+
+    def __init__(self, app: ASGIApp, fastapi_app):
+        self.app = app
+        self.state = fastapi_app.state
+        self._factories = {"db_proxy": self._db_proxy}
+
+    def _db_proxy(self) -> DBProxy:
+        return DBProxy(self.state.redis, self.state.cache_redis)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings_token = start_request_timings()
+        timings = current_timings()
+        correlation_id = str(uuid.uuid4())
+        state = _RequestState(scope.get("state"), self._factories)
+        state["correlation_id"] = correlation_id
+        state["redis"] = getattr(self.state, "redis", None)
+        scope["state"] = state
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Correlation-ID", correlation_id)
+                if SERVER_TIMING_HEADER:
+                    headers.append("Server-Timing", timings.server_timing(time.perf_counter()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            now = time.perf_counter()
+            logger.info(
+                f"{scope['method']} {scope['path']} completed_in={now - timings.started:.2f}s | "
+                f"status_code={status_code} | "
+                f"{timings.log_fields(now)} | "
+                f"correlation_id={correlation_id}"
+            )
+            db_proxy = state.get("db_proxy")
+            if db_proxy is not None:
+                await db_proxy.close_all()
+            stop_request_timings(timings_token)
+
+
+async def _start_background_work(app):
+    """Scheduler, file watchers and Graph subscription renewal. Run by a single process (the leader)"""
+    try:
+        from .CSVFiles import process_csv_file
+        from .JSONFiles import process_json_file
+        from .EXCELFiles import process_excel_file
+        from .CiriumFiles import process_cirium_file
+        from Scheduler import Scheduler
+        from Scheduler.jobs import jobs, update_subscription_job
+        from Config import FILES_PATH, EXCEL_FILES_PATH, CIRIUM_FILES_PATH, ASSET_STORE_BACKEND, ASSET_MIGRATE_BLOBS, \
+            CACHE_DB_INSTALL_TRIGGERS
+        from .BlobStore import migrate_assets_to_filesystem
+        from .CiriumSnapshot import ensure_cirium_latest
+        from .CiriumValuations import backfill_valuations
+        from .ReconcileQueue import reconcile_queue
+
+        app.state.scheduler = Scheduler(jobs=jobs)
+        app.state.scheduler.start()
+
+        finder = Finder()
+        tasks = app.state.background_tasks
+
+        tasks.append(asyncio.create_task(finder.start_loop(  # JSON PROCESSOR
+            db_client=app.state.db_client,
+            func=process_json_file,
+            path=FILES_PATH,
+            extension=FilesExtensionEnum.JSON,
+            db="service"
+        )))
+        tasks.append(asyncio.create_task(finder.start_loop(  # CSV PROCESSOR
+            db_client=app.state.db_client,
+            func=process_csv_file,
+            path=FILES_PATH,
+            extension=FilesExtensionEnum.CSV,
+            db="main"
+        )))
+
+        tasks.append(asyncio.create_task(finder.start_loop(  # EXCEL PROCESSOR
+            db_client=app.state.db_client,
+            func=process_excel_file,
+            path=EXCEL_FILES_PATH,
+            extension=FilesExtensionEnum.EXCEL,
+            db="main"
+        )))
+
+        tasks.append(asyncio.create_task(finder.start_loop(  # EXCEL CIRIUM PROCESSOR
+            db_client=app.state.db_client,
+            func=process_cirium_file,
+            path=CIRIUM_FILES_PATH,
+            extension=FilesExtensionEnum.CIRIUM,
+            db="cirium",
+            db_proxy=app.state.db_proxy
+        )))
+
+        tasks.append(asyncio.create_task(update_subscription_job(
+            db_proxy=app.state.db_proxy,
+            change_type="created",
+            resource="users",
+        )))
+
+        if CACHE_DB_INSTALL_TRIGGERS:  # CACHE INVALIDATION TRIGGERS
+            tasks.append(asyncio.create_task(app.state.db_listener.install_triggers()))
+        tasks.append(asyncio.create_task(ensure_cirium_latest(db_proxy=app.state.db_proxy)))  # CIRIUM LATEST SNAPSHOT
+        tasks.append(asyncio.create_task(backfill_valuations()))  # CIRIUM VALUATION HISTORY
+        tasks.append(asyncio.create_task(reconcile_queue.run()))  # AIRCRAFT MANUAL -> AIRCRAFT
+
+        if ASSET_STORE_BACKEND == "filesystem" and ASSET_MIGRATE_BLOBS:  # ASSET BLOBS -> BLOB STORE (opt-in)
+            tasks.append(asyncio.create_task(migrate_assets_to_filesystem()))
+
+    except Exception as _ex:
+        logger.warning(f"Error starting background tasks: {_ex}")
+
+
+def _is_leader(app) -> bool:
+    leader = getattr(app.state, "leader", None)
+    if leader is None:
+        # Without election every process runs the background work
+        return not LEADER_ELECTION
+    return leader.is_leader
+
+
+async def _stop_background_work(app):
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None and scheduler.started:
+        scheduler.stop()
+    app.state.scheduler = None
+
+    tasks, app.state.background_tasks = app.state.background_tasks, []
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 def register_middlewares(app):
     @app.on_event("startup")
     async def startup_event():
-        username, password, host, port = DBSettings().get_reddis_credentials()
+        username, password, host, port = get_db_settings().get_reddis_credentials()
         logger.info("Startup initiated...")
-        app.state.redis = Redis(username=username, password=password, host=host, port=port, decode_responses=True)
+        app.state.redis = TimedRedis(username=username, password=password, host=host, port=port,
+                                     decode_responses=True)
+        app.state.cache_redis = TimedRedis(username=username, password=password, host=host, port=port)
         app.state.db_client = DatabaseClient()
-        app.state.db_proxy = DBProxy(app.state.redis)
+        app.state.db_proxy = DBProxy(app.state.redis, app.state.cache_redis)
+        await apply_schema_patches()
+        app.state.cache_listener = CacheInvalidationListener(app.state.redis)
+        app.state.cache_listener.start()
+        from Utils.DBNotifications import DBInvalidationListener
+        app.state.db_listener = DBInvalidationListener(app.state.redis, is_leader=lambda: _is_leader(app))
+        app.state.db_listener.start()
         logger.info("Redis and DatabaseClient initialized")
 
+        from Utils.ReferenceCache import reference_cache
         try:
-            from .CSVFiles import process_csv_file
-            from .JSONFiles import process_json_file
-            from .EXCELFiles import process_excel_file
-            from .CiriumFiles import process_cirium_file
-            from Scheduler import Scheduler
-            from Scheduler.jobs import jobs, update_subscription_job
-            from Config import FILES_PATH, EXCEL_FILES_PATH, CIRIUM_FILES_PATH
-            from API.FlightRadarAPI.LiveFlightsAPI import FlightPollingStorage
-
-            app.state.scheduler = Scheduler(jobs=jobs)
-            app.state.scheduler.start()
-
-            finder = Finder()
-
-            asyncio.create_task(finder.start_loop(  # JSON PROCESSOR
-                db_client=app.state.db_client,
-                func=process_json_file,
-                path=FILES_PATH,
-                extension=FilesExtensionEnum.JSON,
-                db="service"
-            ))
-            asyncio.create_task(finder.start_loop(  # CSV PROCESSOR
-                db_client=app.state.db_client,
-                func=process_csv_file,
-                path=FILES_PATH,
-                extension=FilesExtensionEnum.CSV,
-                db="main"
-            ))
-
-            asyncio.create_task(finder.start_loop(  # EXCEL PROCESSOR
-                db_client=app.state.db_client,
-                func=process_excel_file,
-                path=EXCEL_FILES_PATH,
-                extension=FilesExtensionEnum.EXCEL,
-                db="main"
-            ))
-
-            asyncio.create_task(finder.start_loop(  # EXCEL CIRIUM PROCESSOR
-                db_client=app.state.db_client,
-                func=process_cirium_file,
-                path=CIRIUM_FILES_PATH,
-                extension=FilesExtensionEnum.CIRIUM,
-                db="cirium"
-            ))
-
-            asyncio.create_task(update_subscription_job(
-                db_proxy=app.state.db_proxy,
-                change_type="created",
-                resource="users",
-            ))
-
+            await reference_cache.get()
         except Exception as _ex:
-            logger.warning(f"Error starting background tasks: {_ex}")
-        finally:
-            logger.info("Startup completed. Welcome :O")
-
-
-    # Middleware for requests + logging and db/cache
-    @app.middleware("http")
-    async def log_and_db_requests(request: Request, call_next):
-        start_time = asyncio.get_event_loop().time()
-        request.state.redis = app.state.redis
-        request.state.db_proxy = DBProxy(app.state.redis)
-
-        try:
-            response = await call_next(request)
-
-            duration = asyncio.get_event_loop().time() - start_time
-            logger.info(
-                f"{request.method} {request.url.path} completed_in={duration:.2f}s | "
-                f"status_code={response.status_code} | "
-                f"correlation_id={request.state.correlation_id}"
+            logger.warning(f"Failed to load references, loaded on first use: {_ex}")
+
+        app.state.background_tasks = []
+        if LEADER_ELECTION:
+            app.state.leader = LeaderElection(
+                app.state.redis,
+                on_elected=lambda: _start_background_work(app),
+                on_demoted=lambda: _stop_background_work(app),
             )
-            return response
-        finally:
-            await request.state.db_proxy.close_all()
+            app.state.leader.start()
+        else:
+            app.state.leader = None
+            await _start_background_work(app)
+        logger.info("Startup completed. Welcome :O")
 
-    # Middleware for add correlation id to requests
-    @app.middleware("http")
-    async def add_correlation_id(request: Request, call_next):
-        correlation_id = str(uuid.uuid4())
-        request.state.correlation_id = correlation_id
-        response = await call_next(request)
-        response.headers["X-Correlation-ID"] = correlation_id
-        return response
+    app.add_middleware(RequestContextMiddleware, fastapi_app=app)
 
     # Custom ValidationError handler
     @app.exception_handler(RequestValidationError)
@@ -361,8 +595,15 @@ def register_middlewares(app):
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Shutdown initiated...")
+        if app.state.leader is not None:
+            await app.state.leader.stop()
+        else:
+            await _stop_background_work(app)
         logger.info("Closing redis connection...")
+        await app.state.cache_listener.stop()
+        await app.state.db_listener.stop()
         await app.state.redis.close()
+        await app.state.cache_redis.close()
         logger.info("Closing database connection...")
         await app.state.db_client.dispose()
         logger.info("Shutdown completed. Bye!")
@@ -414,4 +655,4 @@ def performance_timer(func):
         return wrapper
 
 
-__all__ = ["register_middlewares", "cache_query", "DBProxy", "performance_timer"]
+__all__ = ["register_middlewares", "cache_query", "DBProxy", "RequestContextMiddleware", "performance_timer"]
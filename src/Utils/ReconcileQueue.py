@@ -0,0 +1,213 @@
+import asyncio
+from typing import Iterable
+
+from sqlalchemy import text, func, bindparam
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from Config import setup_logger, RECONCILE_BATCH, RECONCILE_CONCURRENCY, RECONCILE_POLL_INTERVAL, RECONCILE_LEASE, \
+    RECONCILE_MAX_RETRY_DELAY
+from Database import AircraftReconcileTask, get_session_factory
+from Scheduler.PowerPlatformJobs.Aircraft import reconcile_aircraft_manuals
+
+logger = setup_logger(
+    "reconcile_queue",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+_QUEUE = AircraftReconcileTask.__table__.name
+
+
+async def enqueue_reconcile(session: AsyncSession, manual_ids: Iterable[int]):
+    """
+    Queues manual entries for the reconcile with their aircraft, in the caller's transaction (no commit):
+    the task exists exactly when the edit is committed. Entries already queued are coalesced into their row;
+    a claimed row keeps its lease and is due again once the worker settles it
+    """
+    manual_ids = sorted({manual_id for manual_id in manual_ids if manual_id})
+    if not manual_ids:
+        return
+
+    stmt = insert(AircraftReconcileTask).values([{"manual_id": manual_id} for manual_id in manual_ids])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AircraftReconcileTask.manual_id],
+        set_={
+            "version": AircraftReconcileTask.version + 1,
+            "available_at": func.now(),
+            "attempts": 0,
+            "updated_at": func.now(),
+        }
+    )
+    await session.execute(stmt)
+
+
+class ReconcileQueue:
+    """
+    Workers of the reconcile queue, run by the leader. A worker claims up to `batch` due, unclaimed rows
+    (FOR UPDATE SKIP LOCKED, so workers never share a row) and leases them for `lease` seconds (claimed_until)
+    in one short transaction, reconciles them in one more, deletes the rows whose version did not change
+    meanwhile and releases the others. Rows of a stopped or crashed worker are claimable again when their lease
+    runs out.
+    A failing batch is retried entry by entry; failing entries back off exponentially
+    """
+
+    def __init__(self, batch: int = RECONCILE_BATCH, concurrency: int = RECONCILE_CONCURRENCY,
+                 poll_interval: float = RECONCILE_POLL_INTERVAL, lease: int = RECONCILE_LEASE,
+                 max_retry_delay: int = RECONCILE_MAX_RETRY_DELAY):
+        self.batch = batch
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_retry_delay = max_retry_delay
+
+        self.running = False
+        self.in_flight = 0
+        self.batches = 0
+        self.processed = 0
+        self.failed = 0
+
+    async def run(self):
+        self.running = True
+        logger.info(f"Reconcile queue started: {self.concurrency} workers, batches of {self.batch}")
+        try:
+            await asyncio.gather(*(self._worker() for _ in range(self.concurrency)))
+        finally:
+            self.running = False
+
+    async def _worker(self):
+        while True:
+            try:
+                claimed = await self._claim()
+            except Exception as _ex:
+                logger.error(f"Failed to claim reconcile tasks: {_ex}")
+                claimed = {}
+
+            if not claimed:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            self.in_flight += len(claimed)
+            try:
+                await self._process(claimed)
+            except Exception as _ex:
+                # Left to the lease
+                logger.error(f"Failed to settle {len(claimed)} reconcile tasks: {_ex}")
+            finally:
+                self.in_flight -= len(claimed)
+
+    async def _claim(self) -> dict[int, int]:
+        """manual id -> version of the claimed rows"""
+        async with get_session_factory("powerplatform")() as session:
+            result = await session.execute(
+                text(f"""
+                    UPDATE {_QUEUE} AS q
+                    SET claimed_until = now() + make_interval(secs => :lease), attempts = q.attempts + 1
+                    FROM (
+                        SELECT id FROM {_QUEUE}
+                        WHERE available_at <= now() AND (claimed_until IS NULL OR claimed_until <= now())
+                        ORDER BY available_at, id
+                        LIMIT :batch
+                        FOR UPDATE SKIP LOCKED
+                    ) AS due
+                    WHERE q.id = due.id
+                    RETURNING q.manual_id, q.version
+                """),
+                {"lease": self.lease, "batch": self.batch}
+            )
+            claimed = dict(result.tuples().all())
+            await session.commit()
+            return claimed
+
+    async def _process(self, claimed: dict[int, int]):
+        manual_ids = sorted(claimed)
+        failures: dict[int, str] = {}
+        try:
+            await reconcile_aircraft_manuals(manual_ids)
+        except Exception as _ex:
+            if len(manual_ids) == 1:
+                failures[manual_ids[0]] = str(_ex)
+            else:
+                logger.warning(f"Reconcile of {len(manual_ids)} entries failed, retrying one by one: {_ex}")
+                for manual_id in manual_ids:
+                    try:
+                        await reconcile_aircraft_manuals([manual_id])
+                    except Exception as _entry_ex:
+                        failures[manual_id] = str(_entry_ex)
+
+        self.batches += 1
+        self.processed += len(manual_ids) - len(failures)
+        self.failed += len(failures)
+        for manual_id, error in failures.items():
+            logger.error(f"Reconcile of AircraftManual {manual_id} failed: {error}")
+
+        await self._settle(claimed, failures)
+
+    async def _settle(self, claimed: dict[int, int], failures: dict[int, str]):
+        """
+        Deletes the done rows and schedules the retries, unless an enqueue bumped the version meanwhile,
+        then releases the lease of the rows left: re-queued ones are due at once
+        """
+        done = [{"manual_id": manual_id, "version": version}
+                for manual_id, version in claimed.items() if manual_id not in failures]
+        retries = [{"manual_id": manual_id, "version": claimed[manual_id], "error": error[:1000],
+                    "max_delay": self.max_retry_delay}
+                   for manual_id, error in failures.items()]
+
+        async with get_session_factory("powerplatform")() as session:
+            if done:
+                await session.execute(
+                    text(f"DELETE FROM {_QUEUE} WHERE manual_id = :manual_id AND version = :version"),
+                    done
+                )
+            if retries:
+                await session.execute(
+                    text(f"""
+                        UPDATE {_QUEUE}
+                        SET available_at = now() + make_interval(secs => LEAST(power(2, attempts), :max_delay)),
+                            last_error = :error
+                        WHERE manual_id = :manual_id AND version = :version
+                    """),
+                    retries
+                )
+            await session.execute(
+                text(f"UPDATE {_QUEUE} SET claimed_until = NULL WHERE manual_id IN :manual_ids")
+                .bindparams(bindparam("manual_ids", expanding=True)),
+                {"manual_ids": list(claimed)}
+            )
+            await session.commit()
+
+    async def stats(self) -> dict:
+        """Depth and lag of the queue (all processes) and the counters of this process' workers"""
+        async with get_session_factory("powerplatform")() as session:
+            row = (await session.execute(
+                text(f"""
+                    SELECT count(*) AS depth,
+                           count(*) FILTER (WHERE available_at <= now()
+                                            AND (claimed_until IS NULL OR claimed_until <= now())) AS due,
+                           count(*) FILTER (WHERE claimed_until > now()) AS claimed,
+                           count(*) FILTER (WHERE last_error IS NOT NULL) AS failing,
+                           extract(epoch FROM now() - min(created_at)) AS lag_seconds
+                    FROM {_QUEUE}
+                """)
+            )).one()
+
+        return {
+            "depth": row.depth,
+            "due": row.due,
+            "claimed": row.claimed,
+            "failing": row.failing,
+            # Age of the oldest pending edit
+            "lag_seconds": float(row.lag_seconds or 0),
+            "workers": {
+                "running": self.running,
+                "in_flight": self.in_flight,
+                "batches": self.batches,
+                "processed": self.processed,
+                "failed": self.failed,
+            },
+        }
+
+
+reconcile_queue = ReconcileQueue()
+
+__all__ = ["enqueue_reconcile", "ReconcileQueue", "reconcile_queue"]
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from Config import setup_logger, REFERENCE_CACHE_TTL
+from Database import Airline, Engine, AircraftTemplate, get_session_factory
+
+logger = setup_logger(
+    "reference_cache",
+    log_format='%(levelname)s:     [%(name)s] %(asctime)s | %(message)s'
+)
+
+
+class AirlineRef:
+    __slots__ = ("id", "airline_name", "icao", "iata")
+
+    def __init__(self, id: int, airline_name: str, icao: Optional[str], iata: Optional[str]):
+        self.id = id
+        self.airline_name = airline_name
+        self.icao = icao
+        self.iata = iata
+
+
+class EngineRef:
+    __slots__ = ("id", "engine_manufacture", "engine_model")
+
+    def __init__(self, id: int, engine_manufacture: str, engine_model: str):
+        self.id = id
+        self.engine_manufacture = engine_manufacture
+        self.engine_model = engine_model
+
+
+class TemplateRef:
+    __slots__ = ("id", "template_name")
+
+    def __init__(self, id: int, template_name: str):
+        self.id = id
+        self.template_name = template_name
+
+
+def _index(rows: list, attr: str) -> dict:
+    """attr value -> row; on duplicates the lowest id wins, like the first row of an ordered query"""
+    index = {}
+    for row in rows:
+        key = getattr(row, attr)
+        if key is not None:
+            index.setdefault(key, row)
+    return index
+
+
+class References:
+    """One loaded version of the reference tables. Never mutated: a reload builds a new one"""
+    __slots__ = ("version", "loaded_at", "airlines_by_id", "airlines_by_name", "airlines_by_icao", "airlines_by_iata",
+                 "engines_by_id", "engines_by_model", "templates_by_id", "templates_by_name")
+
+    def __init__(self, version: int, airlines: list[AirlineRef], engines: list[EngineRef],
+                 templates: list[TemplateRef]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        self.airlines_by_id = {a.id: a for a in airlines}
+        self.airlines_by_name = _index(airlines, "airline_name")
+        self.airlines_by_icao = _index(airlines, "icao")
+        self.airlines_by_iata = _index(airlines, "iata")
+
+        self.engines_by_id = {e.id: e for e in engines}
+        self.engines_by_model = _index(engines, "engine_model")
+
+        self.templates_by_id = {t.id: t for t in templates}
+        self.templates_by_name = _index(templates, "template_name")
+
+
+class ReferenceCache:
+    """
+    Airlines, engines and templates of the PowerPlatform database held per process.
+    `invalidate()` (row change notifications, see DBNotifications) bumps the wanted version:
+    the next `get()` reloads, concurrent callers share one load. REFERENCE_CACHE_TTL bounds the age
+    in case notifications are missed
+    """
+
+    def __init__(self, ttl: int = REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._references: Optional[References] = None
+        self._wanted = 1
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._references.version if self._references else 0
+
+    def _is_current(self) -> bool:
+        references = self._references
+        return (
+            references is not None
+            and references.version >= self._wanted
+            and time.monotonic() - references.loaded_at < self.ttl
+        )
+
+    def invalidate(self):
+        self._wanted += 1
+
+    async def get(self) -> References:
+        if self._is_current():
+            return self._references
+        async with self._lock:
+            if not self._is_current():
+                await self._load()
+            return self._references
+
+    async def _load(self):
+        # Changes notified during the load bump _wanted past this version and trigger the next one
+        version = self._wanted
+        async with get_session_factory("powerplatform")() as session:
+            airlines = [
+                AirlineRef(*row) for row in await session.execute(
+                    select(Airline.id, Airline.airline_name, Airline.icao, Airline.iata).order_by(Airline.id)
+                )
+            ]
+            engines = [
+                EngineRef(*row) for row in await session.execute(
+                    select(Engine.id, Engine.engine_manufacture, Engine.engine_model).order_by(Engine.id)
+                )
+            ]
+            templates = [
+                TemplateRef(*row) for row in await session.execute(
+                    select(AircraftTemplate.id, AircraftTemplate.template_name).order_by(AircraftTemplate.id)
+                )
+            ]
+
+        self._references = References(version, airlines, engines, templates)
+        logger.debug(f"References v{version} loaded: {len(airlines)} airlines, {len(engines)} engines, "
+                     f"{len(templates)} templates")
+
+
+reference_cache = ReferenceCache()
+
+# Tables whose changes invalidate the cache
+REFERENCE_TABLES = frozenset({Airline.__table__.name, Engine.__table__.name, AircraftTemplate.__table__.name})
+
+
+async def get_references() -> References:
+    return await reference_cache.get()
+
+
+__all__ = ["AirlineRef", "EngineRef", "TemplateRef", "References", "ReferenceCache", "reference_cache",
+           "REFERENCE_TABLES", "get_references"]
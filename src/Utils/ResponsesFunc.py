@@ -2,9 +2,11 @@ from typing import Optional, TypeVar, Set
 from http import HTTPStatus
 
 
+import orjson
 from fastapi import Request, status, Response
 
 from Schemas import DetailField, DefaultResponse, ErrorResponse
+from .Caching import CachedJSON
 
 T = TypeVar("T")
 
@@ -25,9 +27,25 @@ def build_responses(*, include: Set[int]) -> dict:
     return result
 
 
+def raw_response(*, request: Request, response: Response, data: CachedJSON, msg: str,
+                 status_code: status = status.HTTP_200_OK) -> Response:
+    """
+    Builds the DefaultResponse envelope around pre-serialized cached bytes,
+    skipping validation and serialization of the data by the response model
+    """
+    details = orjson.dumps(
+        DetailField(msg=msg, correlationId=request.state.correlation_id).model_dump(mode="json")
+    )
+    body = b'{"status_code":%d,"details":%b,"data":%b}' % (status_code, details, data.body)
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
+
+
 def success_response(*, request: Request, response: Response, data: T, msg: str = "Success",
-                     status_code: status = status.HTTP_200_OK) -> DefaultResponse[T]:
+                     status_code: status = status.HTTP_200_OK) -> DefaultResponse[T] | Response:
     response.status_code = status_code
+    if isinstance(data, CachedJSON):
+        return raw_response(request=request, response=response, data=data, msg=msg, status_code=status_code)
     return DefaultResponse(
         status_code=status_code,
         details=DetailField(
@@ -0,0 +1,137 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Optional, Callable
+
+from fastapi.routing import APIRoute
+from redis.asyncio import Redis
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestTimings:
+    """
+    Per-request accumulators of the time spent in the database, Redis and response serialization.
+    Emitted as a `Server-Timing` header and as fields of the access log
+    """
+    __slots__ = ("started", "db", "db_queries", "redis", "redis_calls", "handler_done")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.db_queries = 0
+        self.redis = 0.0
+        self.redis_calls = 0
+        self.handler_done: Optional[float] = None
+
+    def _split(self, now: float) -> dict[str, float]:
+        """Milliseconds per part. `serialize` is response model validation + JSON encoding after the endpoint returned"""
+        total = now - self.started
+        serialize = now - self.handler_done if self.handler_done is not None else 0.0
+        return {
+            "db": self.db * 1000,
+            "redis": self.redis * 1000,
+            "serialize": serialize * 1000,
+            "app": max(total - self.db - self.redis - serialize, 0.0) * 1000,
+            "total": total * 1000,
+        }
+
+    def server_timing(self, now: float) -> str:
+        parts = self._split(now)
+        return ", ".join((
+            f'db;dur={parts["db"]:.2f};desc="{self.db_queries} queries"',
+            f'redis;dur={parts["redis"]:.2f};desc="{self.redis_calls} calls"',
+            f'serialize;dur={parts["serialize"]:.2f}',
+            f'app;dur={parts["app"]:.2f}',
+            f'total;dur={parts["total"]:.2f}',
+        ))
+
+    def log_fields(self, now: float) -> str:
+        parts = self._split(now)
+        return (
+            f"db_ms={parts['db']:.2f} db_queries={self.db_queries} | "
+            f"redis_ms={parts['redis']:.2f} redis_calls={self.redis_calls} | "
+            f"serialize_ms={parts['serialize']:.2f} | app_ms={parts['app']:.2f}"
+        )
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings():
+    """Starts accumulating for the current request. Returns the token for `stop_request_timings`"""
+    return _request_timings.set(RequestTimings())
+
+
+def stop_request_timings(token):
+    _request_timings.reset(token)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _request_timings.get()
+
+
+# -----------------------------
+# SQLAlchemy: every engine, the async ones run their cursors in the caller's context
+# -----------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    if _request_timings.get() is not None:
+        conn.info.setdefault("request_timing_starts", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, _cursor, _statement, _parameters, _context, _executemany):
+    timings = _request_timings.get()
+    starts = conn.info.get("request_timing_starts")
+    if timings is not None and starts:
+        timings.db += time.perf_counter() - starts.pop()
+        timings.db_queries += 1
+
+
+# -----------------------------
+# Redis
+# -----------------------------
+class TimedRedis(Redis):
+    """Redis client adding the duration of each command to the current request timings"""
+
+    async def execute_command(self, *args, **options):
+        timings = _request_timings.get()
+        if timings is None:
+            return await super().execute_command(*args, **options)
+
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            timings.redis += time.perf_counter() - start
+            timings.redis_calls += 1
+
+
+# -----------------------------
+# Endpoints: marks where the endpoint returned, the rest until the response starts is serialization
+# -----------------------------
+def _mark_handler_done(endpoint: Callable) -> Callable:
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await endpoint(*args, **kwargs)
+        finally:
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.handler_done = time.perf_counter()
+
+    wrapper.__timed__ = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "__timed__", False):
+            endpoint = _mark_handler_done(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+__all__ = ["RequestTimings", "TimedRedis", "TimedRoute", "start_request_timings", "stop_request_timings",
+           "current_timings"]
@@ -1,3 +1,4 @@
 from .MicroUtils import *
 from .Middlewares import register_middlewares, cache_query, DBProxy, performance_timer
+from .Caching import result_tags, build_cache_key, cache_stats
 from .ResponsesFunc import warning_response, success_response, error_response
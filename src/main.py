@@ -1,8 +1,14 @@
+import os
+
 import uvicorn
 
-from Config import HOST, PORT
+from Config import HOST, PORT, WORKERS
 from Server import app
 from BackgroundProcesses import *
 
 if __name__ == "__main__":
-    uvicorn.run(app, host=HOST, port=PORT)
+    if WORKERS > 1:
+        # Workers import the app themselves; background work is leader-elected among them (Utils/LeaderElection.py)
+        uvicorn.run("Server:app", host=HOST, port=PORT, workers=WORKERS, app_dir=os.path.dirname(__file__))
+    else:
+        uvicorn.run(app, host=HOST, port=PORT)